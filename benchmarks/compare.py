@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""
+benchmarks.compare
+~~~~~~~~~~~~~~~~~~
+
+Compares two benchmark result files written by `benchmarks.run`.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+from typing import Iterator, List, Optional, Tuple
+
+# Metric name and whether a higher value is better.
+END_TO_END_METRICS: List[Tuple[str, bool]] = [
+    ("requests_per_second", True),
+    ("p50_ms", False),
+    ("p99_ms", False),
+]
+
+
+def rows(baseline: dict, candidate: dict) -> Iterator[Tuple[str, float, float, float]]:
+    for name, old in sorted(baseline.get("end_to_end", {}).items()):
+        new = candidate.get("end_to_end", {}).get(name)
+        if new is None:
+            continue
+        for metric, higher_is_better in END_TO_END_METRICS:
+            change = (new[metric] - old[metric]) / old[metric] * 100
+            yield (
+                f"{name}.{metric}",
+                old[metric],
+                new[metric],
+                change if higher_is_better else -change,
+            )
+    for name, old in sorted(baseline.get("micro", {}).items()):
+        new = candidate.get("micro", {}).get(name)
+        if new is None:
+            continue
+        change = (old["us_per_op"] - new["us_per_op"]) / old["us_per_op"] * 100
+        yield f"{name}.us_per_op", old["us_per_op"], new["us_per_op"], change
+    old_import = baseline.get("import_time", {}).get("import_ms")
+    new_import = candidate.get("import_time", {}).get("import_ms")
+    if old_import and new_import:
+        change = (old_import - new_import) / old_import * 100
+        yield "import_time.import_ms", old_import, new_import, change
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"{'benchmark':<44}{'baseline':>12}{'candidate':>12}{'better by':>12}")
+    for name, old, new, improvement in rows(baseline, candidate):
+        print(f"{name:<44}{old:>12.3f}{new:>12.3f}{improvement:>+11.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""
+benchmarks.importtime
+~~~~~~~~~~~~~~~~~~~~~
+
+Measures how long `import onemapsg` takes in a fresh interpreter by parsing
+the output of `python -X importtime`, and fails if it exceeds a budget or
+loads a dependency that should only be imported on first use.
+
+Usage:
+    python -m benchmarks.importtime --max-ms 50
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Modules that must only be imported when a call needs them.
+LAZY_MODULES: List[str] = [
+    "requests",
+    "urllib3",
+    "httpx",
+    "polyline",
+    "numpy",
+    "inspect",
+    "concurrent.futures",
+]
+
+
+def parse_importtime(output: str) -> Dict[str, Tuple[int, int]]:
+    """Parses `-X importtime` output into {module: (self us, cumulative us)}."""
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def import_modules(module: str = "onemapsg") -> Dict[str, Tuple[int, int]]:
+    """Imports `module` in a fresh interpreter and returns its parsed
+    `-X importtime` output."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def measure(module: str = "onemapsg", repeat: int = 7, top: int = 10) -> dict:
+    """Returns the median import time of `module`, its heaviest imports and
+    the lazy modules it loaded."""
+    runs: List[Dict[str, Tuple[int, int]]] = [
+        import_modules(module) for _ in range(repeat)
+    ]
+    last: Dict[str, Tuple[int, int]] = runs[-1]
+    heaviest: List[Tuple[str, Tuple[int, int]]] = sorted(
+        last.items(), key=lambda item: item[1][0], reverse=True
+    )[:top]
+    return dict(
+        import_ms=statistics.median(run[module][1] for run in runs) / 1000,
+        modules=len(last),
+        heaviest={name: self_us / 1000 for name, (self_us, _) in heaviest},
+        eager=[name for name in LAZY_MODULES if name in last],
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--module", default="onemapsg")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--max-ms", type=float, help="Fail above this import time.")
+    args = parser.parse_args(argv)
+
+    result = measure(args.module, args.repeat)
+    print(f"import {args.module}: {result['import_ms']:.1f} ms median")
+    print(f"{result['modules']} modules, heaviest (self time):")
+    for name, ms in result["heaviest"].items():
+        print(f"  {name:<40}{ms:>8.2f} ms")
+    failures: List[str] = []
+    if result["eager"]:
+        failures.append("eagerly imported: " + ", ".join(result["eager"]))
+    if args.max_ms is not None and result["import_ms"] > args.max_ms:
+        failures.append(f"import time above {args.max_ms:g} ms")
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
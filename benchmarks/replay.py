@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""
+benchmarks.replay
+~~~~~~~~~~~~~~~~~
+
+Replays every interaction of a cassette through a ReplayTransport and
+builds the response models, to benchmark parsing and model construction
+on recorded production traffic without network access.
+
+Usage:
+    python -m benchmarks.replay traffic.gz --output replay.json
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from onemapsg import utils
+from onemapsg.api import endpoints
+from onemapsg.cassette import Cassette, ReplayTransport
+from onemapsg.profiler import percentile
+
+
+def action_types() -> Dict[str, str]:
+    """Maps endpoint paths to the action type whose model they return."""
+    mapping: Dict[str, str] = {}
+    for name, path in endpoints.items():
+        if hasattr(utils, f"get_{name}_class"):
+            mapping.setdefault("/" + path, name)
+    return mapping
+
+
+def replay(cassette: Cassette, realtime: bool, speed: float) -> dict:
+    transport = ReplayTransport(cassette, realtime=realtime, speed=speed)
+    classes: Dict[str, Any] = {
+        path: getattr(utils, f"get_{name}_class")()
+        for path, name in action_types().items()
+    }
+    latencies: List[float] = []
+    started_at = time.perf_counter()
+    for (method, url), recordings in cassette.index.items():
+        cls = classes.get(urlsplit(url).path)
+        for _ in recordings:
+            call_started_at = time.perf_counter()
+            response = transport.request(method, url)
+            if cls is not None and response.status_code == 200:
+                utils.coerce_response(cls, response.data)
+            latencies.append(time.perf_counter() - call_started_at)
+    elapsed = time.perf_counter() - started_at
+    return dict(
+        interactions=len(latencies),
+        requests_per_second=len(latencies) / elapsed if elapsed else 0.0,
+        p50_ms=percentile(latencies, 50) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded cassette.")
+    parser.add_argument("cassette")
+    parser.add_argument("--output", "-o", help="Write results to this JSON file.")
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    started_at = time.perf_counter()
+    cassette = Cassette.load(args.cassette)
+    results = dict(load_seconds=time.perf_counter() - started_at)
+    results.update(replay(cassette, args.realtime, args.speed))
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
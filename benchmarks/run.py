@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+"""
+benchmarks.run
+~~~~~~~~~~~~~~
+
+Measures end-to-end throughput and latency of the client against the local
+OneMap simulator, microbenchmarks of model construction, `to_dict` and
+polyline decoding, and the time `import onemapsg` takes. Results are written
+as JSON so that runs on different commits can be compared with
+`benchmarks.compare`.
+
+Usage:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.compare baseline.json bench.json
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import polyline
+
+from benchmarks import importtime
+from onemapsg.api import API, BASE_URL
+from onemapsg.client import OneMap
+from onemapsg.profiler import percentile
+from onemapsg.response import GeocodeInfo, RouteResult, SearchResult
+from onemapsg.simulator import FaultProfile, Simulator, constant_latency
+from onemapsg.simulator import payloads
+
+OPERATIONS: Dict[str, Callable[[OneMap], Any]] = {
+    "search": lambda client: client.search("one raffles quay"),
+    "route": lambda client: client.route(
+        "1.28118,103.85190", "1.30393,103.83637", "drive"
+    ),
+    "reverse_geocode": lambda client: client.reverse_geocode(
+        "wgs84", (1.29964, 103.80011)
+    ),
+}
+
+
+def git_commit() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def end_to_end(
+    client: OneMap, operation: Callable[[OneMap], Any], requests: int, concurrency: int
+) -> dict:
+    """Runs `requests` calls on `concurrency` threads."""
+
+    def timed_call(_: int) -> float:
+        started_at = time.perf_counter()
+        operation(client)
+        return time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies: List[float] = list(executor.map(timed_call, range(requests)))
+    elapsed = time.perf_counter() - started_at
+    return dict(
+        requests=requests,
+        concurrency=concurrency,
+        requests_per_second=requests / elapsed,
+        p50_ms=percentile(latencies, 50) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+    )
+
+
+def micro(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> dict:
+    """Returns the best time per call over `repeat` runs, in microseconds."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return dict(us_per_op=best * 1e6, calls=number)
+
+
+def microbenchmarks() -> Dict[str, dict]:
+    search = payloads.search_payload("one raffles quay", found=10)
+    route = payloads.route_payload((1.28118, 103.8519), (1.30393, 103.83637), "drive")
+    geocode = payloads.reverse_geocode_payload(1.29964, 103.80011, buffer=60)
+    search_result = SearchResult(**search)
+    route_result = RouteResult(**route)
+    return {
+        "search_result_construct": micro(lambda: SearchResult(**search)),
+        "route_result_construct": micro(lambda: RouteResult(**route)),
+        "geocode_info_construct": micro(lambda: GeocodeInfo(**geocode)),
+        "search_result_to_dict": micro(search_result.to_dict),
+        "route_result_to_dict": micro(route_result.to_dict),
+        "polyline_decode": micro(lambda: polyline.decode(route["route_geometry"])),
+        "route_result_lat_longs": micro(lambda: route_result.lat_longs),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    results: Dict[str, Any] = dict(
+        meta=dict(
+            commit=git_commit(),
+            python=sys.version.split()[0],
+            platform=platform.platform(),
+            timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            latency=args.latency,
+        ),
+        end_to_end={},
+        micro={},
+        import_time={},
+    )
+    if not args.skip_end_to_end:
+        profile = FaultProfile(latency=constant_latency(args.latency))
+        with Simulator(profile) as simulator:
+            API.set_base_url(simulator.base_url)
+            try:
+                client = OneMap("benchmark@example.com", "password")
+                for name, operation in OPERATIONS.items():
+                    operation(client)  # warm up
+                    results["end_to_end"][name] = end_to_end(
+                        client, operation, args.requests, args.concurrency
+                    )
+            finally:
+                API.set_base_url(BASE_URL)
+    if not args.skip_micro:
+        results["micro"] = microbenchmarks()
+    if not args.skip_import:
+        results["import_time"] = importtime.measure()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--output", "-o", help="Write results to this JSON file.")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--latency", type=float, default=0.005, help="Simulator latency (s)."
+    )
+    parser.add_argument("--skip-end-to-end", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-import", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,23 @@ Python OneMap SG API
 ~~~~~~~~~~~~~~~~~~~~
 """
 
+from .breaker import CircuitBreaker
+from .cache import Cache
 from .client import OneMap
+from .geo import GeohashSnapper, GridSnapper
+from .metrics import MetricsRegistry
+from .normalize import Normalizer
+from .profiler import Profiler
+from .ratelimit import RateLimiter
 
-__all__ = ["OneMap"]
+__all__ = [
+    "Cache",
+    "CircuitBreaker",
+    "GeohashSnapper",
+    "GridSnapper",
+    "MetricsRegistry",
+    "Normalizer",
+    "OneMap",
+    "Profiler",
+    "RateLimiter",
+]
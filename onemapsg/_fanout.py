@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg._fanout
+~~~~~~~~~~~~~~~~
+
+This module contains the thread pool fan-out shared by the route matrix,
+area sweeps, batches and geocode streams.
+
+Calls are made through the client's public methods on worker threads, so
+everything a single call goes through applies to each of them: the
+client's caches, rate limiter, circuit breaker, hedger and hooks, and the
+deadline of the caller, which is carried over to the worker threads.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, Optional, Tuple
+
+from .deadline import Deadline, current_deadline, use
+
+# Marks the end of the items, which may contain None.
+_END: Any = object()
+
+
+def fan_out(
+    function: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int = 8,
+    window: Optional[int] = None,
+    raise_on_error: bool = False,
+    thread_name_prefix: str = "onemap",
+) -> Generator[Tuple[Any, Any, Optional[Exception]], None, None]:
+    """
+    Calls `function` on every item on `max_workers` threads and yields
+    (item, result, None), or (item, None, exception) if the call failed, in
+    the order calls complete.
+
+    `items` is consumed lazily, with at most `window` calls in flight (twice
+    `max_workers` by default), and nothing more is pulled while the caller
+    is busy with a result. With `raise_on_error`, the first exception is
+    raised instead and the calls not yet started are cancelled.
+    """
+    if window is not None and window < 1:
+        raise ValueError("`window` must be at least 1.")
+    limit: int = window if window is not None else 2 * max_workers
+    active: Optional[Deadline] = current_deadline()
+
+    def call(item: Any) -> Any:
+        with use(active):
+            return function(item)
+
+    remaining: Iterator[Any] = iter(items)
+    exhausted: bool = False
+    pending: Dict[Future, Any] = {}
+    executor: ThreadPoolExecutor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix=thread_name_prefix
+    )
+    try:
+        while True:
+            while not exhausted and len(pending) < limit:
+                item: Any = next(remaining, _END)
+                if item is _END:
+                    exhausted = True
+                    break
+                pending[executor.submit(call, item)] = item
+            if not pending:
+                return
+            for future in wait(pending, return_when=FIRST_COMPLETED).done:
+                item = pending.pop(future)
+                try:
+                    result: Any = future.result()
+                except Exception as err:
+                    if raise_on_error:
+                        raise
+                    yield item, None, err
+                    continue
+                yield item, result, None
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
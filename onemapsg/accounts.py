@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.accounts
+~~~~~~~~~~~~~~~~~
+
+This module contains a pool of OneMap accounts, to spread private API
+calls (routes and reverse geocodes) over several rate limits. Each account
+has its own token, renewed before it expires, and its own rate limiter, so
+throughput grows with the number of accounts.
+
+Each call goes to the healthy account with the fewest requests in flight,
+then the most rate limiter tokens available. An account is taken out of
+rotation for `cooldown` seconds when it fails to authenticate, when a
+request is rejected with 401, 403 or 429, or when `max_failures` requests
+in a row fail.
+
+Usage:
+    pool = AccountPool([("a@example.com", "..."), ("b@example.com", "...")], rate=4)
+    onemap = OneMap(accounts=pool)
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import exceptions, status
+from .ratelimit import RateLimiter
+
+HEALTHY: str = "healthy"
+UNHEALTHY: str = "unhealthy"
+
+# Responses meaning the account itself was refused.
+REJECTED_STATUSES: Tuple[int, ...] = (
+    status.HTTP_401_UNAUTHORIZED,
+    status.HTTP_403_FORBIDDEN,
+    status.HTTP_429_TOO_MANY_REQUESTS,
+)
+
+
+class Account:
+    """One account of a pool: its credentials, token and rate limiter."""
+
+    def __init__(
+        self, email: str, password: str, rate_limiter: Optional[RateLimiter] = None
+    ) -> None:
+        self.email = email
+        self.password = password
+        self.rate_limiter = rate_limiter
+        self.token: Optional[str] = None
+        self.token_expiry: Optional[int] = None
+        self.in_flight: int = 0
+        self.requests: int = 0
+        self.failures: int = 0
+        self.disabled_until: float = 0.0
+        # Held while the token is renewed, so that it is renewed once.
+        self.lock = threading.Lock()
+
+    def token_expiring(self, margin: int = 120) -> bool:
+        """Whether the account has no token or it expires within
+        `margin` seconds."""
+        return (
+            self.token is None
+            or self.token_expiry is None
+            or self.token_expiry - int(time.time()) < margin
+        )
+
+
+class AccountPool:
+    """
+    Accounts used in turn for private API calls. Accounts get a
+    RateLimiter of `rate` requests per second each, with bursts of `burst`,
+    if `rate` is given. Safe to share between threads and clients.
+    """
+
+    def __init__(
+        self,
+        credentials: Iterable[Tuple[str, str]],
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_failures: int = 3,
+        cooldown: float = 60.0,
+    ) -> None:
+        self.accounts: List[Account] = [
+            Account(
+                email, password, RateLimiter(rate, burst) if rate is not None else None
+            )
+            for email, password in credentials
+        ]
+        if not self.accounts:
+            raise ValueError("`credentials` must contain at least one account.")
+        self.max_failures = max(1, max_failures)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def healthy(self) -> List[Account]:
+        """Accounts currently in rotation."""
+        now: float = time.monotonic()
+        return [a for a in self.accounts if a.disabled_until <= now]
+
+    def states(self) -> Dict[str, str]:
+        """Returns whether each account, by email, is in rotation."""
+        healthy: List[Account] = self.healthy()
+        return {a.email: HEALTHY if a in healthy else UNHEALTHY for a in self.accounts}
+
+    def acquire(self) -> Account:
+        """Checks out the least loaded healthy account. Every account
+        acquired must be given back with `release`. Raises
+        AccountsUnavailable if no account is in rotation."""
+        with self._lock:
+            now: float = time.monotonic()
+            candidates: List[Account] = [
+                a for a in self.accounts if a.disabled_until <= now
+            ]
+            if not candidates:
+                retry_after: float = min(a.disabled_until for a in self.accounts) - now
+                raise exceptions.AccountsUnavailable(
+                    "No OneMap account is available.", retry_after
+                )
+            account: Account = min(
+                candidates,
+                key=lambda a: (
+                    a.in_flight,
+                    -a.rate_limiter.available if a.rate_limiter else 0.0,
+                    a.requests,
+                ),
+            )
+            account.in_flight += 1
+            account.requests += 1
+            return account
+
+    def release(
+        self, account: Account, failed: bool = False, rejected: bool = False
+    ) -> None:
+        """Gives back an account with the outcome of its request. Requests
+        that did not complete, e.g. past a deadline, are neither."""
+        with self._lock:
+            account.in_flight -= 1
+            if rejected:
+                self._disable(account)
+            elif failed:
+                account.failures += 1
+                if account.failures >= self.max_failures:
+                    self._disable(account)
+            else:
+                account.failures = 0
+
+    def disable(self, account: Account) -> None:
+        """Takes an account out of rotation for `cooldown` seconds."""
+        with self._lock:
+            self._disable(account)
+
+    def _disable(self, account: Account) -> None:
+        account.disabled_until = time.monotonic() + self.cooldown
+        account.failures = 0
+        # The token may be why it was refused; get a new one on return.
+        account.token = account.token_expiry = None
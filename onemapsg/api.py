@@ -35,9 +35,18 @@ class APISingleton:
     reverse_geocode_svy21: str
     reverse_geocode_wgs84: str
 
-    def __init__(self) -> None:
+    base_url: str
+
+    def __init__(self, base_url: str = BASE_URL) -> None:
+        self.set_base_url(base_url)
+
+    def set_base_url(self, base_url: str) -> None:
+        """Points every endpoint at another server, e.g. a local stub."""
+        if not base_url.endswith("/"):
+            base_url = f"{base_url}/"
+        self.base_url = base_url
         for k, v in endpoints.items():
-            setattr(self, k, f"{BASE_URL}{v}")
+            setattr(self, k, f"{base_url}{v}")
 
 
 API: APISingleton = APISingleton()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.batch
+~~~~~~~~~~~~~~
+
+This module contains the batch mode for very large route batches. In a
+plain thread pool, JSON parsing, RouteResult construction and polyline
+decoding all hold the GIL, so one core ends up at 100% while the network
+threads wait. Here responses are fetched on threads without decoding their
+bodies, and decoding runs in a pool of processes that pass back compact
+results, so throughput scales with cores.
+
+Usage:
+    for route in route_batch(onemap, pairs, "walk", processes=8):
+        if route.ok:
+            print(route.index, route.total_time, route.total_distance)
+"""
+
+import json
+import math
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import closing
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from . import exceptions, status, utils
+from ._fanout import fan_out
+from .matrix import MATRIX_ROUTE_TYPES
+from .response import Response, RouteResult
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .client import OneMap
+
+Pair = Tuple[str, str]
+
+# What fetching threads hand to decoders: the index of the pair, the status
+# code and the undecoded body, or the decoded data if the transport could
+# not leave it undecoded.
+Fetched = Tuple[int, int, Any]
+
+# What decoders pass back: the index of the pair, the status code, total
+# time, total distance, lat/long pairs packed as doubles and an error
+# message.
+Decoded = Tuple[int, int, float, float, Optional[bytes], Optional[str]]
+
+
+class BatchRoute:
+    """
+    A route of a batch: the index of its pair in the input, total time
+    (seconds), total distance (metres) and, if requested, the decoded route
+    geometry. Pairs that could not be routed have `error` set instead.
+    """
+
+    __slots__ = (
+        "index",
+        "start",
+        "end",
+        "total_time",
+        "total_distance",
+        "geometry",
+        "error",
+    )
+
+    def __init__(
+        self,
+        index: int,
+        start: str,
+        end: str,
+        total_time: float = math.nan,
+        total_distance: float = math.nan,
+        geometry: Optional[bytes] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        self.index = index
+        self.start = start
+        self.end = end
+        self.total_time = total_time
+        self.total_distance = total_distance
+        self.geometry = geometry
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def lat_longs(self) -> Optional[List[Tuple[float, float]]]:
+        """Decoded route geometry, unpacked on access."""
+        if self.geometry is None:
+            return None
+        values: array = array("d")
+        values.frombytes(self.geometry)
+        return list(zip(values[0::2], values[1::2]))
+
+
+def _decode(index: int, status_code: int, body: Any, geometry: bool) -> Decoded:
+    """Decodes one response. Runs in the decoding processes."""
+    try:
+        data: Any = json.loads(body) if isinstance(body, (bytes, str)) else body
+    except ValueError as err:
+        return index, status_code, math.nan, math.nan, None, f"Invalid JSON: {err}"
+    if not isinstance(data, dict):
+        return index, status_code, math.nan, math.nan, None, "Invalid response."
+    if status_code != status.HTTP_200_OK:
+        message: Optional[str] = data.get("error")
+        return index, status_code, math.nan, math.nan, None, message
+    result: RouteResult = RouteResult(**data)
+    if not result.route_summary:
+        return (
+            index,
+            status_code,
+            math.nan,
+            math.nan,
+            None,
+            result.status_message or "No route found.",
+        )
+    packed: Optional[bytes] = None
+    if geometry:
+        lat_longs: Optional[List[Tuple[float, float]]] = result.lat_longs
+        if lat_longs is not None:
+            packed = array("d", [v for pair in lat_longs for v in pair]).tobytes()
+    return (
+        index,
+        status_code,
+        float(result.route_summary["total_time"]),
+        float(result.route_summary["total_distance"]),
+        packed,
+        None,
+    )
+
+
+def _decode_chunk(chunk: List[Fetched], geometry: bool) -> List[Decoded]:
+    return [_decode(index, code, body, geometry) for index, code, body in chunk]
+
+
+def _route(pair: Pair, decoded: Decoded) -> BatchRoute:
+    index, status_code, total_time, total_distance, geometry, message = decoded
+    error: Optional[Exception] = None
+    if status.is_client_error(status_code):
+        error = exceptions.BadRequest(message or "Please ensure request is correct.")
+    elif status.is_server_error(status_code):
+        error = exceptions.ServerError(
+            "OneMap SG server error. " "Please try again later."
+        )
+    elif message is not None:
+        error = ValueError(f"No route between {pair[0]} and {pair[1]}: {message}")
+    return BatchRoute(
+        index, pair[0], pair[1], total_time, total_distance, geometry, error
+    )
+
+
+def _start_context() -> Any:
+    """Decoders are started without forking: forking a process whose
+    fetching threads hold locks can deadlock the children."""
+    methods: List[str] = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def route_batch(
+    client: "OneMap",
+    pairs: Iterable[Pair],
+    route_type: str,
+    geometry: bool = False,
+    processes: Optional[int] = None,
+    max_workers: int = 8,
+    chunksize: int = 64,
+    timeout: int = 15,
+) -> Iterator[BatchRoute]:
+    """
+    Routes every (start, end) pair and yields a BatchRoute for each, in the
+    order they complete. Route geometries are decoded only if `geometry` is
+    True.
+
+    Responses are fetched on `max_workers` threads through
+    `OneMap.fetch_raw`, as described in `onemapsg._fanout`, except that the
+    client's caches do not apply. They are decoded `chunksize` at a time by
+    `processes` processes, one per core by default, or on the calling
+    thread if `processes` is 0.
+
+    `pairs` is consumed lazily: only a few chunks per process are in flight
+    at any time, so memory stays bounded however long the batch is.
+    """
+    if route_type not in MATRIX_ROUTE_TYPES:
+        raise ValueError(
+            f"`route_type` can only be one of {', '.join(MATRIX_ROUTE_TYPES)}."
+        )
+
+    def fetch(item: Tuple[int, Pair]) -> Response:
+        start, end = item[1]
+        url: str = utils.construct_route_query(
+            start, end, route_type, {}, client.token or ""
+        )
+        return client.fetch_raw("route", url, timeout=timeout)
+
+    workers: int = (os.cpu_count() or 1) if processes is None else processes
+    decoder: Optional[ProcessPoolExecutor] = (
+        ProcessPoolExecutor(max_workers=workers, mp_context=_start_context())
+        if workers
+        else None
+    )
+    max_chunks: int = 2 * max(workers, 1)
+    in_flight: Dict[int, Pair] = {}
+    chunks: Set[Future] = set()
+
+    def decoded(block: bool) -> Iterator[BatchRoute]:
+        """Yields the routes of decoded chunks, waiting for one if `block`."""
+        done: Set[Future] = wait(
+            chunks, timeout=None if block else 0, return_when=FIRST_COMPLETED
+        ).done
+        for future in done:
+            chunks.discard(future)
+            for result in future.result():
+                yield _route(in_flight.pop(result[0]), result)
+
+    def flush(chunk: List[Fetched]) -> Iterator[BatchRoute]:
+        if decoder is None:
+            for result in _decode_chunk(chunk, geometry):
+                yield _route(in_flight.pop(result[0]), result)
+            return
+        while len(chunks) >= max_chunks:
+            yield from decoded(block=True)
+        chunks.add(decoder.submit(_decode_chunk, chunk, geometry))
+
+    items: Iterator[Tuple[int, Pair]] = (
+        (index, (start.strip(), end.strip()))
+        for index, (start, end) in enumerate(pairs)
+    )
+    chunk: List[Fetched] = []
+    try:
+        with closing(
+            fan_out(
+                fetch, items, max_workers=max_workers, thread_name_prefix="onemap-batch"
+            )
+        ) as fetched:
+            for (index, pair), response, error in fetched:
+                if error is not None:
+                    yield BatchRoute(index, pair[0], pair[1], error=error)
+                    continue
+                in_flight[index] = pair
+                body: Any = (
+                    response.content if response.content is not None else response.data
+                )
+                chunk.append((index, response.status_code, body))
+                if len(chunk) >= chunksize:
+                    yield from flush(chunk)
+                    chunk = []
+                yield from decoded(block=False)
+        if chunk:
+            yield from flush(chunk)
+        while chunks:
+            yield from decoded(block=True)
+    finally:
+        if decoder is not None:
+            decoder.shutdown(wait=False)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.breaker
+~~~~~~~~~~~~~~~~
+
+This module contains a per-endpoint circuit breaker, which stops sending
+requests to an endpoint that keeps failing so that callers fail fast
+instead of waiting for their timeouts.
+
+A circuit starts closed. It opens when at least `failure_rate` of the
+requests completed in the last `window` seconds failed, once there were
+`min_requests` of them. While open, calls raise CircuitOpen without a
+request. After `reset_timeout` seconds it becomes half-open and lets
+`half_open_requests` trial requests through: if they all succeed the
+circuit closes, if any fails it opens again.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from . import exceptions
+
+CLOSED: str = "closed"
+OPEN: str = "open"
+HALF_OPEN: str = "half_open"
+STATES: Tuple[str, ...] = (CLOSED, OPEN, HALF_OPEN)
+
+
+class _Circuit:
+    """State of one endpoint."""
+
+    def __init__(self) -> None:
+        self.state: str = CLOSED
+        self.outcomes: Deque[Tuple[float, bool]] = deque()
+        self.failures: int = 0
+        self.opened_at: float = 0.0
+        self.trials: int = 0
+        self.trial_successes: int = 0
+        self.rejected: int = 0
+
+    def trim(self, now: float, window: float) -> None:
+        while self.outcomes and self.outcomes[0][0] <= now - window:
+            _, failed = self.outcomes.popleft()
+            self.failures -= failed
+
+    def close(self) -> None:
+        self.state = CLOSED
+        self.outcomes.clear()
+        self.failures = 0
+
+    def open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.trials = self.trial_successes = 0
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker keeping one circuit per endpoint. Safe to share between
+    threads and clients.
+
+    Usage:
+        onemap = OneMap(circuit_breaker=CircuitBreaker(failure_rate=0.5))
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_requests: int = 20,
+        window: float = 30.0,
+        reset_timeout: float = 30.0,
+        half_open_requests: int = 1,
+    ) -> None:
+        if not 0 < failure_rate <= 1:
+            raise ValueError("`failure_rate` must be between 0 and 1.")
+        self.failure_rate = failure_rate
+        self.min_requests = max(1, min_requests)
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_requests = max(1, half_open_requests)
+        self.circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, endpoint: str) -> _Circuit:
+        circuit: Optional[_Circuit] = self.circuits.get(endpoint)
+        if circuit is None:
+            circuit = self.circuits[endpoint] = _Circuit()
+        return circuit
+
+    def state(self, endpoint: str) -> str:
+        with self._lock:
+            circuit: _Circuit = self._circuit(endpoint)
+            if (
+                circuit.state == OPEN
+                and time.monotonic() - circuit.opened_at >= self.reset_timeout
+            ):
+                return HALF_OPEN
+            return circuit.state
+
+    def states(self) -> Dict[str, str]:
+        """Returns the state of every endpoint seen so far."""
+        return {endpoint: self.state(endpoint) for endpoint in list(self.circuits)}
+
+    def rejected(self, endpoint: str) -> int:
+        """Number of calls to `endpoint` rejected while its circuit was open."""
+        with self._lock:
+            return self._circuit(endpoint).rejected
+
+    def before_request(self, endpoint: str) -> None:
+        """Raises CircuitOpen unless a request to `endpoint` may be sent.
+        Every allowed request must be followed by `record` or `release`."""
+        with self._lock:
+            circuit: _Circuit = self._circuit(endpoint)
+            if circuit.state == CLOSED:
+                return
+            now: float = time.monotonic()
+            if circuit.state == OPEN and now - circuit.opened_at >= self.reset_timeout:
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and circuit.trials < self.half_open_requests:
+                circuit.trials += 1
+                return
+            circuit.rejected += 1
+            retry_after: float = max(0.0, circuit.opened_at + self.reset_timeout - now)
+        raise exceptions.CircuitOpen(
+            f"Circuit breaker for `{endpoint}` is open. "
+            f"Retry in {retry_after:.1f} seconds.",
+            endpoint=endpoint,
+            retry_after=retry_after,
+        )
+
+    def record(self, endpoint: str, failed: bool) -> None:
+        """Records the outcome of a request allowed by `before_request`."""
+        with self._lock:
+            circuit: _Circuit = self._circuit(endpoint)
+            now: float = time.monotonic()
+            if circuit.state == HALF_OPEN:
+                if failed:
+                    circuit.open(now)
+                else:
+                    circuit.trial_successes += 1
+                    if circuit.trial_successes >= self.half_open_requests:
+                        circuit.close()
+                return
+            if circuit.state == OPEN:
+                return
+            circuit.outcomes.append((now, failed))
+            circuit.failures += failed
+            circuit.trim(now, self.window)
+            total: int = len(circuit.outcomes)
+            if (
+                total >= self.min_requests
+                and circuit.failures / total >= self.failure_rate
+            ):
+                circuit.open(now)
+
+    def release(self, endpoint: str) -> None:
+        """Gives back the slot of a request allowed by `before_request`
+        that was abandoned without an outcome."""
+        with self._lock:
+            circuit: _Circuit = self._circuit(endpoint)
+            if circuit.state == HALF_OPEN and circuit.trials:
+                circuit.trials -= 1
+
+    def reset(self, endpoint: Optional[str] = None) -> None:
+        """Closes the circuit of `endpoint`, or of every endpoint."""
+        with self._lock:
+            if endpoint is None:
+                self.circuits.clear()
+            elif endpoint in self.circuits:
+                self.circuits[endpoint].close()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.cache
+~~~~~~~~~~~~~~
+
+This module contains the in-memory response cache used by the client.
+"""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class CacheStats:
+    """Hit and miss counters of a Cache."""
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        self.stale: int = 0
+        self.refreshes: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        if not self.lookups:
+            return 0.0
+        return self.hits / self.lookups
+
+    def reset(self) -> None:
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self.stale = self.refreshes = 0
+
+    def to_dict(self) -> dict:
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            stale=self.stale,
+            refreshes=self.refreshes,
+            hit_rate=self.hit_rate,
+        )
+
+
+class Cache:
+    """
+    Thread-safe LRU cache with an optional time-to-live (in seconds).
+
+    With a `soft_ttl`, entries older than it are still served but reported
+    as stale by `lookup`, so that the client can refresh them in the
+    background; `ttl` is then the hard limit after which callers block on
+    a new request.
+
+    Cached values are the result objects returned by the client and are
+    shared between callers, so they should be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        soft_ttl: Optional[float] = None,
+    ) -> None:
+        if soft_ttl is not None and ttl is not None and soft_ttl > ttl:
+            raise ValueError("`soft_ttl` cannot be greater than `ttl`.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.soft_ttl = soft_ttl
+        self.stats = CacheStats()
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._refreshing: Dict[Hashable, threading.Event] = {}
+        self._key_hits: Dict[Hashable, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data and not self._is_expired(self._data[key][0])
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for `key`, or None on a miss."""
+        return self.lookup(key)[0]
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """Returns the cached value for `key`, or None on a miss, and
+        whether the value is older than `soft_ttl`."""
+        with self._lock:
+            entry: Optional[Any] = self._data.get(key)
+            if entry is not None and self._is_expired(entry[0]):
+                del self._data[key]
+                self._key_hits.pop(key, None)
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None, False
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            self._key_hits[key] = self._key_hits.get(key, 0) + 1
+            stale: bool = (
+                self.soft_ttl is not None
+                and time.monotonic() - entry[0] > self.soft_ttl
+            )
+            if stale:
+                self.stats.stale += 1
+            return entry[1], stale
+
+    def begin_refresh(self, key: Hashable, stale: bool = True) -> bool:
+        """Marks `key` as being fetched. Returns False if another caller
+        already is, so that only one request per key is in flight. Only
+        fetches of `stale` entries are counted as refreshes; missing keys
+        are fetched with `stale` False."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing[key] = threading.Event()
+            self.stats.refreshes += stale
+            return True
+
+    def end_refresh(self, key: Hashable) -> None:
+        with self._lock:
+            event: Optional[threading.Event] = self._refreshing.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def wait_refresh(self, key: Hashable, timeout: Optional[float] = None) -> bool:
+        """Waits for another caller's fetch of `key` to finish. Returns
+        False if none was in flight or it did not finish within `timeout`."""
+        with self._lock:
+            event: Optional[threading.Event] = self._refreshing.get(key)
+        return event is not None and event.wait(timeout)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            self._key_hits.setdefault(key, 0)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._key_hits.pop(evicted, None)
+                self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._key_hits.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._key_hits.clear()
+
+    def hot_keys(self, n: int) -> List[Hashable]:
+        """Returns the `n` cached keys with the most hits, most hit first,
+        e.g. to warm the cache of a new process."""
+        with self._lock:
+            return heapq.nlargest(n, self._key_hits, key=self._key_hits.__getitem__)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.cassette
+~~~~~~~~~~~~~~~~~
+
+This module contains the record and replay transports, which store real
+request/response pairs in a cassette file and play them back later, either
+with the recorded timings or without delay.
+
+A cassette is a gzipped text file with one interaction per line:
+`method<TAB>url<TAB>[status_code, elapsed, data]`, the last field being
+JSON. Tokens are stripped from URLs, request bodies are not stored and
+tokens in auth responses are replaced by a placeholder, so cassettes never
+contain credentials.
+"""
+
+import gzip
+import json
+import threading
+import time
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from . import exceptions
+from .response import Response
+from .transport import DEFAULT_TRANSPORT, Transport
+from .utils import strip_token
+
+InteractionKey = Tuple[str, str]
+
+# Replaces the tokens of recorded auth responses.
+REDACTED: str = "redacted"
+
+
+def interaction_key(method: str, url: str) -> InteractionKey:
+    return method.lower(), strip_token(url)
+
+
+class CassetteWriter:
+    """Appends interactions to a cassette file. Safe to share between
+    threads."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: IO[str] = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(
+        self, method: str, url: str, status_code: int, elapsed: float, data: Any
+    ) -> None:
+        method, url = interaction_key(method, url)
+        if isinstance(data, dict) and "access_token" in data:
+            data = dict(data, access_token=REDACTED)
+        recording: str = json.dumps(
+            [status_code, round(elapsed, 6), data], separators=(",", ":")
+        )
+        with self._lock:
+            self._file.write(f"{method}\t{url}\t{recording}\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "CassetteWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class Cassette:
+    """
+    Interactions of a cassette file, indexed by method and URL.
+
+    Lines are kept undecoded until they are replayed. Repeated requests for
+    the same URL are answered in recorded order, starting over once all
+    recordings of that URL have been used.
+    """
+
+    def __init__(self) -> None:
+        self.index: Dict[InteractionKey, List[str]] = {}
+        self._cursors: Dict[InteractionKey, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(lines) for lines in self.index.values())
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        cassette: Cassette = cls()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                method, url, recording = line.split("\t", 2)
+                cassette.index.setdefault((method, url), []).append(recording)
+        return cassette
+
+    def find(self, method: str, url: str) -> Optional[Tuple[int, float, Any]]:
+        """Returns (status_code, elapsed, data) of the next recording of the
+        request, or None if it was never recorded."""
+        key: InteractionKey = interaction_key(method, url)
+        lines: Optional[List[str]] = self.index.get(key)
+        if not lines:
+            return None
+        with self._lock:
+            cursor: int = self._cursors.get(key, 0)
+            self._cursors[key] = (cursor + 1) % len(lines)
+        status_code, elapsed, data = json.loads(lines[cursor])
+        return status_code, elapsed, data
+
+
+class RecordingTransport(Transport):
+    """Sends requests through `transport` and records them to `writer`.
+    Bodies are always decoded so that they can be recorded."""
+
+    def __init__(
+        self, writer: CassetteWriter, transport: Optional[Transport] = None
+    ) -> None:
+        self.writer = writer
+        self.transport = transport if transport is not None else DEFAULT_TRANSPORT
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[dict] = None,
+        timeout: float = 15,
+        timings: Optional[dict] = None,
+        decode: bool = True,
+    ) -> Response:
+        started_at: float = time.perf_counter()
+        response: Response = self.transport.request(
+            method, url, data=data, timeout=timeout, timings=timings
+        )
+        elapsed: float = time.perf_counter() - started_at
+        self.writer.write(method, url, response.status_code, elapsed, response.data)
+        return response
+
+
+class ReplayTransport(Transport):
+    """
+    Answers requests from a cassette without network access.
+
+    With `realtime`, each response is delayed by its recorded time divided
+    by `speed`. Requests that were never recorded raise ReplayMiss, unless a
+    `fallback` transport is given. Bodies are always returned decoded.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        realtime: bool = False,
+        speed: float = 1.0,
+        fallback: Optional[Transport] = None,
+    ) -> None:
+        self.cassette = cassette
+        self.realtime = realtime
+        self.speed = speed
+        self.fallback = fallback
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[dict] = None,
+        timeout: float = 15,
+        timings: Optional[dict] = None,
+        decode: bool = True,
+    ) -> Response:
+        started_at: float = time.perf_counter()
+        recording: Optional[Tuple[int, float, Any]] = self.cassette.find(method, url)
+        if recording is None:
+            if self.fallback is not None:
+                return self.fallback.request(
+                    method, url, data=data, timeout=timeout, timings=timings
+                )
+            raise exceptions.ReplayMiss(f"No recording for {method.upper()} {url}.")
+        status_code, elapsed, response_data = recording
+        if self.realtime:
+            time.sleep(elapsed / self.speed)
+        if timings is not None:
+            timings["request"] = time.perf_counter() - started_at
+        return Response(status_code=status_code, data=response_data)
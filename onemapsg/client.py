@@ -7,34 +7,158 @@ onemapsg.client
 This module contains the OneMap SG Client.
 """
 
-import datetime
-import inspect
-from typing import Any, Callable, Optional
+import contextlib
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlencode
 
 from . import exceptions, status, utils
+from .accounts import REJECTED_STATUSES, Account, AccountPool
 from .api import API
+from .breaker import CircuitBreaker
+from .cache import Cache
+from .deadline import Deadline, current_deadline
+from .geocache import GeoEntry, ReverseGeocodeCache
+from .negative import EMPTY, INVALID, NegativeCache, is_empty
+from .normalize import Normalizer
+from .profiler import NULL_PHASE, Profiler
+from .ratelimit import RateLimiter
 from .response import GeocodeInfo, Response, RouteResult, SearchResult
+from .transport import Transport
 from .types import Types
-from .utils import coerce_response, make_request
+from .utils import coerce_response, make_request, strip_token
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .hedge import Hedger
+    from .matrix import RouteMatrix
+    from .stream import Geocoded, Input
+    from .sweep import Area, SweepResult
+
+HOOK_EVENTS: List[str] = ["before_request", "after_response", "on_error"]
+
+
+def _endpoint_failed(err: BaseException) -> bool:
+    """Whether `err` tells that the endpoint is unhealthy, as opposed to
+    e.g. the accounts, the deadline or the caller."""
+    if isinstance(err, (exceptions.AccountsUnavailable, exceptions.CircuitOpen)):
+        return False
+    return isinstance(err, (exceptions.TransportError, exceptions.ServerError))
+
+
+def _geocode_info(items: List[Any]) -> GeocodeInfo:
+    """A reverse geocode result built from cached items."""
+    info: GeocodeInfo = GeocodeInfo()
+    info.results = items
+    return info
 
 
 class OneMap:
     """
     Main API Client to interact with OneMap's API.
+
+    Responses are cached when a `cache` is given. Entries past the cache's
+    `soft_ttl` are served while one background request refreshes them, and
+    concurrent misses of the same query share one request. A `normalizer`
+    can be provided to canonicalize queries before they are looked up in the
+    cache. Searches that find nothing and requests rejected as invalid are
+    remembered by the `negative_cache`, if any, and not sent again.
+    Requests that reach the network wait on the `rate_limiter`, if any.
+
+    Hooks can be registered for every request that reaches the network:
+    `before_request(action_type, url)`, then either
+    `after_response(action_type, url, response, elapsed)` once a response is
+    received, or `on_error(action_type, url, error, elapsed)` if the request
+    failed without one. The URL passed to hooks does not contain the token.
+
+    Passing a `profiler`, or calling within `with onemap.profile()`, records
+    the wall time of each phase of every call.
+
+    Requests are sent with `requests` unless another `transport` is given.
+
+    With a `circuit_breaker`, calls to an endpoint that keeps failing raise
+    CircuitOpen immediately instead of waiting on the network. Server
+    errors and requests that fail without a response count as failures.
+
+    Calls made within `with deadline(seconds)` share that deadline: each
+    request's timeout is capped at the time left, and DeadlineExceeded is
+    raised once none is left. See `onemapsg.deadline`.
+
+    With a `hedger`, a duplicate request is sent when a search, route or
+    reverse geocode is slower than usual, and the first response is used.
+
+    With a `reverse_geocode_cache`, WGS84 reverse geocodes of points close
+    to earlier ones are answered from the items already received.
+
+    With `accounts`, an AccountPool or a list of (email, password) pairs,
+    private API calls are spread over several accounts, each with its own
+    token and rate limiter. See `onemapsg.accounts`.
     """
 
     _email: Optional[str] = None
     _password: Optional[str] = None
     token: Optional[str] = None
     token_expiry: Optional[int] = None
+    cache: Optional[Cache] = None
+    normalizer: Optional[Normalizer] = None
+    rate_limiter: Optional[RateLimiter] = None
+    profiler: Optional[Profiler] = None
+    transport: Optional[Transport] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    hedger: Optional["Hedger"] = None
+    negative_cache: Optional[NegativeCache] = None
+    reverse_geocode_cache: Optional[ReverseGeocodeCache] = None
+    accounts: Optional[AccountPool] = None
 
     def __init__(
-        self, email: Optional[str] = None, password: Optional[str] = None
+        self,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        cache: Optional[Cache] = None,
+        normalizer: Optional[Normalizer] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        profiler: Optional[Profiler] = None,
+        transport: Optional[Transport] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedger: Optional["Hedger"] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        reverse_geocode_cache: Optional[ReverseGeocodeCache] = None,
+        accounts: Optional[Union[AccountPool, Sequence[Tuple[str, str]]]] = None,
     ) -> None:
+        self.cache = cache
+        self.normalizer = normalizer
+        self.rate_limiter = rate_limiter
+        self.profiler = profiler
+        self.transport = transport
+        self.circuit_breaker = circuit_breaker
+        self.hedger = hedger
+        self.negative_cache = negative_cache
+        self.reverse_geocode_cache = reverse_geocode_cache
+        self.hooks: Dict[str, List[Callable]] = {event: [] for event in HOOK_EVENTS}
+        self._has_hooks: bool = False
         if email is not None and password is not None:
             self._email = email
             self._password = password
             self.token, self.token_expiry = self._connect()
+        if accounts is not None:
+            if not isinstance(accounts, AccountPool):
+                accounts = AccountPool(accounts)
+            self.accounts = accounts
+            self._connect_accounts()
 
     @property
     def email(self) -> Optional[str]:
@@ -44,6 +168,17 @@ class OneMap:
     def password(self) -> Optional[str]:
         return self._password
 
+    def register_hook(self, event: str, hook: Callable) -> None:
+        """Registers `hook` to be called on `event`."""
+        if event not in self.hooks:
+            raise ValueError(f"`event` can only be one of {', '.join(HOOK_EVENTS)}.")
+        self.hooks[event].append(hook)
+        self._has_hooks = True
+
+    def unregister_hook(self, event: str, hook: Callable) -> None:
+        self.hooks[event].remove(hook)
+        self._has_hooks = any(self.hooks.values())
+
     def authenticate(self, email: str, password: str) -> None:
         """This can be used after instantiating the client to authenticate,
         if needed. This is mostly to be backwards compatible with the old
@@ -54,11 +189,25 @@ class OneMap:
         self._password = password
         self.token, self.token_expiry = self._connect()
 
-    def _connect(self) -> Types.TokenPair:
+    def _connect(
+        self, email: Optional[str] = None, password: Optional[str] = None
+    ) -> Types.TokenPair:
         """Retrieves token and stores it. Each token is valid
-        for 3 days."""
-        login_details: dict = dict(email=self.email, password=self.password)
-        response: Response = make_request(API.auth, method="post", data=login_details)
+        for 3 days. Tokens of other accounts are retrieved with their
+        `email` and `password`."""
+        login_details: dict = dict(
+            email=email if email is not None else self.email,
+            password=password if password is not None else self.password,
+        )
+        request_kwargs: dict = dict()
+        if self.transport is not None:
+            request_kwargs["transport"] = self.transport
+        active: Optional[Deadline] = current_deadline()
+        if active is not None:
+            request_kwargs["timeout"] = active.timeout(15)
+        response: Response = make_request(
+            API.auth, method="post", data=login_details, **request_kwargs
+        )
         if response.status_code == status.HTTP_200_OK:
             return (
                 response.data["access_token"],
@@ -73,9 +222,103 @@ class OneMap:
         return None, None
 
     def execute(self, action_type: str, *args: Any, **kwargs: Any) -> Optional[Any]:
+        endpoint: str = getattr(API, action_type, "")
+        self._authorize(endpoint)
+
+        callback: Callable = getattr(utils, f"construct_{action_type}_query")
+        request_kwargs: dict = dict()
+        if "timeout" in kwargs:
+            request_kwargs["timeout"] = kwargs.pop("timeout")
+        if self.transport is not None:
+            request_kwargs["transport"] = self.transport
+        with self._phase(action_type, "build_url"):
+            if self.normalizer is not None:
+                args, kwargs = self.normalizer.normalize(action_type, args, kwargs)
+            if "privateapi" in endpoint:
+                kwargs["token"] = self.token
+            url: str = callback(*args, **kwargs)
+
+        cache_key: str = strip_token(url)
+        negative: Optional[Any] = self._negative(action_type, cache_key)
+        if negative is not None:
+            return negative
+        if self.cache is None:
+            return self._fetch(action_type, url, cache_key, request_kwargs)
+
+        with self._phase(action_type, "cache"):
+            cached, stale = self.cache.lookup(cache_key)
+        if cached is not None:
+            if stale and self.cache.begin_refresh(cache_key):
+                threading.Thread(
+                    target=self._refresh,
+                    args=(action_type, url, cache_key, request_kwargs),
+                    daemon=True,
+                ).start()
+            return cached
+
+        # Only one caller fetches a missing key; the others wait for it and
+        # take its result, or one of them takes over if it got none.
+        while not self.cache.begin_refresh(cache_key, stale=False):
+            wait: float = request_kwargs.get("timeout", 15)
+            active: Optional[Deadline] = current_deadline()
+            if active is not None:
+                wait = active.timeout(wait)
+            if not self.cache.wait_refresh(cache_key, wait):
+                return self._fetch(action_type, url, cache_key, request_kwargs)
+            cached = self.cache.get(cache_key)
+            if cached is None:
+                cached = self._negative(action_type, cache_key)
+            if cached is not None:
+                return cached
+        try:
+            return self._fetch(action_type, url, cache_key, request_kwargs)
+        finally:
+            self.cache.end_refresh(cache_key)
+
+    def _negative(self, action_type: str, cache_key: str) -> Optional[Any]:
+        """Returns the empty result cached for `cache_key` by the negative
+        cache, if any, or raises BadRequest if it is known to be invalid."""
+        if self.negative_cache is None:
+            return None
+        with self._phase(action_type, "cache"):
+            negative: Optional[Tuple[str, Any]] = self.negative_cache.lookup(cache_key)
+        if negative is None:
+            return None
+        kind, value = negative
+        if kind == INVALID:
+            raise exceptions.BadRequest(value)
+        return value
+
+    def _connect_accounts(self) -> None:
+        """Retrieves a token for every account of the pool, taking those
+        that fail to authenticate out of rotation."""
+        assert self.accounts is not None
+        for account in self.accounts.accounts:
+            try:
+                self._renew_token(account)
+            except exceptions.AuthenticationError:
+                self.accounts.disable(account)
+        if not self.accounts.healthy():
+            raise exceptions.AuthenticationError("Failed to authenticate.")
+
+    def _renew_token(self, account: Account) -> None:
+        """Retrieves a token for `account` if it has none or it expires
+        within 2 minutes."""
+        with account.lock:
+            if account.token_expiring():
+                account.token, account.token_expiry = self._connect(
+                    account.email, account.password
+                )
+            if account.token is None:
+                raise exceptions.AuthenticationError("Failed to authenticate.")
+
+    def _authorize(self, endpoint: str) -> None:
+        # Accounts of a pool are authorized when they send a request.
+        if self.accounts is not None:
+            return
+
         # If endpoint is private, then we need to make
         # sure that client credentials are provided.
-        endpoint: str = getattr(API, action_type, "")
         if (
             "privateapi" in endpoint
             and self.token is None
@@ -94,24 +337,77 @@ class OneMap:
             and self.email is not None
             and self.password is not None
         ):
-            current_unix_timestamp: int = int(datetime.datetime.now().strftime("%s"))
+            current_unix_timestamp: int = int(time.time())
             if self.token_expiry - current_unix_timestamp < 120:
                 self.authenticate(self.email, self.password)
 
-        callback: Callable = getattr(utils, f"construct_{action_type}_query")
-        request_kwargs: dict = dict()
-        if "timeout" in kwargs:
-            request_kwargs["timeout"] = kwargs.pop("timeout")
-        url: str = callback(*args, **kwargs)
-        response: Response = make_request(url, **request_kwargs)
+    def prefetch(self, cache_key: str, timeout: int = 15) -> bool:
+        """
+        Fetches a query by its cache key, e.g. one of `Cache.hot_keys()` of
+        another process, and caches the result. Returns False without a
+        request if it is already cached.
+        """
+        if self.cache is None:
+            raise ValueError("`prefetch` requires a cache.")
+        if cache_key in self.cache:
+            return False
+        action_type: str = utils.action_type_for_url(cache_key)
+        endpoint: str = getattr(API, action_type)
+        self._authorize(endpoint)
+        url: str = cache_key
+        if "privateapi" in endpoint:
+            url = f"{url}&{urlencode({'token': self.token})}"
+        request_kwargs: dict = dict(timeout=timeout)
+        if self.transport is not None:
+            request_kwargs["transport"] = self.transport
+        self._fetch(action_type, url, cache_key, request_kwargs)
+        return True
+
+    def _refresh(
+        self, action_type: str, url: str, cache_key: str, request_kwargs: dict
+    ) -> None:
+        """Fetches a stale cache entry again. On failure the stale entry is
+        kept until it expires."""
+        try:
+            self._fetch(action_type, url, cache_key, request_kwargs)
+        except Exception:
+            pass
+        finally:
+            assert self.cache is not None
+            self.cache.end_refresh(cache_key)
+
+    def _fetch(
+        self,
+        action_type: str,
+        url: str,
+        cache_key: str,
+        request_kwargs: dict,
+    ) -> Optional[Any]:
+        """Sends the request and coerces the response, caching it under
+        `cache_key`."""
+        response: Response = self._guarded_request(action_type, url, request_kwargs)
         if response.status_code == status.HTTP_200_OK:
             cls_callback: Callable = getattr(utils, f"get_{action_type}_class")
             cls: Any = cls_callback()
-            return coerce_response(cls, response.data)
+            with self._phase(action_type, "coerce_response"):
+                result: Any = coerce_response(cls, response.data)
+            if self.negative_cache is not None and is_empty(result):
+                self.negative_cache.add(cache_key, EMPTY, result)
+                if self.cache is not None:
+                    self.cache.delete(cache_key)
+            elif self.cache is not None:
+                self.cache.set(cache_key, result)
+            return result
         elif status.is_client_error(response.status_code):
-            if "error" in response.data:
-                raise exceptions.BadRequest(response.data["error"])
-            raise exceptions.BadRequest("Please ensure request is correct.")
+            message: str = response.data.get(
+                "error", "Please ensure request is correct."
+            )
+            if (
+                self.negative_cache is not None
+                and response.status_code == status.HTTP_400_BAD_REQUEST
+            ):
+                self.negative_cache.add(cache_key, INVALID, message)
+            raise exceptions.BadRequest(message)
         elif status.is_server_error(response.status_code):
             raise exceptions.ServerError(
                 "OneMap SG server error. " "Please try again later."
@@ -119,6 +415,278 @@ class OneMap:
 
         return None
 
+    def fetch_raw(self, action_type: str, url: str, timeout: int = 15) -> Response:
+        """
+        Sends a query URL, with its token, through the client's rate
+        limiter, circuit breaker, hedger and hooks, and returns the response
+        with its body undecoded in `Response.content`, bypassing the caches.
+        Transports that cannot return undecoded bodies return `data`.
+        Used by `onemapsg.batch` to decode bodies in other processes.
+        """
+        endpoint: str = getattr(API, action_type, "")
+        self._authorize(endpoint)
+        # The token may have been renewed since the URL was built.
+        if "privateapi" in endpoint and self.token is not None:
+            url = utils.with_token(url, self.token)
+        request_kwargs: dict = dict(timeout=timeout, decode=False)
+        if self.transport is not None:
+            request_kwargs["transport"] = self.transport
+        return self._guarded_request(action_type, url, request_kwargs)
+
+    def _guarded_request(
+        self, action_type: str, url: str, request_kwargs: dict
+    ) -> Response:
+        """Sends the request within the deadline, if any, through the
+        circuit breaker, if any."""
+        active: Optional[Deadline] = current_deadline()
+        if active is not None:
+            active.check()
+        if self.circuit_breaker is None:
+            return self._pooled_request(action_type, url, active, **request_kwargs)
+        self.circuit_breaker.before_request(action_type)
+        try:
+            response: Response = self._pooled_request(
+                action_type, url, active, **request_kwargs
+            )
+        except BaseException as err:
+            if _endpoint_failed(err):
+                self.circuit_breaker.record(action_type, failed=True)
+            else:
+                self.circuit_breaker.release(action_type)
+            raise
+        self.circuit_breaker.record(
+            action_type, failed=status.is_server_error(response.status_code)
+        )
+        return response
+
+    def _pooled_request(
+        self,
+        action_type: str,
+        url: str,
+        active: Optional[Deadline],
+        **request_kwargs: Any,
+    ) -> Response:
+        """Sends private API calls as the least loaded healthy account of the
+        pool, if any, after waiting on that account's rate limiter. Calls
+        refused for their account are sent once more as the next account."""
+        if self.accounts is None or "privateapi" not in getattr(API, action_type, ""):
+            return self._request(action_type, url, active, **request_kwargs)
+        response: Response = self._request_as(
+            self._checkout(active), action_type, url, active, **request_kwargs
+        )
+        if response.status_code not in REJECTED_STATUSES:
+            return response
+        try:
+            account: Account = self._checkout(active)
+        except (exceptions.AccountsUnavailable, exceptions.AuthenticationError):
+            return response
+        return self._request_as(account, action_type, url, active, **request_kwargs)
+
+    def _request_as(
+        self,
+        account: Account,
+        action_type: str,
+        url: str,
+        active: Optional[Deadline],
+        **request_kwargs: Any,
+    ) -> Response:
+        """Sends the request as a checked out account and gives it back."""
+        assert self.accounts is not None
+        try:
+            response: Response = self._request(
+                action_type,
+                utils.with_token(url, account.token or ""),
+                active,
+                account,
+                **request_kwargs,
+            )
+        except exceptions.DeadlineExceeded:
+            self.accounts.release(account)
+            raise
+        except BaseException:
+            self.accounts.release(account, failed=True)
+            raise
+        self.accounts.release(
+            account,
+            failed=status.is_server_error(response.status_code),
+            rejected=response.status_code in REJECTED_STATUSES,
+        )
+        return response
+
+    def _checkout(self, active: Optional[Deadline]) -> Account:
+        """Acquires an account of the pool with a valid token and a rate
+        limiter token. Accounts failing to authenticate are taken out of
+        rotation and the next one is tried."""
+        assert self.accounts is not None
+        for _ in range(len(self.accounts)):
+            account: Account = self.accounts.acquire()
+            try:
+                self._renew_token(account)
+            except exceptions.AuthenticationError:
+                self.accounts.release(account, rejected=True)
+                continue
+            except BaseException:
+                self.accounts.release(account, failed=True)
+                raise
+            if account.rate_limiter is None or account.rate_limiter.acquire(
+                timeout=active.remaining if active is not None else None
+            ):
+                return account
+            self.accounts.release(account)
+            raise exceptions.DeadlineExceeded(
+                "Deadline exceeded while waiting on the rate limiter."
+            )
+        raise exceptions.AuthenticationError("Failed to authenticate.")
+
+    def _phase(self, action_type: str, name: str) -> Any:
+        if self.profiler is None:
+            return NULL_PHASE
+        return self.profiler.phase(action_type, name)
+
+    @contextlib.contextmanager
+    def profile(self, profiler: Optional[Profiler] = None) -> Iterator[Profiler]:
+        """Profiles every call made within the block.
+
+        Usage:
+            with onemap.profile() as profiler:
+                onemap.search("One Raffles Quay")
+            print(profiler.report())
+        """
+        previous: Optional[Profiler] = self.profiler
+        self.profiler = profiler if profiler is not None else Profiler()
+        try:
+            yield self.profiler
+        finally:
+            self.profiler = previous
+
+    def _request(
+        self,
+        action_type: str,
+        url: str,
+        active: Optional[Deadline],
+        account: Optional[Account] = None,
+        **request_kwargs: Any,
+    ) -> Response:
+        """Waits on the rate limiter and sends the request, as `account` if
+        one of the pool was checked out, within the time left before the
+        deadline, if any."""
+        if self.rate_limiter is not None:
+            with self._phase(action_type, "rate_limit"):
+                acquired: bool = self.rate_limiter.acquire(
+                    timeout=active.remaining if active is not None else None
+                )
+            if not acquired:
+                raise exceptions.DeadlineExceeded(
+                    "Deadline exceeded while waiting on the rate limiter."
+                )
+        if active is None:
+            return self._send(action_type, url, account, **request_kwargs)
+        request_kwargs["timeout"] = active.timeout(request_kwargs.get("timeout", 15))
+        try:
+            return self._send(action_type, url, account, **request_kwargs)
+        except exceptions.TransportTimeout as err:
+            if active.expired:
+                raise exceptions.DeadlineExceeded("Deadline exceeded.") from err
+            raise
+
+    def _send(
+        self,
+        action_type: str,
+        url: str,
+        account: Optional[Account] = None,
+        **request_kwargs: Any,
+    ) -> Response:
+        """Makes the request, calling any registered hooks around it."""
+        if self.profiler is not None:
+            timings: Dict[str, float] = {}
+            response: Response = self._send_with_hooks(
+                action_type, url, account, timings=timings, **request_kwargs
+            )
+            for phase, seconds in timings.items():
+                self.profiler.record(action_type, phase, seconds)
+            return response
+        return self._send_with_hooks(action_type, url, account, **request_kwargs)
+
+    def _send_with_hooks(
+        self,
+        action_type: str,
+        url: str,
+        account: Optional[Account] = None,
+        **request_kwargs: Any,
+    ) -> Response:
+        if not self._has_hooks:
+            return self._hedge(action_type, url, account, **request_kwargs)
+
+        hook_url: str = strip_token(url)
+        for hook in self.hooks["before_request"]:
+            hook(action_type, hook_url)
+        started_at: float = time.perf_counter()
+        try:
+            response: Response = self._hedge(
+                action_type, url, account, **request_kwargs
+            )
+        except Exception as err:
+            elapsed: float = time.perf_counter() - started_at
+            for hook in self.hooks["on_error"]:
+                hook(action_type, hook_url, err, elapsed)
+            raise
+        elapsed = time.perf_counter() - started_at
+        for hook in self.hooks["after_response"]:
+            hook(action_type, hook_url, response, elapsed)
+        return response
+
+    def _hedge(
+        self,
+        action_type: str,
+        url: str,
+        account: Optional[Account] = None,
+        **request_kwargs: Any,
+    ) -> Response:
+        """Sends the request through the hedger, if any. Hooks and the
+        profiler only see the call as a whole, with the timings of the
+        response used. Hedges count against the rate limiters the request
+        went through, and are skipped when one of them has no capacity
+        left."""
+        if self.hedger is None or not self.hedger.hedges(action_type):
+            return make_request(url, **request_kwargs)
+        limiters: List[RateLimiter] = [
+            limiter
+            for limiter in (
+                account.rate_limiter if account is not None else None,
+                self.rate_limiter,
+            )
+            if limiter is not None
+        ]
+
+        def allow() -> bool:
+            # Checked first so that a token is not taken from one limiter
+            # when another has none to give.
+            if any(limiter.available < 1 for limiter in limiters):
+                return False
+            return all(limiter.try_acquire() for limiter in limiters)
+
+        # Each request gets its own timings, so that the loser cannot
+        # overwrite those of the winner.
+        timings: Optional[Dict[str, float]] = request_kwargs.pop("timings", None)
+        sent: List[Tuple[Response, Dict[str, float]]] = []
+
+        def attempt() -> Response:
+            own: Dict[str, float] = {}
+            response: Response = make_request(
+                url, timings=own if timings is not None else None, **request_kwargs
+            )
+            sent.append((response, own))
+            return response
+
+        response: Response = self.hedger.send(
+            action_type, attempt, allow=allow if limiters else None
+        )
+        if timings is not None:
+            for candidate, own in list(sent):
+                if candidate is response:
+                    timings.update(own)
+        return response
+
     def search(
         self,
         search_val: str,
@@ -133,7 +701,7 @@ class OneMap:
 
         Ref: https://docs.onemap.sg/#search
         """
-        name: str = inspect.stack()[0][3]
+        name: str = "search"
         search_result: Optional[Any] = self.execute(
             name,
             search_val,
@@ -151,7 +719,7 @@ class OneMap:
         start: str,
         end: str,
         route_type: str,
-        public_transport_options: Optional[str] = None,
+        public_transport_options: Optional[dict] = None,
         timeout: int = 15,
     ) -> Optional[RouteResult]:
         """
@@ -160,14 +728,13 @@ class OneMap:
 
         Ref: https://docs.onemap.sg/#routing-service
         """
-        name: str = inspect.stack()[0][3]
+        name: str = "route"
         route_result: Optional[Any] = self.execute(
             name,
             start,
             end,
             route_type,
             public_transport_options,
-            self.token,
             timeout=timeout,
         )
         if isinstance(route_result, RouteResult):
@@ -177,7 +744,7 @@ class OneMap:
     def reverse_geocode(
         self,
         reverse_type: str,
-        location: str,
+        location: Sequence[Any],
         buffer: int = 10,
         address_type: str = "all",
         other_features: bool = False,
@@ -195,17 +762,158 @@ class OneMap:
             "svy21",
             "wgs84",
         ], "`reverse_type` can only be either `svy21` or `wgs84`."
-        name: str = inspect.stack()[0][3]
-        name = name + f"_{reverse_type}"
-        reverse_geocode_result: Optional[Any] = self.execute(
+        name: str = f"reverse_geocode_{reverse_type}"
+        geocache: Optional[ReverseGeocodeCache] = self.reverse_geocode_cache
+        if geocache is not None and reverse_type == "wgs84":
+            lat: float = float(location[0])
+            long: float = float(location[1])
+            items: Optional[List[Any]] = geocache.lookup(
+                lat, long, buffer, address_type, other_features
+            )
+            if items is not None:
+                return _geocode_info(items)
+            fetch_buffer: int = geocache.buffer_for(buffer)
+            reverse_geocode_result: Optional[Any] = self.execute(
+                name,
+                location,
+                buffer=fetch_buffer,
+                address_type=address_type,
+                other_features=other_features,
+                timeout=timeout,
+            )
+            if not isinstance(reverse_geocode_result, GeocodeInfo):
+                return None
+            entry: GeoEntry = geocache.add(
+                lat,
+                long,
+                fetch_buffer,
+                reverse_geocode_result.results or [],
+                address_type,
+                other_features,
+            )
+            if fetch_buffer == buffer:
+                return reverse_geocode_result
+            return _geocode_info(entry.within(lat, long, buffer))
+
+        reverse_geocode_result = self.execute(
             name,
             location,
-            self.token,
-            buffer,
-            address_type,
-            other_features,
+            buffer=buffer,
+            address_type=address_type,
+            other_features=other_features,
             timeout=timeout,
         )
         if isinstance(reverse_geocode_result, GeocodeInfo):
             return reverse_geocode_result
         return None
+
+    def route_matrix(
+        self,
+        origins: Sequence[str],
+        destinations: Sequence[str],
+        route_type: str,
+        symmetric: bool = False,
+        max_workers: int = 8,
+        timeout: int = 15,
+        raise_on_error: bool = False,
+    ) -> "RouteMatrix":
+        """
+        Returns total time and distance between every origin and every
+        destination. See `onemapsg.matrix.route_matrix`.
+        """
+        from .matrix import route_matrix
+
+        return route_matrix(
+            self,
+            origins,
+            destinations,
+            route_type,
+            symmetric=symmetric,
+            max_workers=max_workers,
+            timeout=timeout,
+            raise_on_error=raise_on_error,
+        )
+
+    def reverse_geocode_area(
+        self,
+        area: "Area",
+        buffer: float = 500,
+        address_type: str = "all",
+        other_features: bool = False,
+        clip: bool = True,
+        max_workers: int = 8,
+        timeout: int = 15,
+        raise_on_error: bool = False,
+    ) -> "SweepResult":
+        """
+        Returns every address in a bounding box or polygon, without
+        duplicates. See `onemapsg.sweep.sweep`.
+        """
+        from .sweep import sweep
+
+        return sweep(
+            self,
+            area,
+            buffer=buffer,
+            address_type=address_type,
+            other_features=other_features,
+            clip=clip,
+            max_workers=max_workers,
+            timeout=timeout,
+            raise_on_error=raise_on_error,
+        )
+
+    def geocode_stream(
+        self,
+        inputs: Iterable["Input"],
+        window: int = 16,
+        max_workers: int = 8,
+        return_geometry: bool = True,
+        get_address_details: bool = True,
+        timeout: int = 15,
+        raise_on_error: bool = False,
+    ) -> Iterator["Geocoded"]:
+        """
+        Searches search values or (key, search value) pairs pulled lazily
+        from `inputs`, yielding results as they complete with at most
+        `window` in flight. See `onemapsg.stream.geocode_stream`.
+        """
+        from .stream import geocode_stream
+
+        return geocode_stream(
+            self,
+            inputs,
+            window=window,
+            max_workers=max_workers,
+            return_geometry=return_geometry,
+            get_address_details=get_address_details,
+            timeout=timeout,
+            raise_on_error=raise_on_error,
+        )
+
+    def geocode_stream_async(
+        self,
+        inputs: Union[Iterable["Input"], AsyncIterable["Input"]],
+        window: int = 16,
+        max_workers: int = 8,
+        return_geometry: bool = True,
+        get_address_details: bool = True,
+        timeout: int = 15,
+        raise_on_error: bool = False,
+    ) -> AsyncIterator["Geocoded"]:
+        """
+        The asyncio variant of `geocode_stream`, to be used with
+        `async for`. See `onemapsg.stream.geocode_stream_async`.
+        """
+        from .stream import geocode_stream_async
+
+        return geocode_stream_async(
+            self,
+            inputs,
+            window=window,
+            max_workers=max_workers,
+            return_geometry=return_geometry,
+            get_address_details=get_address_details,
+            timeout=timeout,
+            raise_on_error=raise_on_error,
+        )
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.deadline
+~~~~~~~~~~~~~~~~~
+
+This module contains deadlines shared by every call made within a block.
+While a deadline is active, each request's timeout is capped at the time
+left, and calls raise DeadlineExceeded once it has passed instead of
+starting more work.
+
+Usage:
+    with deadline(5):
+        results = onemap.search("Raffles Place")
+        route = onemap.route(start, results.results[0].lat_long, "walk")
+
+Deadlines are kept per thread. Nested deadlines never extend the outer one.
+Code handing work to other threads can carry the deadline over with
+`use(current_deadline())`.
+"""
+
+import contextlib
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from . import exceptions
+
+
+class Deadline:
+    """A point in time, on the monotonic clock, by which work must be done."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, seconds: float) -> None:
+        self.expires_at: float = time.monotonic() + seconds
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self) -> None:
+        """Raises DeadlineExceeded if the deadline has passed."""
+        if self.expired:
+            raise exceptions.DeadlineExceeded("Deadline exceeded.")
+
+    def timeout(self, timeout: Optional[float]) -> float:
+        """Returns `timeout` capped at the time left. Raises
+        DeadlineExceeded if none is left."""
+        self.check()
+        remaining: float = self.remaining
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+class _Local(threading.local):
+    def __init__(self) -> None:
+        self.stack: List[Deadline] = []
+
+
+_local: _Local = _Local()
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Returns the innermost deadline of the current thread, if any."""
+    stack: List[Deadline] = _local.stack
+    return stack[-1] if stack else None
+
+
+@contextlib.contextmanager
+def use(active: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Makes `active` the current thread's deadline within the block."""
+    if active is None:
+        yield None
+        return
+    _local.stack.append(active)
+    try:
+        yield active
+    finally:
+        _local.stack.pop()
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[Deadline]:
+    """Limits every call within the block to `seconds` in total."""
+    new: Deadline = Deadline(seconds)
+    outer: Optional[Deadline] = current_deadline()
+    if outer is not None and outer.expires_at < new.expires_at:
+        new = outer
+    with use(new):
+        yield new
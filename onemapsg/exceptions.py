@@ -19,3 +19,43 @@ class BadRequest(Exception):
 
 class ServerError(Exception):
     """Raised when there are server errors from OneMap SG."""
+
+
+class TransportError(Exception):
+    """Raised when a request fails without a response, or its body is not
+    JSON."""
+
+
+class TransportTimeout(TransportError, TimeoutError):
+    """Raised when a request times out."""
+
+
+class InvalidJSON(TransportError, ValueError):
+    """Raised when the body of a response is not JSON."""
+
+
+class ReplayMiss(Exception):
+    """Raised when a replayed request was never recorded."""
+
+
+class CircuitOpen(ServerError):
+    """Raised without making a request while the circuit breaker of an
+    endpoint is open."""
+
+    def __init__(self, message: str, endpoint: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class AccountsUnavailable(ServerError):
+    """Raised without making a request while every account of an
+    AccountPool is out of rotation."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the deadline of a `with deadline(...)` block has passed."""
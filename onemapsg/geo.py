@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.geo
+~~~~~~~~~~~~
+
+This module contains geographic helpers: distances, geohashes and the
+snappers used to put nearby coordinates on a common grid.
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+
+EARTH_RADIUS_M: float = 6371008.8
+METRES_PER_DEGREE: float = 2 * math.pi * EARTH_RADIUS_M / 360
+
+# Latitude at which longitude spacing is computed for metre grids. A fixed
+# reference keeps the grid identical for every point in Singapore.
+REFERENCE_LATITUDE: float = 1.35
+
+GEOHASH_ALPHABET: str = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_INDEX: dict = {c: i for i, c in enumerate(GEOHASH_ALPHABET)}
+
+LatLong = Tuple[float, float]
+
+
+def haversine(lat1: float, long1: float, lat2: float, long2: float) -> float:
+    """Great-circle distance between two WGS84 points, in metres."""
+    phi1: float = math.radians(lat1)
+    phi2: float = math.radians(lat2)
+    d_phi: float = phi2 - phi1
+    d_lambda: float = math.radians(long2 - long1)
+    a: float = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_lat_long(point: str) -> LatLong:
+    """Parses a `lat,long` string."""
+    lat, long = point.split(",")
+    return float(lat), float(long)
+
+
+def geohash_encode(lat: float, long: float, precision: int = 7) -> str:
+    """Encodes a WGS84 point as a geohash of `precision` characters."""
+    lat_range: List[float] = [-90.0, 90.0]
+    long_range: List[float] = [-180.0, 180.0]
+    chars: List[str] = []
+    bits: int = 0
+    bit_count: int = 0
+    even: bool = True
+    while len(chars) < precision:
+        rng, value = (long_range, long) if even else (lat_range, lat)
+        mid: float = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Returns (min lat, min long, max lat, max long) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    long_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value: int = GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            rng = long_range if even else lat_range
+            mid: float = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], long_range[0], lat_range[1], long_range[1]
+
+
+def geohash_decode(geohash: str) -> LatLong:
+    """Returns the centre of a geohash cell."""
+    min_lat, min_long, max_lat, max_long = geohash_bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_long + max_long) / 2
+
+
+class SnapStats:
+    """Distance between requested points and the points they were snapped
+    to, in metres."""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total_error: float = 0.0
+        self.max_error: float = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, error: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_error += error
+            self.max_error = max(self.max_error, error)
+
+    @property
+    def mean_error(self) -> float:
+        if not self.count:
+            return 0.0
+        return self.total_error / self.count
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+            self.total_error = self.max_error = 0.0
+
+    def to_dict(self) -> dict:
+        return dict(
+            count=self.count, mean_error=self.mean_error, max_error=self.max_error
+        )
+
+
+class Snapper(ABC):
+    """Base class for snappers. Subclasses implement `snap`."""
+
+    def __init__(self) -> None:
+        self.stats = SnapStats()
+
+    @abstractmethod
+    def snap(self, lat: float, long: float) -> LatLong:
+        """Returns the point that (lat, long) is snapped to."""
+
+    def snap_point(self, point: str) -> str:
+        """Snaps a `lat,long` string and records the snap error."""
+        lat, long = parse_lat_long(point)
+        snapped_lat, snapped_long = self.snap(lat, long)
+        self.stats.record(haversine(lat, long, snapped_lat, snapped_long))
+        return f"{snapped_lat:.6f},{snapped_long:.6f}"
+
+
+class GeohashSnapper(Snapper):
+    """Snaps points to the centre of their geohash cell. A precision of 7
+    gives cells of about 153m x 153m, 8 about 38m x 19m."""
+
+    def __init__(self, precision: int = 7) -> None:
+        super().__init__()
+        self.precision = precision
+
+    def snap(self, lat: float, long: float) -> LatLong:
+        return geohash_decode(geohash_encode(lat, long, self.precision))
+
+
+class GridSnapper(Snapper):
+    """Snaps points to the centre of square grid cells of `metres` size."""
+
+    def __init__(self, metres: float = 25) -> None:
+        super().__init__()
+        self.metres = metres
+        self.lat_step: float = metres / METRES_PER_DEGREE
+        self.long_step: float = metres / (
+            METRES_PER_DEGREE * math.cos(math.radians(REFERENCE_LATITUDE))
+        )
+
+    def snap(self, lat: float, long: float) -> LatLong:
+        return (
+            (math.floor(lat / self.lat_step) + 0.5) * self.lat_step,
+            (math.floor(long / self.long_step) + 0.5) * self.long_step,
+        )
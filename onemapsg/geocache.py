@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.geocache
+~~~~~~~~~~~~~~~~~
+
+This module contains the reverse geocode cache for moving points. Exact
+URL caching never hits for GPS fixes that move a few metres between calls,
+so answers are kept per geohash cell together with the point, buffer and
+address type they were fetched with.
+
+A request within `b` metres of a point is answered from a cached answer
+for a point `d` metres away with buffer `B` if `d + b <= B`: its circle then
+lies inside the cached one, so filtering the cached items by distance gives
+exactly what OneMap would return. With `fetch_buffer`, misses are fetched
+with a larger buffer than asked for, so that the next points along the way
+are answered from the cache.
+
+Usage:
+    onemap = OneMap(..., reverse_geocode_cache=ReverseGeocodeCache(fetch_buffer=200))
+    onemap.reverse_geocode("wgs84", (1.28118, 103.85190), buffer=50)
+"""
+
+import math
+import threading
+from typing import List, Optional, Set, Tuple
+
+from .cache import Cache, CacheStats
+from .geo import METRES_PER_DEGREE, LatLong, geohash_bounds, geohash_encode, haversine
+from .response import GeocodeInfoItem
+
+# OneMap answers reverse geocodes within at most 500 metres.
+MAX_BUFFER: int = 500
+
+
+class GeoEntry:
+    """Items of one reverse geocode, with the parameters it was made with."""
+
+    __slots__ = (
+        "lat",
+        "long",
+        "buffer",
+        "address_type",
+        "other_features",
+        "items",
+        "lat_longs",
+    )
+
+    def __init__(
+        self,
+        lat: float,
+        long: float,
+        buffer: float,
+        address_type: str,
+        other_features: bool,
+        items: List[GeocodeInfoItem],
+    ) -> None:
+        self.lat = lat
+        self.long = long
+        self.buffer = buffer
+        self.address_type = address_type
+        self.other_features = other_features
+        self.items = items
+        self.lat_longs: List[Optional[LatLong]] = [_lat_long(i) for i in items]
+
+    def covers(
+        self,
+        lat: float,
+        long: float,
+        buffer: float,
+        address_type: str,
+        other_features: bool,
+    ) -> bool:
+        """Whether the circle of `buffer` metres around the point lies in
+        this entry's circle."""
+        return (
+            self.address_type == address_type
+            and self.other_features == other_features
+            and haversine(self.lat, self.long, lat, long) + buffer <= self.buffer
+        )
+
+    def within(self, lat: float, long: float, buffer: float) -> List[GeocodeInfoItem]:
+        """Items within `buffer` metres of the point. Items without a
+        location cannot be placed and are left out."""
+        return [
+            item
+            for item, point in zip(self.items, self.lat_longs)
+            if point is not None and haversine(lat, long, *point) <= buffer
+        ]
+
+
+def _lat_long(item: GeocodeInfoItem) -> Optional[LatLong]:
+    try:
+        lat, long = item.lat_long
+        return float(lat), float(long)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReverseGeocodeCache:
+    """
+    WGS84 reverse geocodes cached per geohash cell of `precision`
+    characters (7 is about 150 x 150 m). Answers are kept in each cell
+    their circle reaches, at most `per_cell` per cell, preferring the
+    largest buffers, and in at most `maxsize` cells, for `ttl` seconds if
+    given.
+    """
+
+    def __init__(
+        self,
+        precision: int = 7,
+        fetch_buffer: Optional[float] = None,
+        per_cell: int = 4,
+        maxsize: int = 10000,
+        ttl: Optional[float] = None,
+    ) -> None:
+        if fetch_buffer is not None and not 0 < fetch_buffer <= MAX_BUFFER:
+            raise ValueError(f"`fetch_buffer` must be between 0 and {MAX_BUFFER}.")
+        self.precision = precision
+        self.fetch_buffer = fetch_buffer
+        self.per_cell = per_cell
+        self.stats = CacheStats()
+        self._cells = Cache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def buffer_for(self, buffer: int) -> int:
+        """Buffer, in whole metres, to fetch a missing answer with."""
+        if self.fetch_buffer is None:
+            return buffer
+        return min(MAX_BUFFER, max(buffer, math.ceil(self.fetch_buffer)))
+
+    def lookup(
+        self,
+        lat: float,
+        long: float,
+        buffer: float,
+        address_type: str = "all",
+        other_features: bool = False,
+    ) -> Optional[List[GeocodeInfoItem]]:
+        """Returns the items within `buffer` metres of the point if a cached
+        answer covers it, or None."""
+        address_type = address_type.lower()
+        entries: Optional[Tuple[GeoEntry, ...]] = self._cells.get(
+            geohash_encode(lat, long, self.precision)
+        )
+        for entry in entries or ():
+            if entry.covers(lat, long, buffer, address_type, other_features):
+                with self._lock:
+                    self.stats.hits += 1
+                return entry.within(lat, long, buffer)
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def add(
+        self,
+        lat: float,
+        long: float,
+        buffer: float,
+        items: List[GeocodeInfoItem],
+        address_type: str = "all",
+        other_features: bool = False,
+    ) -> GeoEntry:
+        """Caches the items OneMap returned for the point and buffer, in
+        every cell its circle reaches, so that points moving on to the
+        next cell are still answered."""
+        entry: GeoEntry = GeoEntry(
+            lat, long, buffer, address_type.lower(), other_features, list(items)
+        )
+        with self._lock:
+            for cell in self._cells_within(lat, long, buffer):
+                entries: Tuple[GeoEntry, ...] = self._cells.get(cell) or ()
+                # Larger buffers cover more requests; keep those.
+                kept: List[GeoEntry] = sorted(
+                    entries + (entry,), key=lambda e: e.buffer, reverse=True
+                )
+                self._cells.set(cell, tuple(kept[: self.per_cell]))
+        return entry
+
+    def _cells_within(self, lat: float, long: float, buffer: float) -> Set[str]:
+        """Geohash cells overlapping the bounding box of a circle."""
+        min_lat, min_long, max_lat, max_long = geohash_bounds(
+            geohash_encode(lat, long, self.precision)
+        )
+        # Sampling at half a cell never skips a cell.
+        lat_step: float = (max_lat - min_lat) / 2
+        long_step: float = (max_long - min_long) / 2
+        lat_reach: float = buffer / METRES_PER_DEGREE
+        long_reach: float = lat_reach / math.cos(math.radians(lat))
+        cells: Set[str] = set()
+        rows: int = math.ceil(2 * lat_reach / lat_step)
+        columns: int = math.ceil(2 * long_reach / long_step)
+        for row in range(rows + 1):
+            sample_lat: float = min(lat + lat_reach, lat - lat_reach + row * lat_step)
+            for column in range(columns + 1):
+                sample_long: float = min(
+                    long + long_reach, long - long_reach + column * long_step
+                )
+                cells.add(geohash_encode(sample_lat, sample_long, self.precision))
+        return cells
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self.stats.reset()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.hedge
+~~~~~~~~~~~~~~
+
+This module contains request hedging for idempotent GETs. When a response
+has not arrived after an adaptive delay, the observed `percentile` latency
+of the endpoint, a duplicate request is sent and whichever response arrives
+first is used. The losing request is cancelled if it has not started yet;
+otherwise its response is discarded when it arrives.
+
+Hedges are limited by a budget: every request earns `budget` of a hedge,
+up to `max_burst` saved hedges, so a budget of 0.05 caps the extra load at
+about 5% of requests.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set
+
+from .profiler import percentile
+from .response import Response
+
+HEDGED_ENDPOINTS: List[str] = [
+    "search",
+    "route",
+    "reverse_geocode_wgs84",
+    "reverse_geocode_svy21",
+]
+
+
+class HedgeStats:
+    """Requests sent through a Hedger, hedges sent and hedges that won."""
+
+    def __init__(self) -> None:
+        self.requests: int = 0
+        self.hedges: int = 0
+        self.wins: int = 0
+        self.over_budget: int = 0
+
+    @property
+    def hedge_rate(self) -> float:
+        if not self.requests:
+            return 0.0
+        return self.hedges / self.requests
+
+    def reset(self) -> None:
+        self.requests = self.hedges = self.wins = self.over_budget = 0
+
+    def to_dict(self) -> dict:
+        return dict(
+            requests=self.requests,
+            hedges=self.hedges,
+            wins=self.wins,
+            over_budget=self.over_budget,
+            hedge_rate=self.hedge_rate,
+        )
+
+
+class Hedger:
+    """
+    Sends hedged requests on a thread pool of `max_workers` threads, which
+    should be about twice the number of threads calling the client.
+
+    Until `min_samples` latencies of an endpoint were observed, hedges are
+    sent after `initial_delay` seconds. The delay is always clamped between
+    `min_delay` and `max_delay`.
+
+    Usage:
+        onemap = OneMap(hedger=Hedger(percentile=95, budget=0.05))
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        budget: float = 0.05,
+        max_burst: float = 10,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.01,
+        max_delay: float = 5.0,
+        min_samples: int = 20,
+        max_samples: int = 1000,
+        endpoints: Sequence[str] = HEDGED_ENDPOINTS,
+        max_workers: int = 64,
+    ) -> None:
+        self.percentile = percentile
+        self.budget = budget
+        self.max_burst = max_burst
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.endpoints: Set[str] = set(endpoints)
+        self.stats = HedgeStats()
+        self.latencies: Dict[str, Deque[float]] = {}
+        self._delays: Dict[str, float] = {}
+        self._tokens: float = max_burst
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="onemap-hedge"
+        )
+
+    def hedges(self, endpoint: str) -> bool:
+        return endpoint in self.endpoints
+
+    def delay(self, endpoint: str) -> float:
+        """Seconds to wait for a response before sending a hedge."""
+        with self._lock:
+            return self._delays.get(endpoint, self.initial_delay)
+
+    def observe(self, endpoint: str, seconds: float) -> None:
+        """Records the latency of a request that was not cut short."""
+        with self._lock:
+            samples: Optional[Deque[float]] = self.latencies.get(endpoint)
+            if samples is None:
+                samples = self.latencies[endpoint] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+            count: int = len(samples)
+            # Sorting on every sample is wasteful; refresh every 10 samples.
+            if count < self.min_samples or count % 10:
+                return
+            values: List[float] = list(samples)
+        delay: float = min(
+            self.max_delay, max(self.min_delay, percentile(values, self.percentile))
+        )
+        with self._lock:
+            self._delays[endpoint] = delay
+
+    def _take_hedge(self, allow: Optional[Callable[[], bool]]) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                self.stats.over_budget += 1
+                return False
+            self._tokens -= 1
+        if allow is not None and not allow():
+            with self._lock:
+                self._tokens += 1
+            return False
+        with self._lock:
+            self.stats.hedges += 1
+        return True
+
+    def send(
+        self,
+        endpoint: str,
+        request: Callable[[], Response],
+        allow: Optional[Callable[[], bool]] = None,
+    ) -> Response:
+        """Calls `request`, and again if it is slower than the hedge delay,
+        returning the first response. A hedge is only sent if `allow`, when
+        given, returns True, e.g. when a rate limiter has a token left."""
+        with self._lock:
+            self.stats.requests += 1
+            self._tokens = min(self.max_burst, self._tokens + self.budget)
+        started_at: float = time.perf_counter()
+
+        def primary_done(future: Future) -> None:
+            if not future.cancelled() and future.exception() is None:
+                self.observe(endpoint, time.perf_counter() - started_at)
+
+        primary: Future = self._executor.submit(request)
+        primary.add_done_callback(primary_done)
+        done: Any
+        done, _ = wait([primary], timeout=self.delay(endpoint))
+        if done or not self._take_hedge(allow):
+            return primary.result()
+
+        hedge: Future = self._executor.submit(request)
+        pending: Set[Future] = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.stats.wins += 1
+                    response: Response = future.result()
+                    return response
+                if error is None:
+                    error = future.exception()
+        assert error is not None
+        raise error
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.instructions
+~~~~~~~~~~~~~~~~~~~~~
+
+This module contains a columnar table of route instructions. OneMap
+returns each instruction as a list of ten strings and numbers:
+
+    [direction, road, distance, "lat,long", time, formatted distance,
+     compass direction, azimuth, mode, text]
+
+The table parses them in one pass, on first access, into NumPy arrays
+(`pip install python-onemapsg[numpy]`): numbers for distances, times,
+azimuths and coordinates, and integer codes into lists of categories for
+directions, roads, compass directions and modes. Every instruction takes
+the same number of bytes; texts are read from the raw list when asked for.
+
+Usage:
+    table = route.instruction_table
+    table.distance[table.where("direction", "Left")].sum()
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+from .utils import require_numpy
+
+DIRECTION: int = 0
+ROAD: int = 1
+DISTANCE: int = 2
+LAT_LONG: int = 3
+TIME: int = 4
+FORMATTED_DISTANCE: int = 5
+COMPASS: int = 6
+AZIMUTH: int = 7
+MODE: int = 8
+TEXT: int = 9
+
+# Categorical columns and their position in a raw instruction.
+CATEGORICAL: Dict[str, int] = {
+    "direction": DIRECTION,
+    "road": ROAD,
+    "compass": COMPASS,
+    "mode": MODE,
+}
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _field(instruction: Sequence[Any], index: int) -> Any:
+    return instruction[index] if len(instruction) > index else None
+
+
+class InstructionTable:
+    """Route instructions as columns. Distances are in metres and times in
+    seconds; values that are missing or not numbers are NaN."""
+
+    def __init__(self, raw: Sequence[Sequence[Any]]) -> None:
+        self._raw = raw
+        self._columns: Optional[Dict[str, Any]] = None
+        self.categories: Dict[str, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def _build(self) -> Dict[str, Any]:
+        if self._columns is not None:
+            return self._columns
+        np: Any = require_numpy()
+        count: int = len(self._raw)
+        distance: Any = np.empty(count, dtype=np.float32)
+        time: Any = np.empty(count, dtype=np.float32)
+        azimuth: Any = np.empty(count, dtype=np.float32)
+        lat_long: Any = np.full((count, 2), np.nan, dtype=np.float64)
+        codes: Dict[str, Any] = {
+            name: np.empty(count, dtype=np.int32) for name in CATEGORICAL
+        }
+        lookups: Dict[str, Dict[Any, int]] = {name: {} for name in CATEGORICAL}
+        for i, instruction in enumerate(self._raw):
+            distance[i] = _float(_field(instruction, DISTANCE))
+            time[i] = _float(_field(instruction, TIME))
+            azimuth[i] = _float(_field(instruction, AZIMUTH))
+            point: Any = _field(instruction, LAT_LONG)
+            if isinstance(point, str) and "," in point:
+                lat, long = point.split(",", 1)
+                lat_long[i] = _float(lat), _float(long)
+            for name, index in CATEGORICAL.items():
+                value: Any = _field(instruction, index)
+                lookup: Dict[Any, int] = lookups[name]
+                code: Optional[int] = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                codes[name][i] = code
+        self.categories = {name: list(lookup) for name, lookup in lookups.items()}
+        self._columns = dict(
+            distance=distance, time=time, azimuth=azimuth, lat_long=lat_long, **codes
+        )
+        return self._columns
+
+    def column(self, name: str) -> Any:
+        """Returns a column by name. Categorical columns are codes into
+        `categories[name]`."""
+        columns: Dict[str, Any] = self._build()
+        if name not in columns:
+            raise ValueError(f"`name` can only be one of {', '.join(columns)}.")
+        return columns[name]
+
+    @property
+    def distance(self) -> Any:
+        return self.column("distance")
+
+    @property
+    def time(self) -> Any:
+        return self.column("time")
+
+    @property
+    def azimuth(self) -> Any:
+        return self.column("azimuth")
+
+    @property
+    def lat_long(self) -> Any:
+        """(n, 2) array of the lat/long at which each instruction applies."""
+        return self.column("lat_long")
+
+    @property
+    def direction(self) -> Any:
+        return self.column("direction")
+
+    @property
+    def road(self) -> Any:
+        return self.column("road")
+
+    @property
+    def compass(self) -> Any:
+        return self.column("compass")
+
+    @property
+    def mode(self) -> Any:
+        return self.column("mode")
+
+    def where(self, name: str, value: Any) -> Any:
+        """Boolean mask of the instructions whose categorical column `name`
+        equals `value`, e.g. `table.where("direction", "Left")`."""
+        np: Any = require_numpy()
+        if name not in CATEGORICAL:
+            raise ValueError(f"`name` can only be one of {', '.join(CATEGORICAL)}.")
+        codes: Any = self.column(name)
+        try:
+            code: int = self.categories[name].index(value)
+        except ValueError:
+            return np.zeros(len(codes), dtype=bool)
+        return codes == code
+
+    def labels(self, name: str) -> List[Any]:
+        """The values of a categorical column, one per instruction."""
+        codes: Any = self.column(name)
+        categories: List[Any] = self.categories[name]
+        return [categories[code] for code in codes.tolist()]
+
+    def text(self, index: int) -> Optional[str]:
+        """The instruction text, e.g. "Turn Left onto Keppel Road"."""
+        return _field(self._raw[index], TEXT)
+
+    @property
+    def total_distance(self) -> float:
+        np: Any = require_numpy()
+        return float(np.nansum(self.distance, dtype=np.float64))
+
+    @property
+    def total_time(self) -> float:
+        np: Any = require_numpy()
+        return float(np.nansum(self.time, dtype=np.float64))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the columns, not counting the raw list."""
+        return sum(column.nbytes for column in self._build().values())
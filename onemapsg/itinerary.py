@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.itinerary
+~~~~~~~~~~~~~~~~~~
+
+This module contains a typed model of public transport plans, the `plan`
+of a `pt` RouteResult: a Plan has Itineraries, which have Legs. Nothing is
+parsed until it is accessed, and the arrays used to rank itineraries are
+read straight from the raw plan without building any objects. NumPy is
+required for the arrays and geometries (`pip install
+python-onemapsg[numpy]`).
+
+Usage:
+    plan = onemap.route(start, end, "pt").transit_plan
+    best = plan.itineraries[plan.rank("duration")[0]]
+    for leg, lat_longs in zip(best.legs, best.leg_lat_longs()):
+        ...
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .utils import require_numpy
+
+# Itinerary keys that `Plan.array` and `Plan.rank` accept.
+ITINERARY_FIELDS: Dict[str, str] = {
+    "duration": "duration",
+    "transfers": "transfers",
+    "fare": "fare",
+    "walk_distance": "walkDistance",
+    "walk_time": "walkTime",
+    "transit_time": "transitTime",
+    "waiting_time": "waitingTime",
+}
+
+
+def _number(value: Any) -> float:
+    # Fares are strings, e.g. "1.50", and can be missing.
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def decode_polylines(geometries: Sequence[str], precision: int = 5) -> List[Any]:
+    """Decodes many encoded polylines in one vectorized pass, returning an
+    (n, 2) array of lat/longs for each."""
+    np: Any = require_numpy()
+    encoded: List[bytes] = [geometry.encode("ascii") for geometry in geometries]
+    data: bytes = b"".join(encoded)
+    if not data:
+        return [np.empty((0, 2)) for _ in encoded]
+    chunks: Any = np.frombuffer(data, dtype=np.uint8).astype(np.int64) - 63
+    # Each value is a run of 5-bit chunks; the last chunk has bit 0x20 unset.
+    ends: Any = (chunks & 0x20) == 0
+    starts: Any = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    position: Any = np.arange(len(chunks)) - np.repeat(
+        starts, np.diff(np.append(starts, len(chunks)))
+    )
+    values: Any = np.add.reduceat((chunks & 0x1F) << (5 * position), starts)
+    values = (values >> 1) ^ -(values & 1)
+
+    # Deltas are summed over every polyline, then each polyline's points
+    # are made relative to the last point of the one before it.
+    byte_ends: Any = np.cumsum([len(e) for e in encoded])
+    values_before: Any = np.concatenate(([0], np.cumsum(ends)))
+    point_ends: Any = values_before[byte_ends] // 2
+    point_starts: Any = np.concatenate(([0], point_ends[:-1]))
+    points: Any = values.reshape(-1, 2).cumsum(axis=0)
+    offsets: Any = np.where(
+        (point_starts > 0)[:, None], points[np.maximum(point_starts - 1, 0)], 0
+    )
+    scale: float = 10.0**precision
+    return [
+        (part - offset) / scale
+        for part, offset in zip(np.split(points, point_ends[:-1]), offsets)
+    ]
+
+
+class Place:
+    """A stop or point of a plan."""
+
+    __slots__ = ("name", "lat", "long", "stop_id")
+
+    def __init__(self, data: dict) -> None:
+        self.name: Optional[str] = data.get("name")
+        self.lat: float = _number(data.get("lat"))
+        self.long: float = _number(data.get("lon"))
+        self.stop_id: Optional[str] = data.get("stopId")
+
+    @property
+    def lat_long(self) -> Tuple[float, float]:
+        return self.lat, self.long
+
+
+class Leg:
+    """One walk or transit leg of an itinerary. Times are in milliseconds
+    since the epoch, durations in seconds and distances in metres."""
+
+    __slots__ = (
+        "mode",
+        "route",
+        "transit",
+        "distance",
+        "duration",
+        "start_time",
+        "end_time",
+        "geometry",
+        "_data",
+    )
+
+    def __init__(self, data: dict) -> None:
+        self._data = data
+        self.mode: str = data.get("mode", "")
+        self.route: str = data.get("route", "")
+        self.transit: bool = bool(data.get("transitLeg", self.mode != "WALK"))
+        self.distance: float = _number(data.get("distance"))
+        self.duration: float = _number(data.get("duration"))
+        self.start_time: Optional[int] = data.get("startTime")
+        self.end_time: Optional[int] = data.get("endTime")
+        self.geometry: str = (data.get("legGeometry") or {}).get("points", "")
+
+    @property
+    def origin(self) -> Place:
+        return Place(self._data.get("from") or {})
+
+    @property
+    def destination(self) -> Place:
+        return Place(self._data.get("to") or {})
+
+    @property
+    def raw(self) -> dict:
+        return self._data
+
+
+class Itinerary:
+    """One way to travel from the origin to the destination."""
+
+    def __init__(self, data: dict) -> None:
+        self._data = data
+        self._legs: Optional[List[Leg]] = None
+
+    @property
+    def duration(self) -> float:
+        return _number(self._data.get("duration"))
+
+    @property
+    def transfers(self) -> float:
+        return _number(self._data.get("transfers"))
+
+    @property
+    def fare(self) -> float:
+        return _number(self._data.get("fare"))
+
+    @property
+    def walk_distance(self) -> float:
+        return _number(self._data.get("walkDistance"))
+
+    @property
+    def legs(self) -> List[Leg]:
+        if self._legs is None:
+            self._legs = [Leg(leg) for leg in self._data.get("legs") or []]
+        return self._legs
+
+    @property
+    def modes(self) -> List[str]:
+        return [leg.get("mode", "") for leg in self._data.get("legs") or []]
+
+    @property
+    def raw(self) -> dict:
+        return self._data
+
+    def leg_lat_longs(self) -> List[Any]:
+        """Decodes the geometries of every leg in one pass, returning an
+        (n, 2) array of lat/longs per leg."""
+        return decode_polylines(
+            [
+                (leg.get("legGeometry") or {}).get("points", "")
+                for leg in self._data.get("legs") or []
+            ]
+        )
+
+    def lat_longs(self) -> Any:
+        """The whole itinerary as one (n, 2) array of lat/longs."""
+        np: Any = require_numpy()
+        parts: List[Any] = self.leg_lat_longs()
+        if not parts:
+            return np.empty((0, 2))
+        return np.concatenate(parts)
+
+
+class Plan:
+    """A public transport plan. Itineraries are built on first access."""
+
+    def __init__(self, data: dict) -> None:
+        self._data = data
+        self._raw_itineraries: List[dict] = data.get("itineraries") or []
+        self._itineraries: Optional[List[Itinerary]] = None
+        self._arrays: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._raw_itineraries)
+
+    @property
+    def origin(self) -> Place:
+        return Place(self._data.get("from") or {})
+
+    @property
+    def destination(self) -> Place:
+        return Place(self._data.get("to") or {})
+
+    @property
+    def date(self) -> Optional[int]:
+        return self._data.get("date")
+
+    @property
+    def itineraries(self) -> List[Itinerary]:
+        if self._itineraries is None:
+            self._itineraries = [Itinerary(i) for i in self._raw_itineraries]
+        return self._itineraries
+
+    def array(self, field: str) -> Any:
+        """Returns a field of every itinerary as a float64 array, with NaN
+        where it is missing, e.g. `plan.array("fare")`."""
+        if field not in ITINERARY_FIELDS:
+            raise ValueError(
+                f"`field` can only be one of {', '.join(ITINERARY_FIELDS)}."
+            )
+        if field not in self._arrays:
+            np: Any = require_numpy()
+            key: str = ITINERARY_FIELDS[field]
+            self._arrays[field] = np.array(
+                [_number(i.get(key)) for i in self._raw_itineraries],
+                dtype=np.float64,
+            )
+        return self._arrays[field]
+
+    @property
+    def durations(self) -> Any:
+        return self.array("duration")
+
+    @property
+    def transfers(self) -> Any:
+        return self.array("transfers")
+
+    @property
+    def fares(self) -> Any:
+        return self.array("fare")
+
+    def rank(self, *fields: str) -> Any:
+        """Returns itinerary indices sorted by `fields`, the first one
+        first, e.g. `plan.rank("transfers", "duration")`. Missing values
+        sort last."""
+        np: Any = require_numpy()
+        if not fields:
+            fields = ("duration",)
+        # lexsort sorts by its last key first.
+        keys: List[Any] = [self.array(field) for field in reversed(fields)]
+        return np.lexsort(keys)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.matrix
+~~~~~~~~~~~~~~~
+
+This module contains the many-to-many route matrix built on top of the
+routing service.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from ._fanout import fan_out
+from .utils import require_numpy
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .client import OneMap
+
+MATRIX_ROUTE_TYPES: List[str] = ["walk", "drive", "cycle"]
+
+Pair = Tuple[str, str]
+
+
+class RouteMatrix:
+    """
+    Total time (seconds) and total distance (metres) between every origin
+    and every destination, as `len(origins) x len(destinations)` float32
+    arrays. Pairs that could not be routed are NaN and their exceptions are
+    kept in `errors`, keyed by (origin index, destination index).
+    """
+
+    def __init__(
+        self,
+        origins: Sequence[str],
+        destinations: Sequence[str],
+        route_type: str,
+        total_time: Any,
+        total_distance: Any,
+        errors: Dict[Tuple[int, int], Exception],
+    ) -> None:
+        self.origins = list(origins)
+        self.destinations = list(destinations)
+        self.route_type = route_type
+        self.total_time = total_time
+        self.total_distance = total_distance
+        self.errors = errors
+
+    @property
+    def complete(self) -> bool:
+        """Whether every pair was routed successfully."""
+        return not self.errors
+
+    @property
+    def missing(self) -> Any:
+        """Boolean mask of the pairs without a result."""
+        np: Any = require_numpy()
+        return np.isnan(self.total_time)
+
+    def to_dict(self) -> dict:
+        return dict(
+            origins=self.origins,
+            destinations=self.destinations,
+            route_type=self.route_type,
+            total_time=self.total_time.tolist(),
+            total_distance=self.total_distance.tolist(),
+            errors={f"{i},{j}": str(err) for (i, j), err in self.errors.items()},
+        )
+
+
+def _route_summary(
+    client: "OneMap",
+    start: str,
+    end: str,
+    route_type: str,
+    timeout: int,
+) -> Tuple[float, float]:
+    result: Optional[Any] = client.route(start, end, route_type, timeout=timeout)
+    if result is None or not result.route_summary:
+        raise ValueError(f"No route found between {start} and {end}.")
+    return (
+        float(result.route_summary["total_time"]),
+        float(result.route_summary["total_distance"]),
+    )
+
+
+def route_matrix(
+    client: "OneMap",
+    origins: Sequence[str],
+    destinations: Sequence[str],
+    route_type: str,
+    symmetric: bool = False,
+    max_workers: int = 8,
+    timeout: int = 15,
+    raise_on_error: bool = False,
+) -> RouteMatrix:
+    """
+    Routes every origin to every destination concurrently.
+
+    Duplicate pairs are only requested once and pairs whose origin equals
+    their destination are not requested at all. When `symmetric` is True,
+    A -> B is also used for B -> A; this is usually reasonable for walking
+    and cycling but not for driving, because of one-way streets.
+
+    Pairs are routed through `client.route`, as described in
+    `onemapsg._fanout`. Failed pairs are reported in `RouteMatrix.errors`
+    unless `raise_on_error` is True.
+    """
+    if route_type not in MATRIX_ROUTE_TYPES:
+        raise ValueError(
+            f"`route_type` can only be one of {', '.join(MATRIX_ROUTE_TYPES)}."
+        )
+    np: Any = require_numpy()
+    origins = [o.strip() for o in origins]
+    destinations = [d.strip() for d in destinations]
+    shape: Tuple[int, int] = (len(origins), len(destinations))
+    total_time: Any = np.full(shape, np.nan, dtype=np.float32)
+    total_distance: Any = np.full(shape, np.nan, dtype=np.float32)
+    errors: Dict[Tuple[int, int], Exception] = {}
+
+    cells: Dict[Pair, List[Tuple[int, int]]] = {}
+    for i, origin in enumerate(origins):
+        for j, destination in enumerate(destinations):
+            if origin == destination:
+                total_time[i, j] = total_distance[i, j] = 0
+                continue
+            pair: Pair = (origin, destination)
+            if symmetric and destination < origin:
+                pair = (destination, origin)
+            cells.setdefault(pair, []).append((i, j))
+
+    def route(pair: Pair) -> Tuple[float, float]:
+        return _route_summary(client, pair[0], pair[1], route_type, timeout)
+
+    for pair, summary, error in fan_out(
+        route, cells, max_workers=max_workers, raise_on_error=raise_on_error
+    ):
+        if error is not None:
+            for index in cells[pair]:
+                errors[index] = error
+            continue
+        time_taken, distance = summary
+        for i, j in cells[pair]:
+            total_time[i, j] = time_taken
+            total_distance[i, j] = distance
+
+    return RouteMatrix(
+        origins, destinations, route_type, total_time, total_distance, errors
+    )
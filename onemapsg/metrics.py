@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.metrics
+~~~~~~~~~~~~~~~~
+
+This module contains a small metrics registry that is fed by the client's
+request hooks and can be exported in the Prometheus text format.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+from .breaker import STATES, CircuitBreaker
+from .cache import Cache
+from .response import Response
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .client import OneMap
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    15.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+def format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    pairs: List[str] = []
+    for name, value in zip(names, values):
+        escaped: str = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """Base class of labelled metrics."""
+
+    type: str = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    @abstractmethod
+    def expose(self) -> List[str]:
+        """Returns the lines of the metric in the Prometheus text format."""
+
+
+class Counter(Metric):
+
+    type = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, labels: Labels = ()) -> float:
+        with self._lock:
+            return self.values.get(labels, 0)
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            values: Dict[Labels, float] = dict(self.values)
+        lines: List[str] = self.header()
+        for labels, value in sorted(values.items()):
+            lines.append(
+                f"{self.name}{format_labels(self.label_names, labels)} "
+                f"{format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+
+    type = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels, value: float) -> None:
+        with self._lock:
+            self.values[labels] = value
+
+
+class Histogram(Metric):
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets)) + (float("inf"),)
+        self.counts: Dict[Labels, List[int]] = {}
+        self.sums: Dict[Labels, float] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        with self._lock:
+            counts: List[int] = self.counts.setdefault(labels, [0] * len(self.buckets))
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    counts[index] += 1
+                    break
+            self.sums[labels] = self.sums.get(labels, 0.0) + value
+
+    def count(self, labels: Labels = ()) -> int:
+        with self._lock:
+            return sum(self.counts.get(labels, []))
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            all_counts: Dict[Labels, List[int]] = {
+                labels: list(counts) for labels, counts in self.counts.items()
+            }
+            sums: Dict[Labels, float] = dict(self.sums)
+        lines: List[str] = self.header()
+        bucket_labels: Tuple[str, ...] = self.label_names + ("le",)
+        for labels, counts in sorted(all_counts.items()):
+            cumulative: int = 0
+            for upper_bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                label_str: str = format_labels(
+                    bucket_labels, labels + (format_value(upper_bound),)
+                )
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_str} {format_value(sums[labels])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collects per-endpoint request counts, latencies and in-flight requests
+    from the hooks of one or more clients.
+
+    Usage:
+        registry = MetricsRegistry()
+        registry.install(onemap)
+        print(registry.to_prometheus())
+    """
+
+    def __init__(
+        self, namespace: str = "onemap", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.namespace = namespace
+        self.requests = Counter(
+            f"{namespace}_requests_total",
+            "Responses received, by endpoint and HTTP status.",
+            ["endpoint", "status"],
+        )
+        self.errors = Counter(
+            f"{namespace}_request_errors_total",
+            "Requests that failed without a response, by endpoint and error.",
+            ["endpoint", "error"],
+        )
+        self.latency = Histogram(
+            f"{namespace}_request_duration_seconds",
+            "Request latency, by endpoint.",
+            ["endpoint"],
+            buckets=buckets,
+        )
+        self.in_flight = Gauge(
+            f"{namespace}_requests_in_flight",
+            "Requests currently waiting for a response, by endpoint.",
+            ["endpoint"],
+        )
+        self.metrics: List[Metric] = [
+            self.requests,
+            self.errors,
+            self.latency,
+            self.in_flight,
+        ]
+        self.caches: Dict[str, Cache] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def install(self, client: "OneMap", cache_name: str = "default") -> None:
+        """Registers the registry's hooks on `client` and tracks its cache
+        and circuit breaker."""
+        client.register_hook("before_request", self.before_request)
+        client.register_hook("after_response", self.after_response)
+        client.register_hook("on_error", self.on_error)
+        if client.cache is not None:
+            self.track_cache(client.cache, cache_name)
+        if client.circuit_breaker is not None:
+            self.track_breaker(client.circuit_breaker, cache_name)
+
+    def track_cache(self, cache: Cache, name: str = "default") -> None:
+        """Exports the statistics of `cache` under the given name."""
+        self.caches[name] = cache
+
+    def track_breaker(self, breaker: CircuitBreaker, name: str = "default") -> None:
+        """Exports the circuit states of `breaker` under the given name."""
+        self.breakers[name] = breaker
+
+    def before_request(self, action_type: str, url: str) -> None:
+        self.in_flight.inc((action_type,))
+
+    def after_response(
+        self, action_type: str, url: str, response: Response, elapsed: float
+    ) -> None:
+        self.in_flight.dec((action_type,))
+        self.requests.inc((action_type, str(response.status_code)))
+        self.latency.observe((action_type,), elapsed)
+
+    def on_error(
+        self, action_type: str, url: str, error: Exception, elapsed: float
+    ) -> None:
+        self.in_flight.dec((action_type,))
+        self.errors.inc((action_type, type(error).__name__))
+        self.latency.observe((action_type,), elapsed)
+
+    def _cache_metrics(self) -> List[Metric]:
+        if not self.caches:
+            return []
+        families: Dict[str, Counter] = {
+            "hits": Counter(
+                f"{self.namespace}_cache_hits_total", "Cache hits.", ["cache"]
+            ),
+            "misses": Counter(
+                f"{self.namespace}_cache_misses_total", "Cache misses.", ["cache"]
+            ),
+            "evictions": Counter(
+                f"{self.namespace}_cache_evictions_total", "Cache evictions.", ["cache"]
+            ),
+        }
+        size: Gauge = Gauge(
+            f"{self.namespace}_cache_entries", "Entries in the cache.", ["cache"]
+        )
+        for name, cache in self.caches.items():
+            for attr, counter in families.items():
+                counter.inc((name,), getattr(cache.stats, attr))
+            size.set((name,), len(cache))
+        metrics: List[Metric] = list(families.values())
+        metrics.append(size)
+        return metrics
+
+    def _breaker_metrics(self) -> List[Metric]:
+        if not self.breakers:
+            return []
+        state: Gauge = Gauge(
+            f"{self.namespace}_circuit_breaker_state",
+            "1 for the current circuit state of each endpoint, 0 otherwise.",
+            ["breaker", "endpoint", "state"],
+        )
+        rejected: Counter = Counter(
+            f"{self.namespace}_circuit_breaker_rejected_total",
+            "Calls rejected while the circuit was open.",
+            ["breaker", "endpoint"],
+        )
+        for name, breaker in self.breakers.items():
+            for endpoint, current in breaker.states().items():
+                for candidate in STATES:
+                    state.set((name, endpoint, candidate), int(candidate == current))
+                rejected.inc((name, endpoint), breaker.rejected(endpoint))
+        return [state, rejected]
+
+    def to_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self.metrics + self._cache_metrics() + self._breaker_metrics():
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
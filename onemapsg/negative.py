@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.negative
+~~~~~~~~~~~~~~~~~
+
+This module contains the negative cache, which remembers queries that
+returned nothing (searches that found no results) or were rejected as
+invalid (400 Bad Request), so that they are not sent again.
+
+By default negative results are kept exactly, in a Cache with its own TTL.
+With `bloom_capacity`, only their keys are kept in Bloom filters, which
+hold tens of millions of keys in a few MB at the cost of an `error_rate`
+share of false positives. Bloom filters cannot forget single keys, so two
+generations are kept and the older one is dropped every `ttl` seconds;
+keys are remembered for between `ttl` and twice `ttl` seconds. The filters
+can be saved and loaded, e.g. between nightly batch runs.
+"""
+
+import struct
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+from .bloom import BloomFilter
+from .cache import Cache, CacheStats
+from .response import SearchResult
+
+EMPTY: str = "empty"
+INVALID: str = "invalid"
+
+EMPTY_SEARCH_DATA: dict = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+
+
+def is_empty(result: Any) -> bool:
+    """Whether `result` is a search that found nothing."""
+    return isinstance(result, SearchResult) and not result.found and not result.results
+
+
+class NegativeCache:
+    """
+    Remembers empty and invalid queries for `ttl` seconds.
+
+    Usage:
+        onemap = OneMap(negative_cache=NegativeCache(ttl=7 * 24 * 60 * 60))
+    """
+
+    def __init__(
+        self,
+        ttl: float = 7 * 24 * 60 * 60,
+        maxsize: int = 100000,
+        bloom_capacity: Optional[int] = None,
+        error_rate: float = 0.01,
+    ) -> None:
+        self.ttl = ttl
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        self.stats = CacheStats()
+        self._cache: Optional[Cache] = None
+        self._filters: Tuple[BloomFilter, ...] = ()
+        self._rotated_at: float = time.monotonic()
+        self._lock = threading.Lock()
+        if bloom_capacity is None:
+            self._cache = Cache(maxsize=maxsize, ttl=ttl)
+            self.stats = self._cache.stats
+        else:
+            self._filters = (self._new_filter(),)
+
+    def _new_filter(self) -> BloomFilter:
+        assert self.bloom_capacity is not None
+        return BloomFilter(self.bloom_capacity, self.error_rate)
+
+    def _rotate(self) -> Tuple[BloomFilter, ...]:
+        with self._lock:
+            now: float = time.monotonic()
+            if now - self._rotated_at >= self.ttl:
+                # Both generations are dropped after two TTLs without a rotation.
+                current: Tuple[BloomFilter, ...] = (
+                    self._filters[:1] if now - self._rotated_at < 2 * self.ttl else ()
+                )
+                self._filters = (self._new_filter(),) + current
+                self._rotated_at = now
+            return self._filters
+
+    def add(self, key: str, kind: str, value: Any = None) -> None:
+        """Remembers that `key` was `EMPTY`, with the empty result as
+        `value`, or `INVALID`, with the error message as `value`."""
+        if self._cache is not None:
+            self._cache.set(key, (kind, value))
+            return
+        self._rotate()[0].add(f"{kind}:{key}")
+
+    def lookup(self, key: str) -> Optional[Tuple[str, Any]]:
+        """Returns (kind, value) if `key` is known to return nothing."""
+        if self._cache is not None:
+            return self._cache.get(key)
+        filters: Tuple[BloomFilter, ...] = self._rotate()
+        for kind in (EMPTY, INVALID):
+            member: str = f"{kind}:{key}"
+            if any(member in bloom for bloom in filters):
+                self.stats.hits += 1
+                if kind == EMPTY:
+                    return kind, SearchResult(**EMPTY_SEARCH_DATA)
+                return kind, "Request was rejected as invalid before."
+        self.stats.misses += 1
+        return None
+
+    @property
+    def size_bytes(self) -> int:
+        """Memory used by the Bloom filters."""
+        return sum(bloom.size_bytes for bloom in self._filters)
+
+    def __len__(self) -> int:
+        if self._cache is not None:
+            return len(self._cache)
+        return sum(len(bloom) for bloom in self._filters)
+
+    def save(self, path: str) -> None:
+        """Writes the Bloom filters to `path`."""
+        if self._cache is not None:
+            raise ValueError("Only the Bloom filter mode can be saved.")
+        with self._lock:
+            filters: Tuple[BloomFilter, ...] = self._filters
+            age: float = time.monotonic() - self._rotated_at
+        with open(path, "wb") as f:
+            f.write(struct.pack("<dI", time.time() - age, len(filters)))
+            for bloom in filters:
+                data: bytes = bloom.to_bytes()
+                f.write(struct.pack("<Q", len(data)))
+                f.write(data)
+
+    def load(self, path: str) -> None:
+        """Replaces the Bloom filters with those saved to `path`."""
+        if self._cache is not None:
+            raise ValueError("Only the Bloom filter mode can be loaded.")
+        with open(path, "rb") as f:
+            rotated_at, count = struct.unpack("<dI", f.read(12))
+            filters: List[BloomFilter] = []
+            for _ in range(count):
+                (length,) = struct.unpack("<Q", f.read(8))
+                filters.append(BloomFilter.from_bytes(f.read(length)))
+        with self._lock:
+            self._filters = tuple(filters) or (self._new_filter(),)
+            self._rotated_at = time.monotonic() - (time.time() - rotated_at)
+
+    def clear(self) -> None:
+        if self._cache is not None:
+            self._cache.clear()
+            return
+        with self._lock:
+            self._filters = (self._new_filter(),)
+            self._rotated_at = time.monotonic()
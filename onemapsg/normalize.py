@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.normalize
+~~~~~~~~~~~~~~~~~~
+
+This module contains the query normalization layer. Queries that OneMap
+treats as equivalent are canonicalized before they are turned into a URL,
+so that they share a single cache key.
+"""
+
+import re
+from typing import Any, Optional, Sequence, Tuple
+
+from .geo import Snapper
+
+POSTAL_CODE_PATTERN = re.compile(r"^(?:singapore|s)?\s*\(?(\d{6})\)?$")
+
+
+def normalize_search_value(search_val: str) -> str:
+    """Case folds and collapses whitespace in a search value. Six-digit
+    postal codes, with or without a `Singapore` or `S` prefix, are reduced
+    to the bare postal code."""
+    value: str = " ".join(str(search_val).split()).casefold()
+    match: Optional[Any] = POSTAL_CODE_PATTERN.match(value)
+    if match:
+        return match.group(1)
+    return value
+
+
+def round_coordinate(value: Any, precision: int) -> str:
+    """Rounds a single coordinate to `precision` decimal places."""
+    return f"{float(value):.{precision}f}"
+
+
+def normalize_coordinates(location: Any, precision: int) -> Tuple[str, ...]:
+    """Rounds every component of a coordinate pair. Accepts either a
+    `lat,long` / `x,y` string or a sequence of numbers."""
+    components: Sequence[Any]
+    if isinstance(location, str):
+        components = location.split(",")
+    else:
+        components = location
+    return tuple(round_coordinate(c, precision) for c in components)
+
+
+class Normalizer:
+    """
+    Canonicalizes the arguments of an `execute` call.
+
+    `coordinate_precision` is the number of decimal places WGS84 coordinates
+    are rounded to (5 places is roughly 1 metre), and `svy21_precision` the
+    number of decimal places SVY21 coordinates (in metres) are rounded to.
+
+    When a `route_snapper` is given, route start and end points are snapped
+    to its grid instead of being rounded, so that trips starting and ending
+    within the same cells share a cache entry.
+    """
+
+    def __init__(
+        self,
+        coordinate_precision: int = 5,
+        svy21_precision: int = 0,
+        route_snapper: Optional[Snapper] = None,
+    ) -> None:
+        self.coordinate_precision = coordinate_precision
+        self.svy21_precision = svy21_precision
+        self.route_snapper = route_snapper
+
+    def normalize(
+        self, action_type: str, args: tuple, kwargs: dict
+    ) -> Tuple[tuple, dict]:
+        """Returns normalized copies of `args` and `kwargs` for the given
+        action type. Unknown action types are returned unchanged."""
+        callback: Optional[Any] = getattr(self, f"normalize_{action_type}", None)
+        if callback is None:
+            return args, kwargs
+        return callback(list(args), dict(kwargs))
+
+    def normalize_search(self, args: list, kwargs: dict) -> Tuple[tuple, dict]:
+        if args:
+            args[0] = normalize_search_value(args[0])
+        elif "search_val" in kwargs:
+            kwargs["search_val"] = normalize_search_value(kwargs["search_val"])
+        return tuple(args), kwargs
+
+    def normalize_route(self, args: list, kwargs: dict) -> Tuple[tuple, dict]:
+        for index, name in enumerate(["start", "end"]):
+            if len(args) > index:
+                args[index] = self.normalize_route_point(args[index])
+            elif name in kwargs:
+                kwargs[name] = self.normalize_route_point(kwargs[name])
+        if len(args) > 3 and args[3]:
+            args[3] = dict(sorted(args[3].items()))
+        elif kwargs.get("public_transport_options"):
+            kwargs["public_transport_options"] = dict(
+                sorted(kwargs["public_transport_options"].items())
+            )
+        return tuple(args), kwargs
+
+    def normalize_route_point(self, point: str) -> str:
+        if self.route_snapper is not None:
+            return self.route_snapper.snap_point(point)
+        return ",".join(normalize_coordinates(point, self.coordinate_precision))
+
+    def normalize_reverse_geocode_wgs84(
+        self, args: list, kwargs: dict
+    ) -> Tuple[tuple, dict]:
+        return self._normalize_location(args, kwargs, self.coordinate_precision)
+
+    def normalize_reverse_geocode_svy21(
+        self, args: list, kwargs: dict
+    ) -> Tuple[tuple, dict]:
+        return self._normalize_location(args, kwargs, self.svy21_precision)
+
+    def _normalize_location(
+        self, args: list, kwargs: dict, precision: int
+    ) -> Tuple[tuple, dict]:
+        if args:
+            args[0] = normalize_coordinates(args[0], precision)
+        elif "location" in kwargs:
+            kwargs["location"] = normalize_coordinates(kwargs["location"], precision)
+        return tuple(args), kwargs
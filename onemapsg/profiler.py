@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.profiler
+~~~~~~~~~~~~~~~~~
+
+This module contains the opt-in profiler that records how long each phase
+of a client call takes, per endpoint.
+
+Phases, in the order they happen:
+    build_url        normalizing arguments and constructing the query URL
+    cache            looking the query up in the cache
+    rate_limit       waiting on the rate limiter
+    request          connection setup and server time, until headers arrive
+    download         reading the response body
+    json_decode      decoding the JSON body
+    coerce_response  building the result object
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+PHASES: List[str] = [
+    "build_url",
+    "cache",
+    "rate_limit",
+    "request",
+    "download",
+    "json_decode",
+    "coerce_response",
+]
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Returns the `p`-th percentile (0-100) of `values` by nearest rank."""
+    if not values:
+        return 0.0
+    ordered: List[float] = sorted(values)
+    rank: int = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class _Phase:
+    """Context manager timing a single phase."""
+
+    __slots__ = ("profiler", "endpoint", "name", "started_at")
+
+    def __init__(self, profiler: "Profiler", endpoint: str, name: str) -> None:
+        self.profiler = profiler
+        self.endpoint = endpoint
+        self.name = name
+        self.started_at: float = 0.0
+
+    def __enter__(self) -> None:
+        self.started_at = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.profiler.record(
+            self.endpoint, self.name, time.perf_counter() - self.started_at
+        )
+
+
+class _NullPhase:
+    """Context manager used in place of _Phase when profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+NULL_PHASE: _NullPhase = _NullPhase()
+
+
+class Profiler:
+    """
+    Keeps the last `max_samples` wall times (in seconds) of every phase of
+    every endpoint and summarizes them as percentiles.
+    """
+
+    def __init__(self, max_samples: int = 10000) -> None:
+        self.max_samples = max_samples
+        self.samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, phase: str, seconds: float) -> None:
+        key: Tuple[str, str] = (endpoint, phase)
+        with self._lock:
+            samples: Optional[Deque[float]] = self.samples.get(key)
+            if samples is None:
+                samples = self.samples[key] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+
+    def phase(self, endpoint: str, name: str) -> _Phase:
+        """Returns a context manager recording the time spent in it."""
+        return _Phase(self, endpoint, name)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples.clear()
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> dict:
+        """Returns {endpoint: {phase: {count, mean, p50, ...}}}, with phases
+        in the order they happen and times in milliseconds."""
+        with self._lock:
+            items: List[Tuple[Tuple[str, str], List[float]]] = [
+                (key, list(values)) for key, values in self.samples.items()
+            ]
+        order: Dict[str, int] = {name: index for index, name in enumerate(PHASES)}
+        items.sort(key=lambda item: (item[0][0], order.get(item[0][1], len(order))))
+        result: dict = {}
+        for (endpoint, phase), values in items:
+            stats: Dict[str, float] = dict(
+                count=len(values), mean=sum(values) / len(values) * 1000
+            )
+            for p in percentiles:
+                stats[f"p{p:g}"] = percentile(values, p) * 1000
+            result.setdefault(endpoint, {})[phase] = stats
+        return result
+
+    def report(self, percentiles: Sequence[float] = (50, 90, 99)) -> str:
+        """Returns the summary as a plain text table."""
+        columns: List[str] = ["count", "mean"] + [f"p{p:g}" for p in percentiles]
+        lines: List[str] = [
+            f"{'endpoint':<24}{'phase':<18}"
+            + "".join(f"{column:>10}" for column in columns)
+        ]
+        for endpoint, phases in self.summary(percentiles).items():
+            for phase, stats in phases.items():
+                lines.append(
+                    f"{endpoint:<24}{phase:<18}{stats['count']:>10}"
+                    + "".join(f"{stats[column]:>10.3f}" for column in columns[1:])
+                )
+        return "\n".join(lines)
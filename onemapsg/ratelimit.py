@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.ratelimit
+~~~~~~~~~~~~~~~~~~
+
+This module contains a token bucket rate limiter that can be shared
+across threads.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Allows up to `rate` requests per second on average, with bursts of up
+    to `burst` requests (defaults to `rate`).
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        if rate <= 0:
+            raise ValueError("`rate` must be greater than 0.")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens: float = float(self.burst)
+        self._updated_at: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now: float = time.monotonic()
+        self._tokens = min(
+            float(self.burst), self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        """Number of requests that can be made right now without waiting."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def try_acquire(self) -> bool:
+        """Takes a token if one is available, without blocking."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until a token is available. Returns False if `timeout`
+        seconds pass before that happens."""
+        deadline: Optional[float] = (
+            time.monotonic() + timeout if timeout is not None else None
+        )
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait: float = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
@@ -7,15 +7,33 @@ onemapsg.response
 This module contains the Response class.
 """
 
-from typing import Any, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
 
-import polyline
+if TYPE_CHECKING:  # pragma: no cover
+    from .instructions import InstructionTable
+    from .itinerary import Plan
+
+
+def _cached_view(obj: Any, attr: str, source: Any, build: Callable[[Any], Any]) -> Any:
+    """Returns the view of `source` kept in `obj.attr`, built with `build`
+    when there is none yet or `source` was replaced."""
+    cached: Optional[Tuple[Any, Any]] = obj.__dict__.get(attr)
+    if cached is None or cached[0] is not source:
+        cached = obj.__dict__[attr] = (source, build(source))
+    return cached[1]
 
 
 class Response:
-    def __init__(self, status_code: int, data: dict) -> None:
+    """A status code and decoded JSON body. Requests sent with
+    `decode=False` keep the undecoded body in `content` instead, and
+    `data` is empty."""
+
+    def __init__(
+        self, status_code: int, data: dict, content: Optional[bytes] = None
+    ) -> None:
         self.status_code = status_code
         self.data = data
+        self.content = content
 
 
 class BaseResource:
@@ -140,5 +158,29 @@ class RouteResult(BaseResource):
     def lat_longs(self) -> Optional[List[Tuple[float, float]]]:
         """Decoded from route_geometry."""
         if self.route_geometry:
+            import polyline
+
             return polyline.decode(self.route_geometry)
         return None
+
+    @property
+    def instruction_table(self) -> Optional["InstructionTable"]:
+        """Columnar view of `route_instructions`, parsed when its columns
+        are first accessed and kept until `route_instructions` is replaced."""
+        if self.route_instructions is None:
+            return None
+        from .instructions import InstructionTable
+
+        return _cached_view(
+            self, "_instruction_table", self.route_instructions, InstructionTable
+        )
+
+    @property
+    def transit_plan(self) -> Optional["Plan"]:
+        """Typed, lazily parsed view of `plan`, for routeType='pt'. Kept
+        until `plan` is replaced."""
+        if not self.plan:
+            return None
+        from .itinerary import Plan
+
+        return _cached_view(self, "_transit_plan", self.plan, Plan)
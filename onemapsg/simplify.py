@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.simplify
+~~~~~~~~~~~~~~~~~
+
+This module contains route geometry simplification with NumPy
+(`pip install python-onemapsg[numpy]`). Paths are projected to metres
+around Singapore, so tolerances are in metres, and simplified with
+Douglas-Peucker or Visvalingam-Whyatt. Polylines can be simplified and
+re-encoded in one call, one at a time or in batches.
+
+Usage:
+    simplified = simplify_polyline(route.route_geometry, tolerance=10)
+    zoomed_out = simplify_polylines(geometries, tolerance=50)
+"""
+
+import heapq
+import math
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from .geo import METRES_PER_DEGREE, REFERENCE_LATITUDE
+from .utils import require_numpy
+
+DOUGLAS_PEUCKER: str = "douglas_peucker"
+VISVALINGAM: str = "visvalingam"
+
+
+def project(lat_longs: Any) -> Any:
+    """Projects an (n, 2) array of lat/longs to metres, x east and y north.
+    Distortion is well under 1% anywhere in Singapore."""
+    np: Any = require_numpy()
+    points: Any = np.asarray(lat_longs, dtype=np.float64).reshape(-1, 2)
+    scale: Any = np.array(
+        [
+            METRES_PER_DEGREE,
+            METRES_PER_DEGREE * math.cos(math.radians(REFERENCE_LATITUDE)),
+        ]
+    )
+    return points[:, ::-1] * scale[::-1]
+
+
+def _segment_distances(points: Any, start: int, end: int) -> Any:
+    """Distances, in the units of `points`, from the points strictly between
+    `start` and `end` to the segment joining them."""
+    np: Any = require_numpy()
+    a: Any = points[start]
+    ab: Any = points[end] - a
+    ap: Any = points[slice(start + 1, end)] - a
+    length: float = float(ab @ ab)
+    if length == 0:
+        return np.hypot(ap[:, 0], ap[:, 1])
+    t: Any = np.clip(ap @ ab / length, 0, 1)
+    return np.hypot(*(ap - t[:, None] * ab).T)
+
+
+def douglas_peucker(points: Any, tolerance: float) -> Any:
+    """Returns a boolean mask of the projected `points` kept by the
+    Douglas-Peucker algorithm: no removed point is further than `tolerance`
+    from the simplified path."""
+    np: Any = require_numpy()
+    count: int = len(points)
+    keep: Any = np.zeros(count, dtype=bool)
+    if count == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack: List[Tuple[int, int]] = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        distances: Any = _segment_distances(points, start, end)
+        farthest: int = int(distances.argmax())
+        if distances[farthest] > tolerance:
+            middle: int = start + 1 + farthest
+            keep[middle] = True
+            stack.append((start, middle))
+            stack.append((middle, end))
+    return keep
+
+
+def _triangle_areas(points: Any) -> Any:
+    """Areas of the triangles formed by every interior point and its
+    neighbours."""
+    np: Any = require_numpy()
+    a: Any = points[:-2]
+    b: Any = points[1:-1]
+    c: Any = points[2:]
+    return 0.5 * np.abs(
+        (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1])
+        - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+    )
+
+
+def visvalingam(points: Any, tolerance: float) -> Any:
+    """Returns a boolean mask of the projected `points` kept by the
+    Visvalingam-Whyatt algorithm, which removes points whose triangle with
+    their neighbours has the smallest area until every remaining triangle
+    is at least `tolerance` squared. For the same tolerance it keeps more
+    points than Douglas-Peucker on long, slightly wobbly stretches."""
+    np: Any = require_numpy()
+    count: int = len(points)
+    keep: Any = np.ones(count, dtype=bool)
+    if count < 3:
+        return keep
+    threshold: float = tolerance**2
+    areas: List[float] = [math.inf] + _triangle_areas(points).tolist() + [math.inf]
+    previous: List[int] = list(range(-1, count - 1))
+    following: List[int] = list(range(1, count + 1))
+    heap: List[Tuple[float, int]] = [
+        (area, i) for i, area in enumerate(areas) if area < threshold
+    ]
+    heapq.heapify(heap)
+    # Removals are sequential; plain floats are much faster to index here.
+    coords: List[List[float]] = points.tolist()
+
+    def area(i: int) -> float:
+        a, b, c = coords[previous[i]], coords[i], coords[following[i]]
+        return 0.5 * abs((b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1]))
+
+    removed_area: float = 0.0
+    while heap:
+        smallest, i = heapq.heappop(heap)
+        if not keep[i] or smallest != areas[i]:
+            continue  # Removed, or its area changed since it was pushed.
+        keep[i] = False
+        # A neighbour's area never drops below the one just removed, so
+        # the removal order stays monotonic.
+        removed_area = max(removed_area, smallest)
+        before: int = previous[i]
+        after: int = following[i]
+        following[before] = after
+        previous[after] = before
+        for neighbour in (before, after):
+            if 0 < neighbour < count - 1:
+                areas[neighbour] = max(area(neighbour), removed_area)
+                if areas[neighbour] < threshold:
+                    heapq.heappush(heap, (areas[neighbour], neighbour))
+    return keep
+
+
+METHODS: Dict[str, Callable[[Any, float], Any]] = {
+    DOUGLAS_PEUCKER: douglas_peucker,
+    VISVALINGAM: visvalingam,
+}
+
+
+def _method(method: str) -> Callable[[Any, float], Any]:
+    try:
+        return METHODS[method]
+    except KeyError:
+        raise ValueError(f"`method` can only be one of {', '.join(METHODS)}.")
+
+
+def simplify(
+    lat_longs: Any, tolerance: float = 5.0, method: str = DOUGLAS_PEUCKER
+) -> Any:
+    """Simplifies a path of lat/longs and returns the kept points as an
+    (m, 2) array. The first and last points are always kept."""
+    np: Any = require_numpy()
+    simplifier: Callable[[Any, float], Any] = _method(method)
+    points: Any = np.asarray(lat_longs, dtype=np.float64).reshape(-1, 2)
+    return points[simplifier(project(points), tolerance)]
+
+
+def simplify_many(
+    paths: Sequence[Any], tolerance: float = 5.0, method: str = DOUGLAS_PEUCKER
+) -> List[Any]:
+    """Simplifies many paths of lat/longs. All paths are projected in a
+    single pass before being simplified one by one."""
+    np: Any = require_numpy()
+    simplifier: Callable[[Any, float], Any] = _method(method)
+    arrays: List[Any] = [
+        np.asarray(path, dtype=np.float64).reshape(-1, 2) for path in paths
+    ]
+    if not arrays:
+        return []
+    bounds: Any = np.cumsum([len(points) for points in arrays])[:-1]
+    projected: List[Any] = np.split(project(np.concatenate(arrays)), bounds)
+    return [
+        points[simplifier(projection, tolerance)]
+        for points, projection in zip(arrays, projected)
+    ]
+
+
+def simplify_polyline(
+    geometry: str,
+    tolerance: float = 5.0,
+    method: str = DOUGLAS_PEUCKER,
+    precision: int = 5,
+) -> str:
+    """Decodes an encoded polyline, e.g. `RouteResult.route_geometry`,
+    simplifies it and encodes it again."""
+    return simplify_polylines([geometry], tolerance, method, precision)[0]
+
+
+def simplify_polylines(
+    geometries: Sequence[str],
+    tolerance: float = 5.0,
+    method: str = DOUGLAS_PEUCKER,
+    precision: int = 5,
+) -> List[str]:
+    """Simplifies many encoded polylines, e.g. to draw them at a zoom
+    level, and encodes them again."""
+    import polyline
+
+    paths: List[Any] = [polyline.decode(geometry, precision) for geometry in geometries]
+    return [
+        polyline.encode([tuple(point) for point in simplified.tolist()], precision)
+        for simplified in simplify_many(paths, tolerance, method)
+    ]
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.simulator
+~~~~~~~~~~~~~~~~~~
+
+This module contains a local OneMap simulator for load and resilience
+testing. It serves every endpoint in `onemapsg.api.endpoints` and injects
+scripted faults: server error rates and bursts, latency distributions,
+rate limiting, token expiry and paginated searches.
+
+Usage:
+    profile = FaultProfile(error_rate=0.05, rate_limit=100)
+    with Simulator(profile) as simulator:
+        API.set_base_url(simulator.base_url)
+        ...
+
+It can also be started from the command line with
+`python -m onemapsg.simulator`.
+"""
+
+import json
+import math
+import random
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .. import status
+from ..api import endpoints
+from ..ratelimit import RateLimiter
+from . import payloads
+from .payloads import stable_fraction
+
+LatencyDistribution = Callable[[random.Random], float]
+
+
+def constant_latency(seconds: float) -> LatencyDistribution:
+    return lambda rng: seconds
+
+
+def uniform_latency(low: float, high: float) -> LatencyDistribution:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, p99: float) -> LatencyDistribution:
+    """Long-tailed latency with the given median and 99th percentile."""
+    mu: float = math.log(median)
+    sigma: float = (math.log(p99) - mu) / 2.326
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+class FaultProfile:
+    """
+    Describes how the simulator misbehaves.
+
+    `error_rate` is the probability of a 5xx response. With probability
+    `burst_rate` a request starts a burst that fails the next
+    `burst_length` requests. `slow_rate` of requests take `slow_latency`
+    seconds on top of `latency`. Requests beyond `rate_limit` per second
+    (with bursts of `rate_limit_burst`) get a 429. Tokens expire after
+    `token_ttl` seconds. `found_rate` of distinct search values return
+    `search_results` results, split into pages of 10; the rest return none.
+    """
+
+    def __init__(
+        self,
+        error_rate: float = 0.0,
+        burst_rate: float = 0.0,
+        burst_length: int = 10,
+        latency: Optional[LatencyDistribution] = None,
+        slow_rate: float = 0.0,
+        slow_latency: float = 5.0,
+        rate_limit: Optional[float] = None,
+        rate_limit_burst: Optional[int] = None,
+        token_ttl: int = 3 * 24 * 60 * 60,
+        search_results: int = 25,
+        found_rate: float = 1.0,
+    ) -> None:
+        self.error_rate = error_rate
+        self.burst_rate = burst_rate
+        self.burst_length = burst_length
+        self.latency = latency if latency is not None else constant_latency(0.0)
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst
+        self.token_ttl = token_ttl
+        self.search_results = search_results
+        self.found_rate = found_rate
+
+
+class SimulatorStats:
+    """Requests received and responses sent, by endpoint and status."""
+
+    def __init__(self) -> None:
+        self.requests: Dict[str, int] = {}
+        self.responses: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, status_code: int) -> None:
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            key: Tuple[str, int] = (endpoint, status_code)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def count(self, endpoint: Optional[str] = None, status_code: int = 0) -> int:
+        return sum(
+            n
+            for (name, code), n in self.responses.items()
+            if (endpoint is None or name == endpoint)
+            and (not status_code or code == status_code)
+        )
+
+
+class _Server(ThreadingHTTPServer):
+
+    daemon_threads = True
+    # The default backlog of 5 makes concurrent clients stall on SYN retries.
+    request_queue_size = 1024
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients that time out close the connection before the response.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class Simulator:
+    """
+    Threaded HTTP server simulating OneMap. The fault profile can be
+    replaced while the simulator runs, e.g. to script an outage.
+    """
+
+    def __init__(
+        self,
+        profile: Optional[FaultProfile] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.stats = SimulatorStats()
+        self.tokens: Dict[str, float] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._burst_remaining: int = 0
+        self.set_profile(profile or FaultProfile())
+        self.routes: Dict[str, str] = {}
+        for name, path in endpoints.items():
+            self.routes.setdefault("/" + path, name)
+        self.server = _Server((host, port), self._handler())
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host!s}:{port}/"
+
+    def set_profile(self, profile: FaultProfile) -> None:
+        with self._lock:
+            self.profile = profile
+            self.rate_limiter: Optional[RateLimiter] = (
+                RateLimiter(profile.rate_limit, profile.rate_limit_burst)
+                if profile.rate_limit
+                else None
+            )
+            self._burst_remaining = 0
+
+    def issue_token(self) -> Tuple[str, int]:
+        token: str = secrets.token_hex(16)
+        with self._lock:
+            expiry: float = time.time() + self.profile.token_ttl
+            self.tokens[token] = expiry
+        return token, int(expiry)
+
+    def expire_tokens(self) -> None:
+        """Expires every token issued so far."""
+        with self._lock:
+            for token in self.tokens:
+                self.tokens[token] = 0
+
+    def _fault(self) -> Tuple[float, Optional[int]]:
+        """Returns the latency and, if the request should fail, the status."""
+        with self._lock:
+            profile: FaultProfile = self.profile
+            rng: random.Random = self._random
+            delay: float = profile.latency(rng)
+            if profile.slow_rate and rng.random() < profile.slow_rate:
+                delay += profile.slow_latency
+            if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+                return delay, status.HTTP_429_TOO_MANY_REQUESTS
+            if self._burst_remaining:
+                self._burst_remaining -= 1
+                return delay, status.HTTP_503_SERVICE_UNAVAILABLE
+            if profile.burst_rate and rng.random() < profile.burst_rate:
+                self._burst_remaining = profile.burst_length - 1
+                return delay, status.HTTP_503_SERVICE_UNAVAILABLE
+            if profile.error_rate and rng.random() < profile.error_rate:
+                return delay, rng.choice(
+                    [
+                        status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        status.HTTP_502_BAD_GATEWAY,
+                        status.HTTP_503_SERVICE_UNAVAILABLE,
+                    ]
+                )
+            return delay, None
+
+    def handle(self, method: str, path: str, body: Optional[dict]) -> Tuple[int, dict]:
+        """Returns the status code and payload for a request."""
+        parsed: Any = urlsplit(path)
+        name: Optional[str] = self.routes.get(parsed.path)
+        if name is None:
+            return status.HTTP_404_NOT_FOUND, {"error": "Not found."}
+        params: Dict[str, str] = {
+            k: v[0] for k, v in parse_qs(parsed.query, keep_blank_values=True).items()
+        }
+        delay, fault = self._fault()
+        if delay:
+            time.sleep(delay)
+        if fault is not None:
+            self.stats.record(name, fault)
+            return fault, {"error": "Simulated failure."}
+
+        status_code, payload = self._respond(name, method, params, body or {})
+        self.stats.record(name, status_code)
+        return status_code, payload
+
+    def _respond(
+        self, name: str, method: str, params: Dict[str, str], body: dict
+    ) -> Tuple[int, dict]:
+        if name == "auth":
+            if method != "POST" or not body.get("email") or not body.get("password"):
+                return status.HTTP_401_UNAUTHORIZED, {"error": "Invalid credentials."}
+            token, expiry = self.issue_token()
+            return status.HTTP_200_OK, payloads.auth_payload(token, expiry)
+
+        if name != "search":
+            with self._lock:
+                token_expiry: Optional[float] = self.tokens.get(params.get("token", ""))
+            if token_expiry is None or token_expiry < time.time():
+                return status.HTTP_401_UNAUTHORIZED, {"error": "Invalid token."}
+
+        try:
+            if name == "search":
+                search_val: str = params["searchVal"]
+                found: int = (
+                    self.profile.search_results
+                    if stable_fraction(search_val) < self.profile.found_rate
+                    else 0
+                )
+                return (
+                    status.HTTP_200_OK,
+                    payloads.search_payload(
+                        search_val, int(params.get("pageNum") or 1), found
+                    ),
+                )
+            if name == "route":
+                start: List[float] = [float(v) for v in params["start"].split(",")]
+                end: List[float] = [float(v) for v in params["end"].split(",")]
+                return (
+                    status.HTTP_200_OK,
+                    payloads.route_payload(
+                        (start[0], start[1]), (end[0], end[1]), params["routeType"]
+                    ),
+                )
+            a, b = [float(v) for v in params["location"].split(",")]
+            if a > 90:  # SVY21 x, y
+                a, b = payloads.svy21_to_wgs84(a, b)
+            return (
+                status.HTTP_200_OK,
+                payloads.reverse_geocode_payload(
+                    a,
+                    b,
+                    float(params.get("buffer") or 10),
+                    params.get("addressType", "all").lower(),
+                ),
+            )
+        except (KeyError, ValueError) as err:
+            return status.HTTP_400_BAD_REQUEST, {"error": f"Invalid request: {err}"}
+
+    def _handler(self) -> type:
+        simulator: Simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, method: str) -> None:
+                body: Optional[dict] = None
+                length: int = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    try:
+                        body = json.loads(self.rfile.read(length))
+                    except ValueError:
+                        body = None
+                status_code, payload = simulator.handle(method, self.path, body)
+                data: bytes = json.dumps(payload).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                self._serve("GET")
+
+            def do_POST(self) -> None:
+                self._serve("POST")
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> "Simulator":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve_forever(self) -> None:
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def __enter__(self) -> "Simulator":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+__all__ = [
+    "FaultProfile",
+    "Simulator",
+    "SimulatorStats",
+    "constant_latency",
+    "lognormal_latency",
+    "uniform_latency",
+]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""
+Runs the OneMap simulator from the command line.
+
+Usage:
+    python -m onemapsg.simulator --port 8080 --error-rate 0.05 \
+        --rate-limit 250 --latency-median 0.05 --latency-p99 0.5
+"""
+
+import argparse
+from typing import List, Optional
+
+from . import FaultProfile, Simulator, constant_latency, lognormal_latency
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local OneMap simulator.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-rate", type=float, default=0.0)
+    parser.add_argument("--burst-length", type=int, default=10)
+    parser.add_argument("--latency-median", type=float, default=0.0)
+    parser.add_argument("--latency-p99", type=float, default=None)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--rate-limit-burst", type=int, default=None)
+    parser.add_argument("--token-ttl", type=int, default=3 * 24 * 60 * 60)
+    parser.add_argument("--search-results", type=int, default=25)
+    parser.add_argument("--found-rate", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    if args.latency_median and args.latency_p99:
+        latency = lognormal_latency(args.latency_median, args.latency_p99)
+    else:
+        latency = constant_latency(args.latency_median)
+    profile = FaultProfile(
+        error_rate=args.error_rate,
+        burst_rate=args.burst_rate,
+        burst_length=args.burst_length,
+        latency=latency,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        rate_limit=args.rate_limit,
+        rate_limit_burst=args.rate_limit_burst,
+        token_ttl=args.token_ttl,
+        search_results=args.search_results,
+        found_rate=args.found_rate,
+    )
+    simulator = Simulator(profile, host=args.host, port=args.port, seed=args.seed)
+    print(f"OneMap simulator listening on {simulator.base_url}")
+    try:
+        simulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.simulator.payloads
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module generates deterministic, realistically shaped OneMap payloads.
+
+Buildings sit on a fixed lattice, so reverse geocoding neighbouring points
+returns overlapping results, like the real service does.
+"""
+
+import hashlib
+import math
+from typing import List, Sequence, Tuple
+
+import polyline
+
+from ..geo import METRES_PER_DEGREE, haversine
+
+PAGE_SIZE: int = 10
+
+# Spacing of the building lattice, in degrees (about 44m) and SVY21 metres.
+LATTICE_DEGREES: float = 0.0004
+LATTICE_METRES: float = 44.0
+
+# Rough conversion between SVY21 and WGS84 around Singapore.
+SVY21_ORIGIN: Tuple[float, float, float, float] = (
+    28001.642,
+    38744.572,
+    1.366666,
+    103.833333,
+)
+
+ROUTE_SPEEDS: dict = dict(walk=1.3, cycle=4.5, drive=11.0, pt=7.0)
+
+
+def stable_fraction(value: str) -> float:
+    """Maps a string to a stable number in [0, 1)."""
+    digest: bytes = hashlib.md5(value.encode()).digest()
+    return int.from_bytes(digest[:4], "big") / 2**32
+
+
+def svy21_to_wgs84(x: float, y: float) -> Tuple[float, float]:
+    x0, y0, lat0, long0 = SVY21_ORIGIN
+    return (
+        lat0 + (y - y0) / METRES_PER_DEGREE,
+        long0 + (x - x0) / (METRES_PER_DEGREE * math.cos(math.radians(lat0))),
+    )
+
+
+def wgs84_to_svy21(lat: float, long: float) -> Tuple[float, float]:
+    x0, y0, lat0, long0 = SVY21_ORIGIN
+    return (
+        x0 + (long - long0) * METRES_PER_DEGREE * math.cos(math.radians(lat0)),
+        y0 + (lat - lat0) * METRES_PER_DEGREE,
+    )
+
+
+def search_payload(search_val: str, page_num: int = 1, found: int = 25) -> dict:
+    """A page of `found` results for `search_val`."""
+    total_pages: int = math.ceil(found / PAGE_SIZE)
+    start: int = (page_num - 1) * PAGE_SIZE
+    seed: float = stable_fraction(search_val)
+    results: List[dict] = []
+    for i in range(start, min(start + PAGE_SIZE, found)):
+        lat: float = 1.25 + 0.2 * ((seed + i * 0.0137) % 1)
+        long: float = 103.65 + 0.35 * ((seed * 7 + i * 0.0271) % 1)
+        x, y = wgs84_to_svy21(lat, long)
+        postal: str = f"{int((seed * 1e6 + i * 7919) % 1e6):06d}"
+        name: str = f"{search_val.upper()} {i + 1}" if i else search_val.upper()
+        results.append(
+            {
+                "SEARCHVAL": name,
+                "BLK_NO": str(i + 1),
+                "ROAD_NAME": "RAFFLES QUAY",
+                "BUILDING": name,
+                "ADDRESS": f"{i + 1} RAFFLES QUAY {name} SINGAPORE {postal}",
+                "POSTAL": postal,
+                "X": f"{x:.10f}",
+                "Y": f"{y:.10f}",
+                "LATITUDE": f"{lat:.14f}",
+                "LONGITUDE": f"{long:.12f}",
+                "LONGTITUDE": f"{long:.12f}",
+            }
+        )
+    return {
+        "found": found,
+        "totalNumPages": total_pages,
+        "pageNum": page_num,
+        "results": results,
+    }
+
+
+def interpolate(
+    start: Tuple[float, float], end: Tuple[float, float], step_metres: float = 10
+) -> List[Tuple[float, float]]:
+    """Points from `start` to `end`, wiggling slightly like a street path."""
+    distance: float = haversine(start[0], start[1], end[0], end[1])
+    count: int = max(2, int(distance / step_metres))
+    path: List[Tuple[float, float]] = []
+    for i in range(count):
+        t: float = i / (count - 1)
+        wiggle: float = 0.00005 * math.sin(i / 3)
+        path.append(
+            (
+                round(start[0] + (end[0] - start[0]) * t + wiggle, 5),
+                round(start[1] + (end[1] - start[1]) * t - wiggle, 5),
+            )
+        )
+    return path
+
+
+def route_instructions(path: Sequence[Tuple[float, float]], mode: str) -> List[list]:
+    steps: List[list] = []
+    stride: int = max(1, len(path) // 20)
+    for n, i in enumerate(range(0, len(path), stride)):
+        lat, long = path[i]
+        distance: int = int(stride * 10)
+        steps.append(
+            [
+                "Head" if n == 0 else ("Right" if n % 2 else "Left"),
+                f"ROAD {n}",
+                distance,
+                f"{lat},{long}",
+                int(distance / ROUTE_SPEEDS.get(mode, 11.0)),
+                f"{distance}m",
+                "North East" if n % 2 else "South West",
+                "North" if n % 2 else "South",
+                mode,
+                f"Turn Right Onto Road {n}",
+            ]
+        )
+    return steps
+
+
+def transit_plan(
+    start: Tuple[float, float], end: Tuple[float, float], itineraries: int = 3
+) -> dict:
+    """A public transport plan of walk, bus/subway and walk legs."""
+    distance: float = haversine(start[0], start[1], end[0], end[1])
+    plans: List[dict] = []
+    for n in range(itineraries):
+        first_stop: Tuple[float, float] = (start[0] + 0.002, start[1] + 0.001 * n)
+        last_stop: Tuple[float, float] = (end[0] - 0.002, end[1] - 0.001 * n)
+        transfer_stop: Tuple[float, float] = (
+            (first_stop[0] + last_stop[0]) / 2,
+            (first_stop[1] + last_stop[1]) / 2,
+        )
+        segments: List[Tuple[str, Tuple[float, float], Tuple[float, float]]] = [
+            ("WALK", start, first_stop)
+        ]
+        if n:
+            segments += [
+                ("BUS", first_stop, transfer_stop),
+                ("SUBWAY", transfer_stop, last_stop),
+            ]
+        else:
+            segments.append(("BUS", first_stop, last_stop))
+        segments.append(("WALK", last_stop, end))
+        legs: List[dict] = []
+        elapsed: int = 0
+        for mode, leg_start, leg_end in segments:
+            points = interpolate(leg_start, leg_end, step_metres=25)
+            leg_distance: float = haversine(
+                leg_start[0], leg_start[1], leg_end[0], leg_end[1]
+            )
+            speed: float = 1.3 if mode == "WALK" else 8.0 + 4 * (mode == "SUBWAY")
+            duration: int = int(leg_distance / speed) + 60 * (mode != "WALK")
+            legs.append(
+                {
+                    "mode": mode,
+                    "transitLeg": mode != "WALK",
+                    "distance": leg_distance,
+                    "duration": duration,
+                    "startTime": 1546300800000 + elapsed * 1000,
+                    "endTime": 1546300800000 + (elapsed + duration) * 1000,
+                    "route": "" if mode == "WALK" else f"{10 + n}",
+                    "from": {"lat": leg_start[0], "lon": leg_start[1]},
+                    "to": {"lat": leg_end[0], "lon": leg_end[1]},
+                    "legGeometry": {
+                        "points": polyline.encode(points),
+                        "length": len(points),
+                    },
+                }
+            )
+            elapsed += duration
+        walk_distance: float = sum(
+            leg["distance"] for leg in legs if leg["mode"] == "WALK"
+        )
+        plans.append(
+            {
+                "duration": elapsed,
+                "startTime": 1546300800000,
+                "endTime": 1546300800000 + elapsed * 1000,
+                "walkTime": int(walk_distance / 1.3),
+                "transitTime": elapsed - int(walk_distance / 1.3),
+                "waitingTime": 60 * n,
+                "walkDistance": walk_distance,
+                "transfers": len(legs) - 3,
+                "fare": f"{0.92 + distance / 10000 + 0.1 * n:.2f}",
+                "legs": legs,
+            }
+        )
+    return {
+        "date": 1546300800000,
+        "from": {"lat": start[0], "lon": start[1], "name": "Origin"},
+        "to": {"lat": end[0], "lon": end[1], "name": "Destination"},
+        "itineraries": plans,
+    }
+
+
+def route_payload(
+    start: Tuple[float, float], end: Tuple[float, float], route_type: str
+) -> dict:
+    distance: float = haversine(start[0], start[1], end[0], end[1])
+    if route_type == "pt":
+        return {
+            "requestParameters": {"routeType": "pt"},
+            "plan": transit_plan(start, end),
+            "debugOutput": {"totalTime": 25},
+            "elevationMetadata": {"ellipsoidToGeoidDifference": 7.0},
+        }
+    path: List[Tuple[float, float]] = interpolate(start, end)
+    return {
+        "status_message": "Found route between points",
+        "route_geometry": polyline.encode(path),
+        "route_instructions": route_instructions(path, route_type),
+        "route_name": ["ROAD 0", f"ROAD {len(path) // 20}"],
+        "route_summary": {
+            "start_point": "ROAD 0",
+            "end_point": f"ROAD {len(path) // 20}",
+            "total_time": int(distance / ROUTE_SPEEDS.get(route_type, 11.0)),
+            "total_distance": int(distance),
+        },
+        "viaRoute": "ROAD 1",
+        "subtitle": "Fastest route",
+        "status": 0,
+        "via_points": [list(path[0]), list(path[-1])],
+        "via_indices": [0, len(path) - 1],
+        "found_alternative": False,
+        "hint_data": {"locations": ["abc", "def"], "checksum": 585417468},
+    }
+
+
+def lattice_buildings(
+    lat: float, long: float, buffer: float
+) -> List[Tuple[int, int, float, float]]:
+    """Lattice buildings within `buffer` metres of a WGS84 point, as
+    (row, column, lat, long)."""
+    reach: int = int(buffer / LATTICE_METRES) + 1
+    row0: int = round(lat / LATTICE_DEGREES)
+    col0: int = round(long / LATTICE_DEGREES)
+    buildings: List[Tuple[int, int, float, float]] = []
+    for row in range(row0 - reach, row0 + reach + 1):
+        for col in range(col0 - reach, col0 + reach + 1):
+            b_lat: float = row * LATTICE_DEGREES
+            b_long: float = col * LATTICE_DEGREES
+            if haversine(lat, long, b_lat, b_long) <= buffer:
+                buildings.append((row, col, b_lat, b_long))
+    return buildings
+
+
+def reverse_geocode_payload(
+    lat: float, long: float, buffer: float = 10, address_type: str = "all"
+) -> dict:
+    items: List[dict] = []
+    for row, col, b_lat, b_long in lattice_buildings(lat, long, buffer):
+        if address_type == "hdb" and (row + col) % 2:
+            continue
+        x, y = wgs84_to_svy21(b_lat, b_long)
+        items.append(
+            {
+                "BUILDINGNAME": f"BLOCK {row % 1000}-{col % 1000}",
+                "BLOCK": str((row * 31 + col) % 999 + 1),
+                "ROAD": f"ROAD {col % 500}",
+                "POSTALCODE": f"{(row * 7919 + col * 104729) % 1000000:06d}",
+                "XCOORD": f"{x:.6f}",
+                "YCOORD": f"{y:.6f}",
+                "LATITUDE": f"{b_lat:.16f}",
+                "LONGITUDE": f"{b_long:.14f}",
+                "LONGTITUDE": f"{b_long:.14f}",
+            }
+        )
+    return {"GeocodeInfo": items}
+
+
+def auth_payload(token: str, expiry_timestamp: int) -> dict:
+    return {"access_token": token, "expiry_timestamp": str(expiry_timestamp)}
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.snapshot
+~~~~~~~~~~~~~~~~~
+
+This module contains a read-only, columnar snapshot format for search and
+reverse geocode results, meant to be memory-mapped so that every process
+on a node shares one copy of a prebuilt dataset through the page cache.
+
+Layout (little-endian, sections aligned to 8 bytes):
+    header       magic, version, kind, column count, key count, row count
+    directory    offset of every section below
+    key_offsets  uint64 x (keys + 1), into the key blob
+    key_blob     UTF-8 keys, sorted by their bytes
+    row_starts   uint64 x (keys + 1); key i owns rows [row_starts[i],
+                 row_starts[i + 1])
+    pages        uint64 x keys x 3: found, total pages and page number of
+                 each search result, MISSING when absent
+    per column   uint64 x (rows + 1) value offsets, uint8 x rows presence
+                 flags, and the UTF-8 value blob
+
+Lookups binary search the keys in O(log n). Result items are built only
+when they are accessed, straight from the mapped file.
+
+Usage:
+    write_snapshot("search.omss", {"048583": onemap.search("048583"), ...})
+    with Snapshot.open("search.omss") as snapshot:
+        result = snapshot.get("048583")
+"""
+
+import mmap
+import struct
+from array import array
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .response import GeocodeInfo, GeocodeInfoItem, SearchResult, SearchResultItem
+
+MAGIC: bytes = b"OMSS"
+VERSION: int = 1
+# Magic, version, kind, column count, key count and row count.
+HEADER: struct.Struct = struct.Struct("<4sIIIQQ")
+
+# Stands for page metadata that a result does not have.
+MISSING: int = 2**64 - 1
+PAGE_FIELDS: Tuple[str, ...] = ("found", "total_num_pages", "page_num")
+
+SEARCH: int = 0
+REVERSE_GEOCODE: int = 1
+
+# Item attributes stored as columns. Coordinates and lat/long pairs are
+# split into two columns each.
+COLUMNS: Dict[int, List[str]] = {
+    SEARCH: [
+        "search_value",
+        "blk_no",
+        "road_name",
+        "building",
+        "address",
+        "postal",
+        "x",
+        "y",
+        "latitude",
+        "longitude",
+    ],
+    REVERSE_GEOCODE: [
+        "building_name",
+        "block",
+        "road",
+        "postal_code",
+        "x",
+        "y",
+        "latitude",
+        "longitude",
+    ],
+}
+PAIRS: Dict[str, Tuple[str, str]] = {
+    "coordinates": ("x", "y"),
+    "lat_long": ("latitude", "longitude"),
+}
+
+Result = Union[SearchResult, GeocodeInfo]
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _item_values(item: Any, columns: List[str]) -> Dict[str, Optional[str]]:
+    values: Dict[str, Optional[str]] = {}
+    for name in columns:
+        values[name] = getattr(item, name, None)
+    for pair, (first, second) in PAIRS.items():
+        value: Optional[Sequence[Any]] = getattr(item, pair, None)
+        values[first], values[second] = value if value is not None else (None, None)
+    return {
+        name: None if value is None else str(value) for name, value in values.items()
+    }
+
+
+def write_snapshot(
+    path: str, results: Union[Mapping[str, Result], Iterable[Tuple[str, Result]]]
+) -> int:
+    """
+    Writes `results`, search or reverse geocode results keyed by a string
+    such as the search value or a `lat,long`, to a snapshot file. All
+    results must be of the same type. Returns the number of keys written.
+    """
+    pairs: Iterable[Tuple[str, Result]] = (
+        results.items() if isinstance(results, Mapping) else results
+    )
+    by_key: Dict[bytes, Result] = {key.encode(): result for key, result in pairs}
+    keys: List[bytes] = sorted(by_key)
+    kinds: set = {
+        SEARCH if isinstance(result, SearchResult) else REVERSE_GEOCODE
+        for result in by_key.values()
+    }
+    if len(kinds) > 1:
+        raise ValueError("Search and reverse geocode results cannot be mixed.")
+    kind: int = kinds.pop() if kinds else SEARCH
+    columns: List[str] = COLUMNS[kind]
+
+    key_offsets: array = array("Q", [0])
+    row_starts: array = array("Q", [0])
+    pages: array = array("Q")
+    value_offsets: Dict[str, array] = {name: array("Q", [0]) for name in columns}
+    presence: Dict[str, bytearray] = {name: bytearray() for name in columns}
+    blobs: Dict[str, bytearray] = {name: bytearray() for name in columns}
+    key_blob: bytearray = bytearray()
+    rows: int = 0
+    for key in keys:
+        key_blob += key
+        key_offsets.append(len(key_blob))
+        for field in PAGE_FIELDS:
+            page_value: Any = getattr(by_key[key], field, None)
+            pages.append(MISSING if page_value is None else int(page_value))
+        for item in by_key[key].results or []:
+            values: Dict[str, Optional[str]] = _item_values(item, columns)
+            for name in columns:
+                value: Optional[str] = values[name]
+                if value is not None:
+                    blobs[name] += value.encode()
+                value_offsets[name].append(len(blobs[name]))
+                presence[name].append(value is not None)
+            rows += 1
+        row_starts.append(rows)
+
+    sections: List[bytes] = [key_offsets.tobytes(), bytes(key_blob)]
+    sections += [row_starts.tobytes(), pages.tobytes()]
+    for name in columns:
+        sections += [
+            value_offsets[name].tobytes(),
+            bytes(presence[name]),
+            bytes(blobs[name]),
+        ]
+    directory_size: int = 8 * len(sections)
+    offset: int = HEADER.size + directory_size
+    directory: array = array("Q")
+    for section in sections:
+        directory.append(offset)
+        offset = _align(offset + len(section))
+    directory.append(offset)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, kind, len(columns), len(keys), rows))
+        f.write(directory[:-1].tobytes())
+        for section in sections:
+            f.write(section)
+            f.write(b"\0" * (_align(len(section)) - len(section)))
+    return len(keys)
+
+
+class _Column:
+    """One string column of the mapped file."""
+
+    __slots__ = ("offsets", "presence", "blob")
+
+    def __init__(self, offsets: memoryview, presence: memoryview, blob: memoryview):
+        self.offsets = offsets
+        self.presence = presence
+        self.blob = blob
+
+    def get(self, row: int) -> Optional[str]:
+        if not self.presence[row]:
+            return None
+        start: int = self.offsets[row]
+        stop: int = self.offsets[row + 1]
+        return str(self.blob[start:stop], "utf-8")
+
+
+class LazyItems(Sequence):
+    """Items of one key. Each item is built from the mapped file when it is
+    accessed and is not kept."""
+
+    __slots__ = ("_snapshot", "_start", "_stop")
+
+    def __init__(self, snapshot: "Snapshot", start: int, stop: int) -> None:
+        self._snapshot = snapshot
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("item index out of range")
+        return self._snapshot.build_item(self._start + index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in range(self._start, self._stop):
+            yield self._snapshot.build_item(row)
+
+
+class Snapshot:
+    """A memory-mapped snapshot file. Safe to share between threads."""
+
+    def __init__(self, buffer: Any) -> None:
+        self._buffer = buffer
+        view: memoryview = memoryview(buffer)
+        magic, version, kind, column_count, keys, rows = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("Not a snapshot file.")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}.")
+        self.kind: int = kind
+        self.columns: List[str] = COLUMNS[kind]
+        if column_count != len(self.columns):
+            raise ValueError("Snapshot columns do not match.")
+        self.keys: int = keys
+        self.rows: int = rows
+        section_count: int = 4 + 3 * column_count
+        begin: int = HEADER.size
+        end: int = begin + 8 * section_count
+        starts: List[int] = list(view[begin:end].cast("Q"))
+        if len(view) < max(starts):
+            raise ValueError("Truncated snapshot file.")
+
+        def section(index: int, size: int) -> memoryview:
+            start: int = starts[index]
+            stop: int = start + size
+            return view[start:stop]
+
+        def integers(index: int, count: int) -> memoryview:
+            return section(index, 8 * count).cast("Q")
+
+        self._key_offsets: memoryview = integers(0, keys + 1)
+        self._key_blob: memoryview = section(1, self._key_offsets[keys])
+        self._row_starts: memoryview = integers(2, keys + 1)
+        self._pages: memoryview = integers(3, len(PAGE_FIELDS) * keys)
+        self._columns: Dict[str, _Column] = {}
+        for i, name in enumerate(self.columns):
+            offsets: memoryview = integers(4 + 3 * i, rows + 1)
+            self._columns[name] = _Column(
+                offsets, section(5 + 3 * i, rows), section(6 + 3 * i, offsets[rows])
+            )
+        self._item_class: Callable[[], Any] = (
+            SearchResultItem if kind == SEARCH else GeocodeInfoItem
+        )
+
+    @classmethod
+    def open(cls, path: str) -> "Snapshot":
+        """Maps the snapshot file read-only."""
+        with open(path, "rb") as f:
+            buffer: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def close(self) -> None:
+        # Views must be released before the map can be closed.
+        for column in self._columns.values():
+            for view in (column.offsets, column.presence, column.blob):
+                view.release()
+        for view in (
+            self._key_offsets,
+            self._key_blob,
+            self._row_starts,
+            self._pages,
+        ):
+            view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.keys
+
+    def _key(self, index: int) -> bytes:
+        start: int = self._key_offsets[index]
+        stop: int = self._key_offsets[index + 1]
+        return bytes(self._key_blob[start:stop])
+
+    def _find(self, key: str) -> int:
+        target: bytes = key.encode()
+        low: int = 0
+        high: int = self.keys
+        while low < high:
+            middle: int = (low + high) // 2
+            if self._key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.keys and self._key(low) == target:
+            return low
+        return -1
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) >= 0
+
+    def build_item(self, row: int) -> Any:
+        """Builds the item of a row from the mapped columns."""
+        item: Any = self._item_class.__new__(self._item_class)  # type: ignore
+        # Geocode items always have every attribute, even when empty.
+        full: bool = self.kind == REVERSE_GEOCODE
+        values: Dict[str, Optional[str]] = {
+            name: column.get(row) for name, column in self._columns.items()
+        }
+        for pair, (first, second) in PAIRS.items():
+            first_value: Optional[str] = values.pop(first)
+            second_value: Optional[str] = values.pop(second)
+            if full or first_value is not None or second_value is not None:
+                setattr(item, pair, (first_value, second_value))
+        for name, value in values.items():
+            if full or value is not None:
+                setattr(item, name, value)
+        return item
+
+    def items(self, key: str) -> Optional[LazyItems]:
+        """Returns the lazily built items of `key`, or None if it is not in
+        the snapshot."""
+        index: int = self._find(key)
+        if index < 0:
+            return None
+        return LazyItems(self, self._row_starts[index], self._row_starts[index + 1])
+
+    def get(self, key: str) -> Optional[Result]:
+        """Returns the result stored for `key`, with lazily built items, or
+        None if it is not in the snapshot."""
+        index: int = self._find(key)
+        if index < 0:
+            return None
+        items: LazyItems = LazyItems(
+            self, self._row_starts[index], self._row_starts[index + 1]
+        )
+        result: Any
+        if self.kind == SEARCH:
+            result = SearchResult.__new__(SearchResult)
+            first: int = len(PAGE_FIELDS) * index
+            for offset, field in enumerate(PAGE_FIELDS):
+                value: int = self._pages[first + offset]
+                setattr(result, field, None if value == MISSING else value)
+        else:
+            result = GeocodeInfo.__new__(GeocodeInfo)
+        result.results = items
+        return result
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.stream
+~~~~~~~~~~~~~~~
+
+This module contains streaming geocodes over iterables of any length, e.g.
+Kafka consumers or database cursors. Inputs are pulled one at a time and
+searched concurrently, with at most `window` searches in flight, and
+results are yielded as they complete with the input's key. Nothing more
+is pulled while the consumer is busy with a result, so memory stays
+bounded when the consumer is slower than the network.
+
+Inputs are search values, which are their own keys, or (key, search value)
+pairs.
+
+Usage:
+    for geocoded in geocode_stream(onemap, ((row.id, row.address) for row in cursor)):
+        save(geocoded.key, geocoded.result)
+
+    async for geocoded in geocode_stream_async(onemap, consumer, window=32):
+        ...
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from ._fanout import fan_out
+from .deadline import Deadline, current_deadline, use
+from .response import SearchResult
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .client import OneMap
+
+Input = Union[str, Tuple[Any, str]]
+
+# Marks the end of the inputs, which may contain None keys.
+_END: Any = object()
+
+
+class Geocoded:
+    """The search result for one input, or the exception it raised."""
+
+    __slots__ = ("key", "search_value", "result", "error")
+
+    def __init__(
+        self,
+        key: Any,
+        search_value: str,
+        result: Optional[SearchResult] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        self.key = key
+        self.search_value = search_value
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _split(item: Input) -> Tuple[Any, str]:
+    if isinstance(item, str):
+        return item, item
+    key, search_value = item
+    return key, search_value
+
+
+def _searcher(
+    client: "OneMap",
+    return_geometry: bool,
+    get_address_details: bool,
+    timeout: int,
+) -> Callable[[str], Optional[SearchResult]]:
+    """Returns a function searching on a worker thread under the caller's
+    deadline."""
+    active: Optional[Deadline] = current_deadline()
+
+    def search(search_value: str) -> Optional[SearchResult]:
+        with use(active):
+            return client.search(
+                search_value,
+                return_geometry=return_geometry,
+                get_address_details=get_address_details,
+                timeout=timeout,
+            )
+
+    return search
+
+
+def _geocoded(
+    future: Any, key: Any, search_value: str, raise_on_error: bool
+) -> Geocoded:
+    try:
+        return Geocoded(key, search_value, result=future.result())
+    except Exception as err:
+        if raise_on_error:
+            raise
+        return Geocoded(key, search_value, error=err)
+
+
+def geocode_stream(
+    client: "OneMap",
+    inputs: Iterable[Input],
+    window: int = 16,
+    max_workers: int = 8,
+    return_geometry: bool = True,
+    get_address_details: bool = True,
+    timeout: int = 15,
+    raise_on_error: bool = False,
+) -> Iterator[Geocoded]:
+    """
+    Searches every input and yields a Geocoded for each, in the order they
+    complete.
+
+    Searches run on `max_workers` threads through `client.search`, as
+    described in `onemapsg._fanout`. At most `window` inputs are pulled
+    ahead of the results the consumer has taken. Failed searches are
+    yielded with their exception unless `raise_on_error` is True.
+    """
+    search: Callable[[str], Optional[SearchResult]] = _searcher(
+        client, return_geometry, get_address_details, timeout
+    )
+    with closing(
+        fan_out(
+            lambda split: search(split[1]),
+            (_split(item) for item in inputs),
+            max_workers=max_workers,
+            window=window,
+            raise_on_error=raise_on_error,
+            thread_name_prefix="onemap-stream",
+        )
+    ) as searched:
+        for (key, search_value), result, error in searched:
+            yield Geocoded(key, search_value, result=result, error=error)
+
+
+async def geocode_stream_async(
+    client: "OneMap",
+    inputs: Union[Iterable[Input], AsyncIterable[Input]],
+    window: int = 16,
+    max_workers: int = 8,
+    return_geometry: bool = True,
+    get_address_details: bool = True,
+    timeout: int = 15,
+    raise_on_error: bool = False,
+) -> AsyncIterator[Geocoded]:
+    """
+    The asyncio variant of `geocode_stream`, for async or plain iterables.
+    Searches run on a thread pool, so the event loop is never blocked by
+    them; plain iterables are read on the event loop, so sources that
+    block should be wrapped in an async iterable.
+    """
+    if window < 1:
+        raise ValueError("`window` must be at least 1.")
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    search: Callable[[str], Optional[SearchResult]] = _searcher(
+        client, return_geometry, get_address_details, timeout
+    )
+    source: Any = inputs
+    asynchronous: bool = hasattr(source, "__aiter__")
+    remaining: Any = source.__aiter__() if asynchronous else iter(source)
+    exhausted: bool = False
+    # The read of the next async input, awaited together with the searches
+    # so that results are yielded while the source is idle.
+    reading: Optional["asyncio.Future[Any]"] = None
+    pending: Dict[Any, Tuple[Any, str]] = {}
+    executor: ThreadPoolExecutor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="onemap-stream"
+    )
+
+    def submit(item: Input) -> None:
+        key, search_value = _split(item)
+        future: Any = loop.run_in_executor(executor, search, search_value)
+        pending[future] = key, search_value
+
+    try:
+        while True:
+            while not exhausted and reading is None and len(pending) < window:
+                if asynchronous:
+                    reading = asyncio.ensure_future(remaining.__anext__())
+                    break
+                item: Any = next(remaining, _END)
+                if item is _END:
+                    exhausted = True
+                    break
+                submit(item)
+            if not pending and reading is None:
+                return
+            waiting: Set[Any] = set(pending)
+            if reading is not None:
+                waiting.add(reading)
+            done: Any = (
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            )[0]
+            if reading is not None and reading in done:
+                try:
+                    submit(reading.result())
+                except StopAsyncIteration:
+                    exhausted = True
+                reading = None
+            for future in done:
+                if future in pending:
+                    key, search_value = pending.pop(future)
+                    yield _geocoded(future, key, search_value, raise_on_error)
+    finally:
+        if reading is not None:
+            reading.cancel()
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
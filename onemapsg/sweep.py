@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.sweep
+~~~~~~~~~~~~~~
+
+This module contains area sweeps: reverse geocoding every address in a
+bounding box or polygon. Sample points are placed on a hexagonal lattice,
+the thinnest covering of the plane by circles, so that the `buffer` circles
+cover the area with about 21% overlap instead of the 57% of a square grid.
+Calls run concurrently and their results are merged, without duplicates.
+
+Usage:
+    result = sweep(onemap, (1.27, 103.84, 1.29, 103.86), buffer=200)
+    result = sweep(onemap, [(1.28, 103.84), (1.29, 103.86), (1.27, 103.86)])
+"""
+
+import math
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from ._fanout import fan_out
+from .geo import METRES_PER_DEGREE, REFERENCE_LATITUDE, LatLong
+from .geocache import MAX_BUFFER
+from .response import GeocodeInfoItem
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .client import OneMap
+
+# (min lat, min long, max lat, max long), as returned by `geohash_bounds`.
+Bounds = Tuple[float, float, float, float]
+Area = Union[Bounds, Sequence[LatLong]]
+
+LONG_METRES: float = METRES_PER_DEGREE * math.cos(math.radians(REFERENCE_LATITUDE))
+
+
+def _polygon(area: Area) -> List[LatLong]:
+    """Returns the vertices of `area`, turning bounds into a rectangle."""
+    values: Any = area
+    if len(values) == 4 and all(isinstance(v, (int, float)) for v in values):
+        min_lat, min_long, max_lat, max_long = values
+        if min_lat > max_lat or min_long > max_long:
+            raise ValueError("Bounds must be (min lat, min long, max lat, max long).")
+        return [
+            (min_lat, min_long),
+            (min_lat, max_long),
+            (max_lat, max_long),
+            (max_lat, min_long),
+        ]
+    polygon: List[LatLong] = [(float(lat), float(long)) for lat, long in values]
+    if len(polygon) < 3:
+        raise ValueError("A polygon needs at least 3 points.")
+    return polygon
+
+
+def _contains(polygon: List[LatLong], lat: float, long: float) -> bool:
+    """Ray casting point-in-polygon test."""
+    inside: bool = False
+    j: int = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, long_i = polygon[i]
+        lat_j, long_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing: float = long_i + (lat - lat_i) / (lat_j - lat_i) * (
+                long_j - long_i
+            )
+            if long < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+def _edge_distance(polygon: List[LatLong], lat: float, long: float) -> float:
+    """Distance in metres from a point to the nearest edge of `polygon`."""
+    nearest: float = math.inf
+    px: float = long * LONG_METRES
+    py: float = lat * METRES_PER_DEGREE
+    for (lat_a, long_a), (lat_b, long_b) in zip(polygon, polygon[1:] + polygon[:1]):
+        ax: float = long_a * LONG_METRES
+        ay: float = lat_a * METRES_PER_DEGREE
+        dx: float = long_b * LONG_METRES - ax
+        dy: float = lat_b * METRES_PER_DEGREE - ay
+        length: float = dx * dx + dy * dy
+        t: float = 0.0
+        if length:
+            t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length))
+        nearest = min(nearest, math.hypot(px - ax - t * dx, py - ay - t * dy))
+    return nearest
+
+
+def sweep_points(area: Area, buffer: float) -> List[LatLong]:
+    """
+    Returns sample points whose `buffer` circles cover `area`, a bounding
+    box or a polygon of lat/longs. Points lie on a hexagonal lattice of
+    circles of radius `buffer` metres; only those whose circle reaches the
+    area are returned.
+    """
+    if buffer <= 0:
+        raise ValueError("`buffer` must be greater than 0.")
+    polygon: List[LatLong] = _polygon(area)
+    min_lat: float = min(lat for lat, _ in polygon)
+    max_lat: float = max(lat for lat, _ in polygon)
+    min_long: float = min(long for _, long in polygon)
+    max_long: float = max(long for _, long in polygon)
+    # Circles of radius r cover the plane when centres are sqrt(3) r apart
+    # along rows and rows are 1.5 r apart, every other row shifted by half.
+    step_long: float = math.sqrt(3) * buffer / LONG_METRES
+    step_lat: float = 1.5 * buffer / METRES_PER_DEGREE
+    points: List[LatLong] = []
+    row: int = 0
+    lat: float = min_lat
+    while lat - step_lat < max_lat:
+        long: float = min_long - (step_long / 2 if row % 2 else 0.0)
+        while long - step_long < max_long:
+            if _contains(polygon, lat, long) or (
+                _edge_distance(polygon, lat, long) <= buffer
+            ):
+                points.append((round(lat, 7), round(long, 7)))
+            long += step_long
+        row += 1
+        lat = min_lat + row * step_lat
+    return points
+
+
+class SweepResult:
+    """
+    Addresses found by a sweep, without duplicates, and the sample points
+    used. Points whose call failed are kept in `errors` with their
+    exception.
+    """
+
+    def __init__(
+        self,
+        area: List[LatLong],
+        buffer: float,
+        points: List[LatLong],
+        items: List[GeocodeInfoItem],
+        errors: Dict[LatLong, Exception],
+        duplicates: int,
+    ) -> None:
+        self.area = area
+        self.buffer = buffer
+        self.points = points
+        self.items = items
+        self.errors = errors
+        self.duplicates = duplicates
+
+    @property
+    def complete(self) -> bool:
+        """Whether every sample point was geocoded successfully."""
+        return not self.errors
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def to_dict(self) -> dict:
+        return dict(
+            buffer=self.buffer,
+            points=len(self.points),
+            items=[item.to_dict() for item in self.items],
+            errors={f"{lat},{long}": str(e) for (lat, long), e in self.errors.items()},
+            duplicates=self.duplicates,
+        )
+
+
+def _item_key(item: GeocodeInfoItem) -> Tuple[Any, Any]:
+    return item.postal_code, tuple(item.lat_long or ())
+
+
+def _item_lat_long(item: GeocodeInfoItem) -> Optional[LatLong]:
+    try:
+        lat, long = item.lat_long
+        return float(lat), float(long)
+    except (TypeError, ValueError):
+        return None
+
+
+def sweep(
+    client: "OneMap",
+    area: Area,
+    buffer: float = MAX_BUFFER,
+    address_type: str = "all",
+    other_features: bool = False,
+    clip: bool = True,
+    max_workers: int = 8,
+    timeout: int = 15,
+    raise_on_error: bool = False,
+) -> SweepResult:
+    """
+    Reverse geocodes every address in `area`, a bounding box
+    (min lat, min long, max lat, max long) or a polygon of lat/longs.
+
+    Sample points are reverse geocoded concurrently through
+    `client.reverse_geocode`, as described in `onemapsg._fanout`. Items
+    are deduplicated by postal code and coordinates. With `clip`, items
+    outside the area are dropped. Failed points are reported in
+    `SweepResult.errors` unless `raise_on_error` is True.
+    """
+    if buffer > MAX_BUFFER:
+        raise ValueError(f"`buffer` can be at most {MAX_BUFFER} metres.")
+    polygon: List[LatLong] = _polygon(area)
+    points: List[LatLong] = sweep_points(polygon, buffer)
+
+    def geocode(point: LatLong) -> List[GeocodeInfoItem]:
+        result: Optional[Any] = client.reverse_geocode(
+            "wgs84",
+            point,
+            buffer=int(math.ceil(buffer)),
+            address_type=address_type,
+            other_features=other_features,
+            timeout=timeout,
+        )
+        return list(result.results or []) if result is not None else []
+
+    seen: Set[Tuple[Any, Any]] = set()
+    kept: List[GeocodeInfoItem] = []
+    errors: Dict[LatLong, Exception] = {}
+    duplicates: int = 0
+    for point, items, error in fan_out(
+        geocode, points, max_workers=max_workers, raise_on_error=raise_on_error
+    ):
+        if error is not None:
+            errors[point] = error
+            continue
+        for item in items:
+            key: Tuple[Any, Any] = _item_key(item)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            if clip:
+                lat_long: Optional[LatLong] = _item_lat_long(item)
+                # Items on the boundary belong to the area.
+                if lat_long is not None and not (
+                    _contains(polygon, *lat_long)
+                    or _edge_distance(polygon, *lat_long) < 0.01
+                ):
+                    continue
+            kept.append(item)
+
+    # Completion order varies between runs; results should not.
+    kept.sort(key=lambda item: (str(item.postal_code), str(item.lat_long)))
+    return SweepResult(polygon, buffer, points, kept, errors, duplicates)
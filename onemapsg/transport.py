@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.transport
+~~~~~~~~~~~~~~~~~~
+
+This module contains the transports that `make_request` sends requests
+through. A transport takes a method, URL, optional JSON body and timeout
+and returns a Response, with the body left undecoded when `decode` is
+False and the transport supports it. Every transport applies the timeout
+to both connecting and reading, raises TransportTimeout or TransportError
+when no response is received and InvalidJSON when its body is not JSON.
+"""
+
+import json
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from . import exceptions
+from .response import Response
+
+if TYPE_CHECKING:  # pragma: no cover
+    from requests import Response as RequestsResponse
+
+SAFE_METHODS: List[str] = ["get", "options"]
+
+_REQUESTS_ERRORS: Dict[str, type] = {}
+_REQUESTS_ERRORS_LOCK: threading.Lock = threading.Lock()
+
+
+def _requests_errors() -> Dict[str, type]:
+    """Returns the errors RequestsTransport raises, creating them on first
+    use so that `requests` is only imported when needed. Each is a
+    TransportError that is also the `requests` exception it replaces, so
+    that callers catching e.g. `requests.Timeout` keep catching it. They are
+    attributes of this module, so they can be pickled."""
+    with _REQUESTS_ERRORS_LOCK:
+        if not _REQUESTS_ERRORS:
+            import requests
+
+            bases: Dict[str, Tuple[type, ...]] = {
+                "RequestsTimeout": (exceptions.TransportTimeout, requests.Timeout),
+                "RequestsConnectionError": (
+                    exceptions.TransportError,
+                    requests.ConnectionError,
+                ),
+                "RequestsError": (exceptions.TransportError, requests.RequestException),
+            }
+            for name, classes in bases.items():
+                _REQUESTS_ERRORS[name] = type(name, classes, {"__module__": __name__})
+        return _REQUESTS_ERRORS
+
+
+def __getattr__(name: str) -> Any:
+    if name in ("RequestsTimeout", "RequestsConnectionError", "RequestsError"):
+        return _requests_errors()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _requests_error(err: Exception) -> Exception:
+    """Returns the error raised in place of the `requests` exception
+    `err`."""
+    import requests
+
+    errors: Dict[str, type] = _requests_errors()
+    name: str = "RequestsError"
+    if isinstance(err, requests.Timeout):
+        name = "RequestsTimeout"
+    elif isinstance(err, requests.ConnectionError):
+        name = "RequestsConnectionError"
+    error: Exception = errors[name](str(err))
+    error.__dict__.update(err.__dict__)
+    return error
+
+
+def _invalid_json(err: ValueError) -> exceptions.InvalidJSON:
+    return exceptions.InvalidJSON(f"Response is not valid JSON: {err}")
+
+
+def _loads(content: bytes) -> Any:
+    try:
+        return json.loads(content)
+    except ValueError as err:
+        raise _invalid_json(err) from err
+
+
+class Transport:
+    """Base class of transports."""
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[dict] = None,
+        timeout: float = 15,
+        timings: Optional[dict] = None,
+        decode: bool = True,
+    ) -> Response:  # pragma: no cover
+        """Sends the request. If a `timings` dictionary is given, the time
+        spent on the request, downloading the body and decoding it should be
+        stored in it under `request`, `download` and `json_decode`. With
+        `decode` False, the body should be returned undecoded in
+        `Response.content` if the transport can."""
+        raise NotImplementedError
+
+
+class RequestsTransport(Transport):
+    """Sends requests with the `requests` library, through `session` if one
+    is given so that connections are reused."""
+
+    def __init__(self, session: Optional[Any] = None) -> None:
+        self.session = session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[dict] = None,
+        timeout: float = 15,
+        timings: Optional[dict] = None,
+        decode: bool = True,
+    ) -> Response:
+        import requests
+
+        request_method: Callable = getattr(self.session or requests, method)
+        started_at: float = time.perf_counter()
+        r: "RequestsResponse"
+        try:
+            if method not in SAFE_METHODS:
+                r = request_method(url, json=data, timeout=timeout)
+            else:
+                r = request_method(url, timeout=timeout)
+        except requests.RequestException as err:
+            raise _requests_error(err) from err
+        if not decode:
+            content: bytes = r.content
+            if timings is not None:
+                timings["request"] = time.perf_counter() - started_at
+            return Response(status_code=r.status_code, data={}, content=content)
+        if timings is None:
+            return Response(status_code=r.status_code, data=self._json(r))
+
+        total: float = time.perf_counter() - started_at
+        timings["request"] = min(r.elapsed.total_seconds(), total)
+        timings["download"] = total - timings["request"]
+        started_at = time.perf_counter()
+        response_data: dict = self._json(r)
+        timings["json_decode"] = time.perf_counter() - started_at
+        return Response(status_code=r.status_code, data=response_data)
+
+    @staticmethod
+    def _json(r: "RequestsResponse") -> Any:
+        try:
+            return r.json()
+        except ValueError as err:
+            # requests.JSONDecodeError, or json.JSONDecodeError before 2.27.
+            raise _invalid_json(err) from err
+
+
+class Urllib3Transport(Transport):
+    """Sends requests with a `urllib3` connection pool. Extra keyword
+    arguments are passed to `urllib3.PoolManager`."""
+
+    def __init__(self, pool_manager: Optional[Any] = None, **pool_kwargs: Any) -> None:
+        import urllib3
+
+        self._urllib3: Any = urllib3
+        self.pool_manager: Any = (
+            pool_manager
+            if pool_manager is not None
+            else urllib3.PoolManager(**pool_kwargs)
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[dict] = None,
+        timeout: float = 15,
+        timings: Optional[dict] = None,
+        decode: bool = True,
+    ) -> Response:
+        urllib3: Any = self._urllib3
+        body: Optional[bytes] = None
+        headers: Dict[str, str] = {}
+        if method not in SAFE_METHODS:
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+        started_at: float = time.perf_counter()
+        r: Any = None
+        try:
+            r = self.pool_manager.request(
+                method.upper(),
+                url,
+                body=body,
+                headers=headers,
+                # Same semantics as `requests`: connect and read timeouts.
+                timeout=urllib3.Timeout(connect=timeout, read=timeout),
+                retries=False,
+                preload_content=False,
+            )
+            headers_at: float = time.perf_counter()
+            content: bytes = r.read()
+        except urllib3.exceptions.TimeoutError as err:
+            raise exceptions.TransportTimeout(str(err)) from err
+        except urllib3.exceptions.HTTPError as err:
+            raise exceptions.TransportError(str(err)) from err
+        finally:
+            if r is not None:
+                r.release_conn()
+        read_at: float = time.perf_counter()
+        if timings is not None:
+            timings["request"] = headers_at - started_at
+            timings["download"] = read_at - headers_at
+        if not decode:
+            return Response(status_code=r.status, data={}, content=content)
+        response_data: dict = _loads(content)
+        if timings is not None:
+            timings["json_decode"] = time.perf_counter() - read_at
+        return Response(status_code=r.status, data=response_data)
+
+
+class HttpxTransport(Transport):
+    """
+    Sends requests with `httpx`, using HTTP/2 by default so that concurrent
+    calls from many threads are multiplexed over one connection. Requires
+    `pip install python-onemapsg[http2]`. Extra keyword arguments are
+    passed to `httpx.Client`.
+    """
+
+    def __init__(
+        self, client: Optional[Any] = None, http2: bool = True, **client_kwargs: Any
+    ) -> None:
+        try:
+            import httpx
+
+            # Raises ImportError too when HTTP/2 support (`h2`) is missing.
+            self.client: Any = (
+                client
+                if client is not None
+                else httpx.Client(http2=http2, **client_kwargs)
+            )
+        except ImportError:  # pragma: no cover
+            raise ImportError(
+                "HttpxTransport requires httpx. "
+                "Install it with `pip install python-onemapsg[http2]`."
+            )
+        self._httpx: Any = httpx
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[dict] = None,
+        timeout: float = 15,
+        timings: Optional[dict] = None,
+        decode: bool = True,
+    ) -> Response:
+        httpx: Any = self._httpx
+        started_at: float = time.perf_counter()
+        try:
+            request: Any = self.client.build_request(
+                method.upper(),
+                url,
+                json=data if method not in SAFE_METHODS else None,
+                timeout=httpx.Timeout(timeout),
+            )
+            r: Any = self.client.send(request, stream=True)
+            try:
+                headers_at: float = time.perf_counter()
+                r.read()
+            finally:
+                r.close()
+        except httpx.TimeoutException as err:
+            raise exceptions.TransportTimeout(str(err)) from err
+        except httpx.HTTPError as err:
+            raise exceptions.TransportError(str(err)) from err
+        read_at: float = time.perf_counter()
+        if timings is not None:
+            timings["request"] = headers_at - started_at
+            timings["download"] = read_at - headers_at
+        if not decode:
+            return Response(status_code=r.status_code, data={}, content=r.content)
+        response_data: dict = _loads(r.content)
+        if timings is not None:
+            timings["json_decode"] = time.perf_counter() - read_at
+        return Response(status_code=r.status_code, data=response_data)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+DEFAULT_TRANSPORT: Transport = RequestsTransport()
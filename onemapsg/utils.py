@@ -7,16 +7,12 @@ onemapsg.utils
 This module contains utilities shared across the package.
 """
 
-from typing import Any, Callable, List, Optional, Type, Union
+from typing import Any, Callable, List, Optional, Sequence, Type, Union
 from urllib.parse import urlencode
 
-import requests
-from requests import Response as RequestsResponse
-
 from .api import API
 from .response import GeocodeInfo, Response, RouteResult, SearchResult
-
-SAFE_METHODS: List[str] = ["get", "options"]
+from .transport import DEFAULT_TRANSPORT, SAFE_METHODS, Transport
 
 
 def to_dict(obj: Any) -> dict:
@@ -27,8 +23,15 @@ def to_dict(obj: Any) -> dict:
     result: dict = {}
     for key, val in obj.__dict__.items():
         element: Union[List[Union[dict, List[dict]]], dict] = []
+        # Private attributes, e.g. views cached by results, are left out.
+        if key.startswith("_") and not key.startswith("__"):
+            continue
         if not key.startswith("__"):
-            if isinstance(val, list) and isinstance(element, list):
+            # Lazy sequences, e.g. snapshot results, are converted like lists.
+            lazy: bool = isinstance(val, Sequence) and not isinstance(
+                val, (str, bytes, tuple)
+            )
+            if (isinstance(val, list) or lazy) and isinstance(element, list):
                 for item in val:
                     element.append(to_dict(item))
             else:
@@ -38,21 +41,32 @@ def to_dict(obj: Any) -> dict:
 
 
 def make_request(
-    endpoint: str, method: str = "get", data: Optional[dict] = None, timeout: int = 15
+    endpoint: str,
+    method: str = "get",
+    data: Optional[dict] = None,
+    timeout: int = 15,
+    timings: Optional[dict] = None,
+    transport: Optional[Transport] = None,
+    decode: bool = True,
 ) -> Response:
     """Makes a request to the given endpoint and maps the response
-    to a Response class"""
+    to a Response class. If a `timings` dictionary is given, the time spent
+    on the request, downloading the body and decoding it is stored in it.
+    Requests go through `transport`, which defaults to `requests`. With
+    `decode` False, the body is left undecoded in `Response.content` if the
+    transport supports it."""
     method = method.lower()
-    request_method: Callable = getattr(requests, method)
     if method not in SAFE_METHODS and data is None:
         raise ValueError("Data must be provided for POST, PUT and PATCH requests.")
-
-    r: RequestsResponse
-    if method not in SAFE_METHODS:
-        r = request_method(endpoint, json=data, timeout=timeout)
-    else:
-        r = request_method(endpoint, timeout=timeout)
-    return Response(status_code=r.status_code, data=r.json())
+    if transport is None:
+        transport = DEFAULT_TRANSPORT
+    if not decode:
+        return transport.request(
+            method, endpoint, data=data, timeout=timeout, timings=timings, decode=False
+        )
+    return transport.request(
+        method, endpoint, data=data, timeout=timeout, timings=timings
+    )
 
 
 def construct_search_query(
@@ -82,7 +96,7 @@ def validate_address_type(address_type: str) -> str:
 
 
 def construct_reverse_geocode_svy21_query(
-    location: str,
+    location: Sequence[Any],
     token: str,
     buffer: int = 10,
     address_type: str = "all",
@@ -131,3 +145,45 @@ def get_route_class() -> Type[RouteResult]:
 def coerce_response(cls: Type[Any], data: dict) -> Any:
     """Creates a class object out of given response data and class."""
     return cls(**data)
+
+
+def require_numpy() -> Any:
+    """Imports NumPy, which is an optional dependency."""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "This feature requires NumPy. "
+            "Install it with `pip install python-onemapsg[numpy]`."
+        )
+    return numpy
+
+
+def action_type_for_url(url: str) -> str:
+    """Returns the action type of a query URL built by this module."""
+    base: str = url.split("?", 1)[0]
+    for action_type in ["search", "route", "reverse_geocode_wgs84"]:
+        if getattr(API, action_type) == base:
+            return action_type
+    raise ValueError(f"Not a OneMap query URL: {url}")
+
+
+def strip_token(url: str) -> str:
+    """Removes the `token` query parameter from a URL, so that the URL can
+    be used as a cache key regardless of which token was used."""
+    if "?" not in url:
+        return url
+    base, query = url.split("?", 1)
+    params: List[str] = [p for p in query.split("&") if not p.startswith("token=")]
+    return f"{base}?{'&'.join(params)}"
+
+
+def with_token(url: str, token: str) -> str:
+    """Returns `url` with its `token` query parameter set to `token`."""
+    stripped: str = strip_token(url)
+    param: str = urlencode({"token": token})
+    if "?" not in stripped:
+        return f"{stripped}?{param}"
+    if stripped.endswith("?"):
+        return f"{stripped}{param}"
+    return f"{stripped}&{param}"
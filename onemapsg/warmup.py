@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+"""
+onemapsg.warmup
+~~~~~~~~~~~~~~~
+
+This module contains the cache warmer, which fills a client's cache with a
+list of queries on several threads, e.g. at startup with the hottest keys
+of the previous process.
+
+Usage:
+    hot_keys = old_cache.hot_keys(1000)
+    ...
+    warmup = Warmup(onemap, hot_keys, on_progress=print).start()
+    warmup.wait()
+"""
+
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sized,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .client import OneMap
+
+# A cache key, e.g. from `Cache.hot_keys`, or a function making the call,
+# e.g. `lambda onemap: onemap.search("048583")`.
+Query = Union[str, Callable[["OneMap"], Any]]
+
+
+class WarmupProgress:
+    """Queries processed so far. `skipped` ones were already cached."""
+
+    def __init__(self, total: Optional[int] = None) -> None:
+        self.total = total
+        self.fetched: int = 0
+        self.skipped: int = 0
+        self.failed: int = 0
+        self.cancelled: bool = False
+        self.finished: bool = False
+        self.errors: List[Tuple[Query, Exception]] = []
+        self.started_at: float = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> int:
+        return self.fetched + self.skipped + self.failed
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return self.done / self.total
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def to_dict(self) -> dict:
+        return dict(
+            total=self.total,
+            done=self.done,
+            fetched=self.fetched,
+            skipped=self.skipped,
+            failed=self.failed,
+            cancelled=self.cancelled,
+            finished=self.finished,
+            elapsed=self.elapsed,
+        )
+
+    def __str__(self) -> str:
+        total: str = "?" if self.total is None else str(self.total)
+        return (
+            f"{self.done}/{total} queries ({self.fetched} fetched, "
+            f"{self.skipped} cached, {self.failed} failed) in {self.elapsed:.1f}s"
+        )
+
+
+class Warmup:
+    """
+    Runs `queries` through `client` on `max_workers` threads, so what
+    `onemapsg._fanout` describes applies, except for the deadline: warmups
+    outlive their caller. At most `max_errors` errors are kept in the
+    progress.
+
+    `on_progress` is called with the progress after every query, from the
+    worker threads.
+    """
+
+    def __init__(
+        self,
+        client: "OneMap",
+        queries: Iterable[Query],
+        max_workers: int = 8,
+        timeout: int = 15,
+        on_progress: Optional[Callable[[WarmupProgress], Any]] = None,
+        max_errors: int = 100,
+    ) -> None:
+        self.client = client
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.max_errors = max_errors
+        self.progress = WarmupProgress(
+            len(queries) if isinstance(queries, Sized) else None
+        )
+        self._queries: Iterator[Query] = iter(queries)
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._active: int = 0
+
+    def _next(self) -> Optional[Query]:
+        with self._lock:
+            if self._cancelled.is_set():
+                return None
+            return next(self._queries, None)
+
+    def _warm(self, query: Query) -> bool:
+        if isinstance(query, str):
+            return self.client.prefetch(query, timeout=self.timeout)
+        query(self.client)
+        return True
+
+    def _work(self) -> None:
+        try:
+            self._work_through_queries()
+        finally:
+            with self._lock:
+                self._active -= 1
+                if not self._active:
+                    self.progress.cancelled = self._cancelled.is_set()
+                    self.progress.finished_at = time.monotonic()
+                    self.progress.finished = True
+
+    def _work_through_queries(self) -> None:
+        query: Optional[Query] = self._next()
+        while query is not None:
+            try:
+                fetched: bool = self._warm(query)
+            except Exception as err:
+                with self._lock:
+                    self.progress.failed += 1
+                    if len(self.progress.errors) < self.max_errors:
+                        self.progress.errors.append((query, err))
+            else:
+                with self._lock:
+                    if fetched:
+                        self.progress.fetched += 1
+                    else:
+                        self.progress.skipped += 1
+            if self.on_progress is not None:
+                self.on_progress(self.progress)
+            query = self._next()
+
+    def start(self) -> "Warmup":
+        """Starts warming in the background."""
+        self._threads = [
+            threading.Thread(target=self._work, name=f"onemap-warmup-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        self._active = len(self._threads)
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the warmup to finish. Returns False on timeout."""
+        deadline: Optional[float] = (
+            time.monotonic() + timeout if timeout is not None else None
+        )
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+            if thread.is_alive():
+                return False
+        return True
+
+    def run(self) -> WarmupProgress:
+        """Warms the cache and returns the progress when done."""
+        self.start().wait()
+        return self.progress
+
+    def cancel(self) -> None:
+        """Stops after the queries in flight. Call `wait` to wait for them."""
+        self._cancelled.set()
@@ -10,7 +10,7 @@ VERSION = [x.strip().strip("'") for x in v.split('=')][1]
 setup(
     name='python-onemapsg',
     version=VERSION,
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks']),
     description='Python Client for OneMap SG',
     long_description=README,
     author='Thomas Jiang',
@@ -21,6 +21,10 @@ setup(
         'requests>=2.20.0',
         'polyline>=1.3.2'
     ],
+    extras_require={
+        'numpy': ['numpy>=1.16'],
+        'http2': ['httpx[http2]>=0.18'],
+    },
     include_package_data=True,
     zip_safe=False,
     classifiers=[
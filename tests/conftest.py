@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from onemapsg import exceptions
+from onemapsg.response import GeocodeInfo, SearchResult
+from onemapsg.simulator.payloads import reverse_geocode_payload, search_payload
+
+
+@pytest.fixture
+def fake_client():
+    """
+    Returns a factory of mock clients answering `search`, `reverse_geocode`
+    and `route` after `delay` seconds. Calls for a search value, location or
+    (start, end) pair in `fail` raise. The most calls in flight at once are
+    kept in `max_in_flight`.
+    """
+
+    def make(fail=(), delay=0.0):
+        client = MagicMock()
+        lock = threading.Lock()
+        client.in_flight = client.max_in_flight = 0
+
+        def call(key, error, answer):
+            with lock:
+                client.in_flight += 1
+                client.max_in_flight = max(client.max_in_flight, client.in_flight)
+            try:
+                time.sleep(delay)
+                if key in fail:
+                    raise error
+                return answer()
+            finally:
+                with lock:
+                    client.in_flight -= 1
+
+        def search(search_val, **kwargs):
+            return call(
+                search_val,
+                exceptions.ServerError("down"),
+                lambda: SearchResult(**search_payload(search_val, found=1)),
+            )
+
+        def reverse_geocode(reverse_type, location, buffer=10, **kwargs):
+            return call(
+                tuple(location),
+                exceptions.ServerError("down"),
+                lambda: GeocodeInfo(
+                    **reverse_geocode_payload(*location, buffer=buffer)
+                ),
+            )
+
+        def route(start, end, route_type, public_transport_options=None, timeout=15):
+            a = float(start.split(",")[0])
+            b = float(end.split(",")[0])
+            return call(
+                (start, end),
+                exceptions.BadRequest("no route"),
+                lambda: MagicMock(
+                    route_summary={"total_time": a * 10 + b, "total_distance": a + b}
+                ),
+            )
+
+        client.search.side_effect = search
+        client.reverse_geocode.side_effect = reverse_geocode
+        client.route.side_effect = route
+        return client
+
+    return make
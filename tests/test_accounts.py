@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+import time
+from collections import Counter
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from onemapsg import exceptions, status
+from onemapsg.accounts import HEALTHY, UNHEALTHY, AccountPool
+from onemapsg.breaker import CLOSED, CircuitBreaker
+from onemapsg.client import OneMap
+from onemapsg.deadline import deadline
+from onemapsg.hedge import Hedger
+from onemapsg.response import Response
+from onemapsg.simulator.payloads import reverse_geocode_payload, search_payload
+
+CREDENTIALS = [("a@example.com", "a"), ("b@example.com", "b"), ("c@example.com", "c")]
+POINT = (1.3, 103.8)
+
+
+def connect(email=None, password=None):
+    if password == "wrong":
+        raise exceptions.AuthenticationError("Failed to authenticate.")
+    return f"token-{email}", 4102444800
+
+
+def token_of(url):
+    return parse_qs(urlparse(url).query)["token"][0]
+
+
+def test_pool_spreads_calls():
+    """Calls should go to the account with the fewest in flight, then the
+    fewest so far."""
+    pool = AccountPool(CREDENTIALS)
+    first = pool.acquire()
+    second = pool.acquire()
+    third = pool.acquire()
+    assert len({first, second, third}) == 3
+    pool.release(second)
+    assert pool.acquire() is second
+    with pytest.raises(ValueError):
+        AccountPool([])
+
+
+@patch("onemapsg.accounts.time.monotonic")
+def test_pool_takes_unhealthy_accounts_out(mock_monotonic):
+    mock_monotonic.return_value = 0.0
+    pool = AccountPool(CREDENTIALS[:2], max_failures=2, cooldown=60)
+    a, b = pool.accounts
+    pool.release(pool.acquire(), rejected=True)
+    assert pool.states() == {a.email: UNHEALTHY, b.email: HEALTHY}
+    for _ in range(2):
+        assert pool.acquire() is b
+        pool.release(b, failed=True)
+    with pytest.raises(exceptions.AccountsUnavailable) as error:
+        pool.acquire()
+    assert error.value.retry_after == 60
+
+    mock_monotonic.return_value = 61.0
+    assert len(pool.healthy()) == 2
+    # A success resets the count of failures in a row.
+    pool.release(pool.acquire(), failed=True)
+    pool.release(pool.acquire(), failed=False)
+    assert all(account.failures <= 1 for account in pool.accounts)
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_client_uses_every_account(mock_request, mock_connect):
+    mock_connect.side_effect = connect
+    mock_request.return_value = Response(
+        status.HTTP_200_OK, reverse_geocode_payload(*POINT)
+    )
+    onemap = OneMap(accounts=CREDENTIALS)
+    assert mock_connect.call_count == 3
+    for _ in range(6):
+        onemap.reverse_geocode("wgs84", POINT)
+    tokens = Counter(token_of(call[0][0]) for call in mock_request.call_args_list)
+    assert tokens == {f"token-{email}": 2 for email, _ in CREDENTIALS}
+
+    # Public API calls do not need an account.
+    mock_request.return_value = Response(
+        status.HTTP_200_OK, search_payload("048583", found=1)
+    )
+    onemap.search("048583")
+    assert "token" not in mock_request.call_args[0][0]
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_client_skips_rejected_accounts(mock_request, mock_connect):
+    """Accounts failing to authenticate or rate limited by OneMap should be
+    taken out of rotation."""
+    mock_connect.side_effect = connect
+    credentials = [("a@example.com", "wrong")] + CREDENTIALS[1:]
+
+    def respond(url, **kwargs):
+        if token_of(url) == "token-b@example.com":
+            return Response(status.HTTP_429_TOO_MANY_REQUESTS, {"error": "Slow down"})
+        return Response(status.HTTP_200_OK, reverse_geocode_payload(*POINT))
+
+    mock_request.side_effect = respond
+    pool = AccountPool(credentials)
+    onemap = OneMap(accounts=pool)
+    assert pool.states()["a@example.com"] == UNHEALTHY
+    # Calls refused for account b are sent again as account c.
+    for _ in range(4):
+        assert onemap.reverse_geocode("wgs84", POINT).results
+    assert pool.states() == {
+        "a@example.com": UNHEALTHY,
+        "b@example.com": UNHEALTHY,
+        "c@example.com": HEALTHY,
+    }
+
+    mock_connect.side_effect = exceptions.AuthenticationError("Failed")
+    with pytest.raises(exceptions.AuthenticationError):
+        OneMap(accounts=CREDENTIALS)
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_client_throughput_scales_with_accounts(mock_request, mock_connect):
+    """Each account should have its own rate limit."""
+    mock_connect.side_effect = connect
+    mock_request.return_value = Response(
+        status.HTTP_200_OK, reverse_geocode_payload(*POINT)
+    )
+    pool = AccountPool(CREDENTIALS, rate=0.01, burst=2)
+    onemap = OneMap(accounts=pool)
+    with deadline(0.05):
+        for _ in range(6):
+            onemap.reverse_geocode("wgs84", POINT)
+        with pytest.raises(exceptions.DeadlineExceeded):
+            onemap.reverse_geocode("wgs84", POINT)
+    assert mock_request.call_count == 6
+    assert all(account.in_flight == 0 for account in pool.accounts)
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_client_hedges_within_the_account_rate_limit(mock_request, mock_connect):
+    """Hedges should be skipped when the account has no capacity left."""
+    mock_connect.side_effect = connect
+
+    def slow(url, **kwargs):
+        time.sleep(0.1)
+        return Response(status.HTTP_200_OK, reverse_geocode_payload(*POINT))
+
+    mock_request.side_effect = slow
+    hedger = Hedger(initial_delay=0.01)
+    pool = AccountPool(CREDENTIALS[:1], rate=0.01, burst=1)
+    onemap = OneMap(hedger=hedger, accounts=pool)
+    onemap.reverse_geocode("wgs84", POINT)
+    assert mock_request.call_count == 1
+    assert hedger.stats.hedges == 0
+
+    pool = AccountPool(CREDENTIALS[:1], rate=0.01, burst=2)
+    onemap = OneMap(hedger=hedger, accounts=pool)
+    onemap.reverse_geocode("wgs84", POINT)
+    assert mock_request.call_count == 3
+    assert hedger.stats.hedges == 1
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_client_accounts_unavailable_is_not_an_endpoint_failure(
+    mock_request, mock_connect
+):
+    """Running out of accounts should not open the circuit breaker."""
+    mock_connect.side_effect = connect
+    mock_request.return_value = Response(
+        status.HTTP_429_TOO_MANY_REQUESTS, {"error": "Slow down"}
+    )
+    breaker = CircuitBreaker(min_requests=1)
+    onemap = OneMap(accounts=CREDENTIALS[:1], circuit_breaker=breaker)
+    with pytest.raises(exceptions.BadRequest):
+        onemap.reverse_geocode("wgs84", POINT)
+    with pytest.raises(exceptions.AccountsUnavailable):
+        onemap.reverse_geocode("wgs84", POINT)
+    assert mock_request.call_count == 1
+    assert breaker.state("reverse_geocode_wgs84") == CLOSED
@@ -7,3 +7,13 @@ def test_api_singleton():
     """API should prepend base URL to endpoint url."""
     for endpoint_name, endpoint_url in endpoints.items():
         assert getattr(API, endpoint_name) == f"{BASE_URL}{endpoint_url}"
+
+
+def test_api_set_base_url():
+    """Endpoints should follow the configured base URL."""
+    try:
+        API.set_base_url("http://127.0.0.1:8000")
+        assert API.search == "http://127.0.0.1:8000/commonapi/search"
+    finally:
+        API.set_base_url(BASE_URL)
+    assert API.search == f"{BASE_URL}{endpoints['search']}"
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+from unittest.mock import patch
+
+import polyline
+import pytest
+
+from onemapsg import exceptions
+from onemapsg.batch import route_batch
+from onemapsg.client import OneMap
+from onemapsg.deadline import deadline
+from onemapsg.response import Response
+
+GEOMETRY = polyline.encode([(1.3, 103.8), (1.31, 103.81)])
+
+
+def make_client():
+    client = OneMap()
+    client.token = "token"
+    client.token_expiry = int(time.time()) + 3600
+    return client
+
+
+def fake_request(url, decode=True, **kwargs):
+    start = url.split("start=")[1].split("&")[0]
+    if start.startswith("7"):
+        raise exceptions.TransportError("Connection reset.")
+    if start.startswith("9"):
+        return Response(400, {}, json.dumps({"error": "Invalid start"}).encode())
+    if start.startswith("8"):
+        return Response(200, {}, json.dumps({"status_message": "Found no route"}))
+    data = {
+        "route_summary": {
+            "total_time": float(start.split(",")[0]) * 10,
+            "total_distance": 5,
+        },
+        "route_geometry": GEOMETRY,
+    }
+    assert not decode
+    return Response(200, {}, json.dumps(data).encode())
+
+
+@pytest.mark.parametrize("processes", [0, 2])
+@patch("onemapsg.client.make_request")
+def test_route_batch(mock_make_request, processes):
+    """Every pair should be routed and decoded, in or out of process."""
+    mock_make_request.side_effect = fake_request
+    pairs = [(f"{i},103.8", "1.3,103.9") for i in range(1, 200)]
+    routes = list(
+        route_batch(
+            make_client(),
+            pairs,
+            "walk",
+            geometry=True,
+            processes=processes,
+            chunksize=16,
+        )
+    )
+    assert sorted(route.index for route in routes) == list(range(199))
+    route = next(route for route in routes if route.index == 4)
+    assert route.ok
+    assert route.start == "5,103.8"
+    assert route.total_time == 50
+    assert route.total_distance == 5
+    assert route.lat_longs == [(1.3, 103.8), (1.31, 103.81)]
+    assert mock_make_request.call_count == 199
+
+
+@patch("onemapsg.client.make_request")
+def test_route_batch_errors(mock_make_request):
+    mock_make_request.side_effect = fake_request
+    pairs = [("1,0", "2,0"), ("9,0", "2,0"), ("8,0", "2,0"), ("7,0", "2,0")]
+    routes = {
+        route.index: route
+        for route in route_batch(make_client(), pairs, "drive", processes=0)
+    }
+    assert routes[0].ok and routes[0].geometry is None
+    assert isinstance(routes[1].error, exceptions.BadRequest)
+    assert str(routes[1].error) == "Invalid start"
+    assert isinstance(routes[2].error, ValueError)
+    assert isinstance(routes[3].error, exceptions.TransportError)
+
+
+@patch("onemapsg.client.make_request")
+def test_route_batch_uses_data_when_undecoded_body_is_unavailable(mock_make_request):
+    mock_make_request.return_value = Response(
+        200, {"route_summary": {"total_time": 1, "total_distance": 2}}
+    )
+    (route,) = route_batch(make_client(), [("1,0", "2,0")], "cycle", processes=0)
+    assert (route.total_time, route.total_distance) == (1, 2)
+
+
+@patch("onemapsg.client.make_request")
+def test_route_batch_deadline(mock_make_request):
+    """The caller's deadline should apply to requests on batch threads."""
+    mock_make_request.side_effect = fake_request
+    with deadline(0):
+        (route,) = route_batch(make_client(), [("1,0", "2,0")], "walk", processes=0)
+    assert isinstance(route.error, exceptions.DeadlineExceeded)
+
+
+def test_route_batch_invalid_route_type():
+    with pytest.raises(ValueError):
+        list(route_batch(make_client(), [("1,0", "2,0")], "pt"))
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_route_batch_renews_expired_token(mock_make_request, mock_connect):
+    """Requests should carry the token renewed after the URL was built."""
+    mock_make_request.side_effect = fake_request
+    mock_connect.return_value = "new", int(time.time()) + 3600
+    client = make_client()
+    client.authenticate("email@example.com", "password")
+    client.token, client.token_expiry = "old", int(time.time()) - 1
+    routes = list(route_batch(client, [("1,0", "2,0")] * 3, "walk", processes=0))
+    assert all(route.ok for route in routes)
+    for call in mock_make_request.call_args_list:
+        assert "token=new" in call[0][0] and "token=old" not in call[0][0]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from onemapsg.bloom import BloomFilter, optimal_size
+
+
+def test_optimal_size():
+    """1% false positives should take about 9.6 bits and 7 hashes per key."""
+    bits, hashes = optimal_size(1000000, 0.01)
+    assert 9500000 < bits < 9700000
+    assert hashes == 7
+
+
+def test_bloom_filter_invalid_arguments():
+    with pytest.raises(ValueError):
+        BloomFilter(0)
+    with pytest.raises(ValueError):
+        BloomFilter(10, error_rate=1)
+
+
+def test_bloom_filter_membership():
+    """Added keys should always be found, others rarely."""
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"key-{i}")
+    assert len(bloom) == 10000
+    assert all(f"key-{i}" in bloom for i in range(10000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 200
+    assert bloom.size_bytes < 12500
+
+
+def test_bloom_filter_save_and_load(tmp_path):
+    bloom = BloomFilter(1000)
+    bloom.add("048583")
+    path = str(tmp_path / "filter.bin")
+    bloom.save(path)
+    loaded = BloomFilter.load(path)
+    assert "048583" in loaded
+    assert "018989" not in loaded
+    assert len(loaded) == 1
+    assert loaded.bits == bloom.bits and loaded.hashes == bloom.hashes
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(bloom.to_bytes()[:-1])
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(b"XXXX" + bloom.to_bytes()[4:])
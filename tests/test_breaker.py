@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+import pytest
+
+from onemapsg import exceptions, status
+from onemapsg.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from onemapsg.client import OneMap
+from onemapsg.metrics import MetricsRegistry
+from onemapsg.response import Response
+
+SEARCH_DATA = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+
+
+def test_breaker_invalid_failure_rate():
+    """Failure rate must be within (0, 1]."""
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_rate=0)
+
+
+@patch("onemapsg.breaker.time.monotonic")
+def test_breaker_opens_on_failure_rate(mock_monotonic):
+    """The circuit should open once enough requests failed in the window."""
+    mock_monotonic.return_value = 0.0
+    breaker = CircuitBreaker(failure_rate=0.5, min_requests=4, window=10)
+    for failed in [False, True, False]:
+        breaker.before_request("search")
+        breaker.record("search", failed)
+    assert breaker.state("search") == CLOSED
+    breaker.before_request("search")
+    breaker.record("search", True)
+    assert breaker.state("search") == OPEN
+    assert breaker.state("route") == CLOSED
+    with pytest.raises(exceptions.CircuitOpen) as excinfo:
+        breaker.before_request("search")
+    assert excinfo.value.endpoint == "search"
+    assert excinfo.value.retry_after == 30.0
+    assert breaker.rejected("search") == 1
+
+
+@patch("onemapsg.breaker.time.monotonic")
+def test_breaker_forgets_old_failures(mock_monotonic):
+    """Outcomes older than the window should not count."""
+    mock_monotonic.return_value = 0.0
+    breaker = CircuitBreaker(failure_rate=0.5, min_requests=2, window=10)
+    breaker.record("search", True)
+    mock_monotonic.return_value = 11.0
+    breaker.record("search", True)
+    assert breaker.state("search") == CLOSED
+
+
+@patch("onemapsg.breaker.time.monotonic")
+def test_breaker_half_open(mock_monotonic):
+    """After the reset timeout, trial requests should close or reopen it."""
+    mock_monotonic.return_value = 0.0
+    breaker = CircuitBreaker(min_requests=1, reset_timeout=5, half_open_requests=2)
+    breaker.record("search", True)
+    assert breaker.state("search") == OPEN
+
+    mock_monotonic.return_value = 5.0
+    assert breaker.state("search") == HALF_OPEN
+    breaker.before_request("search")
+    breaker.before_request("search")
+    with pytest.raises(exceptions.CircuitOpen):
+        breaker.before_request("search")
+    breaker.record("search", False)
+    breaker.record("search", True)
+    assert breaker.state("search") == OPEN
+
+    mock_monotonic.return_value = 10.0
+    breaker.before_request("search")
+    breaker.before_request("search")
+    breaker.record("search", False)
+    assert breaker.state("search") == HALF_OPEN
+    breaker.record("search", False)
+    assert breaker.state("search") == CLOSED
+
+
+@patch("onemapsg.client.make_request")
+def test_client_fails_fast_when_open(mock_make_request):
+    """Server errors and transport errors should open the circuit, after
+    which calls raise CircuitOpen without a request."""
+    breaker = CircuitBreaker(min_requests=2)
+    onemap = OneMap(circuit_breaker=breaker)
+    mock_make_request.side_effect = [
+        Response(status.HTTP_503_SERVICE_UNAVAILABLE, {}),
+        exceptions.TransportTimeout("timed out"),
+    ]
+    with pytest.raises(exceptions.ServerError):
+        onemap.search("048583")
+    with pytest.raises(exceptions.TransportTimeout):
+        onemap.search("048583")
+    with pytest.raises(exceptions.CircuitOpen):
+        onemap.search("048583")
+    assert mock_make_request.call_count == 2
+
+
+@patch("onemapsg.client.make_request")
+def test_client_bad_requests_do_not_open(mock_make_request):
+    """Client errors mean the server is up and should not open the circuit."""
+    onemap = OneMap(circuit_breaker=CircuitBreaker(min_requests=1))
+    mock_make_request.return_value = Response(status.HTTP_400_BAD_REQUEST, {})
+    with pytest.raises(exceptions.BadRequest):
+        onemap.search("048583")
+    mock_make_request.return_value = Response(status.HTTP_200_OK, SEARCH_DATA)
+    onemap.search("048583")
+    assert onemap.circuit_breaker.state("search") == CLOSED
+
+
+@patch("onemapsg.client.make_request")
+def test_client_unrelated_errors_do_not_open(mock_make_request):
+    """Errors unrelated to the endpoint's health should not be counted, and
+    should give back the slot of a half-open probe."""
+    breaker = CircuitBreaker(min_requests=1, reset_timeout=0)
+    onemap = OneMap(circuit_breaker=breaker)
+    for error in [
+        exceptions.AccountsUnavailable("No account available.", retry_after=1),
+        exceptions.AuthenticationError("Failed to authenticate."),
+        exceptions.ReplayMiss("Not recorded."),
+        exceptions.DeadlineExceeded("Deadline exceeded."),
+        KeyboardInterrupt(),
+    ]:
+        mock_make_request.side_effect = error
+        with pytest.raises(type(error)):
+            onemap.search("048583")
+        assert breaker.state("search") == CLOSED
+
+    mock_make_request.side_effect = exceptions.TransportError("reset")
+    with pytest.raises(exceptions.TransportError):
+        onemap.search("048583")
+    assert breaker.state("search") != CLOSED
+    # The probe slot is given back, so the next call may probe again.
+    mock_make_request.side_effect = exceptions.AccountsUnavailable("", 1)
+    with pytest.raises(exceptions.AccountsUnavailable):
+        onemap.search("048583")
+    mock_make_request.side_effect = None
+    mock_make_request.return_value = Response(status.HTTP_200_OK, SEARCH_DATA)
+    onemap.search("048583")
+    assert breaker.state("search") == CLOSED
+
+
+@patch("onemapsg.client.make_request")
+def test_breaker_metrics(mock_make_request):
+    """The registry should export the state of every circuit."""
+    onemap = OneMap(circuit_breaker=CircuitBreaker(min_requests=1))
+    registry = MetricsRegistry()
+    registry.install(onemap)
+    mock_make_request.return_value = Response(status.HTTP_502_BAD_GATEWAY, {})
+    with pytest.raises(exceptions.ServerError):
+        onemap.search("048583")
+    with pytest.raises(exceptions.CircuitOpen):
+        onemap.search("048583")
+    output = registry.to_prometheus()
+    assert (
+        'onemap_circuit_breaker_state{breaker="default",endpoint="search",'
+        'state="open"} 1' in output
+    )
+    assert (
+        'onemap_circuit_breaker_state{breaker="default",endpoint="search",'
+        'state="closed"} 0' in output
+    )
+    assert (
+        'onemap_circuit_breaker_rejected_total{breaker="default",'
+        'endpoint="search"} 1' in output
+    )
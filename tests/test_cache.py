@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from onemapsg.cache import Cache
+
+
+def test_cache_get_set():
+    """Cache should return stored values and count hits and misses."""
+    cache = Cache()
+    assert cache.get("key") is None
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert "key" in cache
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_cache_lru_eviction():
+    """Least recently used entries should be evicted first."""
+    cache = Cache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.stats.evictions == 1
+
+
+@patch("onemapsg.cache.time.monotonic")
+def test_cache_ttl(mock_monotonic):
+    """Entries older than the TTL should be treated as misses."""
+    mock_monotonic.return_value = 100.0
+    cache = Cache(ttl=10)
+    cache.set("key", "value")
+    mock_monotonic.return_value = 105.0
+    assert cache.get("key") == "value"
+    mock_monotonic.return_value = 111.0
+    assert cache.get("key") is None
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_cache_soft_ttl_validation():
+    """The soft TTL cannot exceed the hard TTL."""
+    with pytest.raises(ValueError):
+        Cache(ttl=10, soft_ttl=20)
+
+
+@patch("onemapsg.cache.time.monotonic")
+def test_cache_soft_ttl(mock_monotonic):
+    """Entries past the soft TTL should be served and reported as stale."""
+    mock_monotonic.return_value = 100.0
+    cache = Cache(ttl=60, soft_ttl=10)
+    cache.set("key", "value")
+    assert cache.lookup("key") == ("value", False)
+    mock_monotonic.return_value = 111.0
+    assert cache.lookup("key") == ("value", True)
+    assert cache.stats.stale == 1
+    mock_monotonic.return_value = 161.0
+    assert cache.lookup("key") == (None, False)
+
+
+def test_cache_refresh_single_flight():
+    """Only one caller at a time should be allowed to refresh a key."""
+    cache = Cache()
+    assert not cache.wait_refresh("key", 0)
+    assert cache.begin_refresh("key")
+    assert not cache.begin_refresh("key")
+    assert not cache.wait_refresh("key", 0.01)
+    threading.Timer(0.01, cache.end_refresh, ["key"]).start()
+    assert cache.wait_refresh("key", 1)
+    assert cache.begin_refresh("key")
+    assert cache.stats.refreshes == 2
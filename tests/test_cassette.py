@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from onemapsg import exceptions, status
+from onemapsg.cassette import (
+    REDACTED,
+    Cassette,
+    CassetteWriter,
+    RecordingTransport,
+    ReplayTransport,
+)
+from onemapsg.client import OneMap
+from onemapsg.response import Response, SearchResult
+
+SEARCH_DATA = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+
+
+def record(path):
+    inner = MagicMock()
+    inner.request.side_effect = [
+        Response(
+            status.HTTP_200_OK,
+            {"access_token": "secret-token", "expiry_timestamp": "4102444800"},
+        ),
+        Response(status.HTTP_200_OK, SEARCH_DATA),
+        Response(status.HTTP_200_OK, {"route_geometry": "first"}),
+        Response(status.HTTP_200_OK, {"route_geometry": "second"}),
+    ]
+    with CassetteWriter(path) as writer:
+        onemap = OneMap(transport=RecordingTransport(writer, inner))
+        onemap.authenticate("email@example.com", "secret-password")
+        onemap.search("048583")
+        onemap.route("1.1,103.1", "1.2,103.2", "drive")
+        onemap.route("1.1,103.1", "1.2,103.2", "drive")
+    return inner
+
+
+def test_record(tmp_path):
+    """Recordings should not contain tokens or credentials."""
+    path = str(tmp_path / "cassette.gz")
+    inner = record(path)
+    assert inner.request.call_count == 4
+    with gzip.open(path, "rt") as f:
+        contents = f.read()
+    assert len(contents.splitlines()) == 4
+    assert "secret-password" not in contents
+    assert "secret-token" not in contents
+    status_code, _, data = Cassette.load(path).find(
+        "post", "https://developers.onemap.sg/privateapi/auth/post/getToken"
+    )
+    assert data == {"access_token": REDACTED, "expiry_timestamp": "4102444800"}
+
+
+def test_replay(tmp_path):
+    """Replays should be looked up by URL in recorded order."""
+    path = str(tmp_path / "cassette.gz")
+    record(path)
+    cassette = Cassette.load(path)
+    assert len(cassette) == 4
+    assert len(cassette.index) == 3
+    onemap = OneMap(transport=ReplayTransport(cassette))
+    onemap.authenticate("email@example.com", "another-password")
+    assert isinstance(onemap.search("048583"), SearchResult)
+    routes = [
+        onemap.route("1.1,103.1", "1.2,103.2", "drive").route_geometry for _ in range(3)
+    ]
+    assert routes == ["first", "second", "first"]
+
+    with pytest.raises(exceptions.ReplayMiss):
+        onemap.search("not recorded")
+
+
+@patch("onemapsg.cassette.time.sleep")
+def test_replay_realtime_and_fallback(mock_sleep, tmp_path):
+    """Realtime replays should sleep the recorded time, scaled by speed."""
+    path = str(tmp_path / "cassette.gz")
+    with CassetteWriter(path) as writer:
+        writer.write("GET", "https://x/a?token=abc&b=1", 200, 0.5, SEARCH_DATA)
+    fallback = MagicMock()
+    fallback.request.return_value = Response(status.HTTP_200_OK, SEARCH_DATA)
+    transport = ReplayTransport(
+        Cassette.load(path), realtime=True, speed=2.0, fallback=fallback
+    )
+    timings = {}
+    response = transport.request("get", "https://x/a?token=def&b=1", timings=timings)
+    assert response.data == SEARCH_DATA
+    mock_sleep.assert_called_once_with(0.25)
+    assert "request" in timings
+    transport.request("get", "https://x/unknown")
+    fallback.request.assert_called_once()
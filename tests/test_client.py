@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 
 import datetime
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from onemapsg import exceptions, response, status
+from onemapsg.cache import Cache
 from onemapsg.client import OneMap
+from onemapsg.negative import NegativeCache
+from onemapsg.normalize import Normalizer
 
 
 def test_client_noauth():
@@ -423,3 +428,206 @@ def test_reverse_geocode_return_none(mock_request, mock_connect):
         "wgs84", (1.3, 103.8)
     )
     assert geocode_info is None
+
+
+@patch("onemapsg.client.make_request")
+def test_client_search_cache(mock_request):
+    """Normalized queries should share a cache entry."""
+    mock_request.return_value = MagicMock(
+        status_code=status.HTTP_200_OK,
+        data={"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []},
+    )
+    cache = Cache()
+    onemap = OneMap(cache=cache, normalizer=Normalizer())
+    first = onemap.search("one raffles quay")
+    assert onemap.search("ONE RAFFLES QUAY ") is first
+    assert onemap.search("One  Raffles Quay") is first
+    mock_request.assert_called_once()
+    assert cache.stats.hits == 2
+    assert cache.stats.misses == 1
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_client_route_cache_ignores_token(mock_request, mock_connect):
+    """Cache keys of private endpoints should not depend on the token."""
+    mock_connect.return_value = "some-token", 1234567
+    mock_request.return_value = MagicMock(status_code=status.HTTP_200_OK, data={})
+    onemap = OneMap("email@example.com", "password", cache=Cache())
+    first = onemap.route("1.23,1.01", "1.01,1.23", "drive")
+    onemap.token = "another-token"
+    assert onemap.route("1.23,1.01", "1.01,1.23", "drive") is first
+    mock_request.assert_called_once()
+    assert "token=some-token" in mock_request.call_args[0][0]
+
+
+@patch("onemapsg.client.make_request")
+def test_client_rate_limiter(mock_request):
+    """Requests should wait on the rate limiter, cache hits should not."""
+    mock_request.return_value = MagicMock(
+        status_code=status.HTTP_200_OK,
+        data={"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []},
+    )
+    rate_limiter = MagicMock()
+    onemap = OneMap(cache=Cache(), rate_limiter=rate_limiter)
+    onemap.search("048583")
+    onemap.search("048583")
+    rate_limiter.acquire.assert_called_once()
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_client_hooks(mock_request, mock_connect):
+    """Hooks should be called around requests without the token in the URL."""
+    mock_connect.return_value = "some-token", 1234567
+    mock_request.return_value = MagicMock(status_code=status.HTTP_200_OK, data={})
+    onemap = OneMap("email@example.com", "password")
+    before, after, error = MagicMock(), MagicMock(), MagicMock()
+    onemap.register_hook("before_request", before)
+    onemap.register_hook("after_response", after)
+    onemap.register_hook("on_error", error)
+    onemap.route("1.23,1.01", "1.01,1.23", "drive")
+    url = before.call_args[0][1]
+    assert before.call_args[0][0] == "route"
+    assert "token" not in url
+    assert after.call_args[0][:3] == ("route", url, mock_request.return_value)
+    error.assert_not_called()
+
+    onemap.unregister_hook("before_request", before)
+    onemap.unregister_hook("after_response", after)
+    onemap.unregister_hook("on_error", error)
+    assert not onemap._has_hooks
+    with pytest.raises(ValueError):
+        onemap.register_hook("unknown", before)
+
+
+@patch("onemapsg.client.make_request")
+def test_client_profile(mock_request):
+    """Every phase of a call should be recorded inside profile()."""
+
+    def request(url, timeout=15, timings=None):
+        timings.update(request=0.1, download=0.01, json_decode=0.001)
+        return MagicMock(
+            status_code=status.HTTP_200_OK,
+            data={"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []},
+        )
+
+    mock_request.side_effect = request
+    onemap = OneMap(cache=Cache())
+    with onemap.profile() as profiler:
+        onemap.search("048583")
+    assert onemap.profiler is None
+    assert list(profiler.summary()["search"]) == [
+        "build_url",
+        "cache",
+        "request",
+        "download",
+        "json_decode",
+        "coerce_response",
+    ]
+
+
+@patch("onemapsg.client.make_request")
+def test_client_stale_while_revalidate(mock_request):
+    """Stale entries should be served while one background refresh runs."""
+    data = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+    refreshed = threading.Event()
+    release = threading.Event()
+
+    def make_request(url, **kwargs):
+        if mock_request.call_count > 1:
+            release.wait(1)
+            refreshed.set()
+        return MagicMock(status_code=status.HTTP_200_OK, data=data)
+
+    mock_request.side_effect = make_request
+    cache = Cache(soft_ttl=0)
+    onemap = OneMap(cache=cache)
+    first = onemap.search("048583")
+    assert onemap.search("048583") is first
+    assert onemap.search("048583") is first
+    release.set()
+    assert refreshed.wait(1)
+    assert mock_request.call_count == 2
+
+
+@patch("onemapsg.client.make_request")
+def test_client_coalesces_misses(mock_request):
+    """Concurrent misses of the same query should share one request."""
+    data = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+
+    def make_request(url, **kwargs):
+        time.sleep(0.05)
+        return MagicMock(status_code=status.HTTP_200_OK, data=data)
+
+    mock_request.side_effect = make_request
+    onemap = OneMap(cache=Cache())
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(onemap.search("048583")))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    mock_request.assert_called_once()
+    assert len(results) == 5
+    assert all(result is results[0] for result in results)
+
+
+def run_concurrently(call, count=5):
+    results = []
+
+    def run():
+        try:
+            results.append(call())
+        except Exception as err:
+            results.append(err)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@patch("onemapsg.client.make_request")
+def test_client_coalesces_misses_after_a_failure(mock_request):
+    """When the shared request fails, one waiter should take over."""
+    data = {"found": 1, "totalNumPages": 1, "pageNum": 1, "results": [{}]}
+    lock = threading.Lock()
+    calls = []
+
+    def make_request(url, **kwargs):
+        with lock:
+            calls.append(url)
+            first = len(calls) == 1
+        time.sleep(0.05)
+        if first:
+            return MagicMock(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return MagicMock(status_code=status.HTTP_200_OK, data=data)
+
+    mock_request.side_effect = make_request
+    onemap = OneMap(cache=Cache())
+    results = run_concurrently(lambda: onemap.search("048583"))
+    assert len(calls) == 2
+    assert sum(isinstance(r, exceptions.ServerError) for r in results) == 1
+    assert onemap.cache.stats.refreshes == 0
+
+
+@patch("onemapsg.client.make_request")
+def test_client_coalesces_misses_of_empty_results(mock_request):
+    """Waiters should find empty results in the negative cache."""
+    data = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+
+    def make_request(url, **kwargs):
+        time.sleep(0.05)
+        return MagicMock(status_code=status.HTTP_200_OK, data=data)
+
+    mock_request.side_effect = make_request
+    onemap = OneMap(cache=Cache(), negative_cache=NegativeCache())
+    results = run_concurrently(lambda: onemap.search("048583"))
+    mock_request.assert_called_once()
+    assert all(result.found == 0 for result in results)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from onemapsg import exceptions, status
+from onemapsg.breaker import HALF_OPEN, CircuitBreaker
+from onemapsg.client import OneMap
+from onemapsg.deadline import current_deadline, deadline, use
+from onemapsg.matrix import route_matrix
+from onemapsg.ratelimit import RateLimiter
+from onemapsg.response import Response
+
+SEARCH_DATA = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+
+
+def test_deadline_nesting():
+    """Nested deadlines should never extend the outer one."""
+    assert current_deadline() is None
+    with deadline(1) as outer:
+        with deadline(10) as inner:
+            assert inner is outer
+        with deadline(0.5) as inner:
+            assert inner is not outer
+            assert current_deadline() is inner
+        assert current_deadline() is outer
+        assert outer.timeout(15) <= 1
+        assert outer.timeout(0.1) == 0.1
+    assert current_deadline() is None
+
+
+def test_deadline_is_per_thread():
+    """Deadlines should only apply to the thread that set them, unless
+    handed over with `use`."""
+    seen = []
+    with deadline(1) as active:
+        thread = threading.Thread(target=lambda: seen.append(current_deadline()))
+        thread.start()
+        thread.join()
+
+        def worker():
+            with use(active):
+                seen.append(current_deadline())
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    assert seen == [None, active]
+
+
+@patch("onemapsg.client.make_request")
+def test_client_caps_timeouts(mock_make_request):
+    """Each request should get the time left as its timeout."""
+    mock_make_request.return_value = Response(status.HTTP_200_OK, SEARCH_DATA)
+    onemap = OneMap()
+    with deadline(2):
+        onemap.search("048583")
+    assert mock_make_request.call_args[1]["timeout"] <= 2
+    onemap.search("048583", timeout=5)
+    assert mock_make_request.call_args[1]["timeout"] == 5
+
+
+@patch("onemapsg.client.make_request")
+def test_client_abandons_work_after_deadline(mock_make_request):
+    """No request should be sent once the deadline has passed."""
+    mock_make_request.return_value = Response(status.HTTP_200_OK, SEARCH_DATA)
+    onemap = OneMap()
+    with pytest.raises(exceptions.DeadlineExceeded):
+        with deadline(0.01):
+            time.sleep(0.02)
+            onemap.search("048583")
+    mock_make_request.assert_not_called()
+
+
+@patch("onemapsg.client.make_request")
+def test_client_timeout_at_deadline(mock_make_request):
+    """A transport timeout caused by the deadline should be reported as
+    DeadlineExceeded and not count against the circuit breaker."""
+
+    def make_request(url, timeout=15, **kwargs):
+        time.sleep(timeout)
+        raise exceptions.TransportTimeout("timed out")
+
+    mock_make_request.side_effect = make_request
+    breaker = CircuitBreaker(min_requests=1)
+    onemap = OneMap(circuit_breaker=breaker)
+    with pytest.raises(exceptions.DeadlineExceeded):
+        with deadline(0.02):
+            onemap.search("048583")
+    assert breaker.state("search") == "closed"
+
+
+@patch("onemapsg.client.make_request")
+def test_client_rate_limiter_within_deadline(mock_make_request):
+    """Waiting on the rate limiter should stop at the deadline, giving back
+    any half-open trial slot."""
+    mock_make_request.return_value = Response(status.HTTP_200_OK, SEARCH_DATA)
+    breaker = CircuitBreaker(min_requests=1, reset_timeout=0)
+    breaker.record("search", True)
+    limiter = RateLimiter(rate=1, burst=1)
+    limiter.acquire()
+    onemap = OneMap(rate_limiter=limiter, circuit_breaker=breaker)
+    with pytest.raises(exceptions.DeadlineExceeded):
+        with deadline(0.05):
+            onemap.search("048583")
+    assert breaker.state("search") == HALF_OPEN
+    assert breaker.circuits["search"].trials == 0
+    mock_make_request.assert_not_called()
+
+
+def test_route_matrix_carries_deadline():
+    """Worker threads of the route matrix should share the deadline."""
+    seen = []
+    client = MagicMock()
+
+    def route(start, end, route_type, public_transport_options=None, timeout=15):
+        seen.append(current_deadline())
+        return MagicMock(route_summary={"total_time": 1, "total_distance": 1})
+
+    client.route.side_effect = route
+    with deadline(5) as active:
+        route_matrix(client, ["1,0"], ["2,0", "3,0"], "walk")
+    assert seen == [active, active]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import time
+
+import pytest
+
+from onemapsg._fanout import fan_out
+from onemapsg.deadline import current_deadline, deadline
+
+
+def test_fan_out():
+    """Should yield every item with its result or exception."""
+
+    def square(n):
+        if n == 3:
+            raise ValueError("three")
+        return n * n
+
+    results = {
+        item: (result, error) for item, result, error in fan_out(square, range(5))
+    }
+    assert {item: result for item, (result, _) in results.items()} == {
+        0: 0,
+        1: 1,
+        2: 4,
+        3: None,
+        4: 16,
+    }
+    assert isinstance(results[3][1], ValueError)
+
+    with pytest.raises(ValueError):
+        list(fan_out(square, range(5), raise_on_error=True))
+    with pytest.raises(ValueError):
+        list(fan_out(square, range(5), window=0))
+
+
+def test_fan_out_carries_the_deadline():
+    """Calls should run under the caller's deadline."""
+    with deadline(10) as active:
+        seen = [found for _, found, _ in fan_out(lambda _: current_deadline(), "ab")]
+    assert seen == [active, active]
+
+
+def test_fan_out_window():
+    """Items should only be pulled as results are taken."""
+    pulled = itertools.count()
+
+    def items():
+        for i in itertools.count():
+            next(pulled)
+            yield i
+
+    results = fan_out(lambda i: i, items(), max_workers=2, window=4)
+    for _ in range(10):
+        next(results)
+    time.sleep(0.05)
+    assert next(pulled) <= 10 + 4
+    results.close()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from onemapsg.geo import (
+    GeohashSnapper,
+    GridSnapper,
+    Snapper,
+    geohash_bounds,
+    geohash_decode,
+    geohash_encode,
+    haversine,
+)
+
+
+def test_haversine():
+    """Should return the distance between two points in metres."""
+    assert haversine(1.3, 103.8, 1.3, 103.8) == 0
+    # One thousandth of a degree of latitude is about 111m.
+    assert haversine(1.3, 103.8, 1.301, 103.8) == pytest.approx(111.2, abs=0.1)
+
+
+def test_geohash():
+    """Should encode to the reference geohash and decode within the cell."""
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    lat, long = geohash_decode("u4pruydqqvj")
+    assert lat == pytest.approx(57.64911, abs=1e-5)
+    assert long == pytest.approx(10.40744, abs=1e-5)
+    min_lat, min_long, max_lat, max_long = geohash_bounds(
+        geohash_encode(1.28118, 103.8519, 7)
+    )
+    assert min_lat <= 1.28118 <= max_lat
+    assert min_long <= 103.8519 <= max_long
+
+
+def test_geohash_snapper():
+    """Points in the same cell should snap to the same point."""
+    snapper = GeohashSnapper(precision=7)
+    assert snapper.snap_point("1.281180,103.851900") == snapper.snap_point(
+        "1.281190,103.851910"
+    )
+    assert snapper.stats.count == 2
+    assert 0 < snapper.stats.max_error < 110
+
+
+def test_grid_snapper():
+    """Snap error should be bounded by half the cell diagonal."""
+    snapper = GridSnapper(metres=50)
+    a = snapper.snap_point("1.2811800,103.8519000")
+    b = snapper.snap_point("1.2811900,103.8519100")
+    assert a == b
+    assert snapper.stats.max_error <= 50 * 2**0.5 / 2
+    assert snapper.stats.to_dict()["count"] == 2
+    snapper.stats.reset()
+    assert snapper.stats.mean_error == 0
+
+
+def test_snapper_is_abstract():
+    """Snappers must implement `snap`."""
+
+    class Incomplete(Snapper):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
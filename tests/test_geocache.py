@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from onemapsg import status
+from onemapsg.client import OneMap
+from onemapsg.geo import haversine
+from onemapsg.geocache import ReverseGeocodeCache
+from onemapsg.response import GeocodeInfo, Response
+from onemapsg.simulator.payloads import reverse_geocode_payload
+
+POINT = (1.28118, 103.85190)
+
+
+def fetch(lat, long, buffer):
+    return GeocodeInfo(**reverse_geocode_payload(lat, long, buffer=buffer)).results
+
+
+def keys(items):
+    return sorted(item.postal_code for item in items)
+
+
+def test_lookup_within_cached_circle():
+    """A request circle inside a cached one should be answered with the
+    same items OneMap would return."""
+    cache = ReverseGeocodeCache()
+    cache.add(*POINT, 200, fetch(*POINT, 200))
+    nearby = (POINT[0] + 0.0005, POINT[1])  # About 55 m north.
+    items = cache.lookup(*nearby, 100)
+    assert items is not None
+    assert keys(items) == keys(fetch(*nearby, 100))
+    assert cache.stats.hits == 1
+
+
+def test_lookup_misses():
+    cache = ReverseGeocodeCache()
+    cache.add(*POINT, 100, fetch(*POINT, 100))
+    # The circle reaches outside the cached one.
+    assert cache.lookup(POINT[0] + 0.0005, POINT[1], 60) is None
+    assert cache.lookup(*POINT, 150) is None
+    # Other parameters give other answers.
+    assert cache.lookup(*POINT, 50, address_type="HDB") is None
+    assert cache.lookup(*POINT, 50, other_features=True) is None
+    assert cache.lookup(*POINT, 50, address_type="ALL") is not None
+    assert cache.stats.misses == 4
+
+
+def test_entries_reach_neighbouring_cells():
+    cache = ReverseGeocodeCache(precision=8)
+    cache.add(*POINT, 300, [])
+    assert len(cache) > 1
+    moved = (POINT[0] + 0.0015, POINT[1] + 0.0005)
+    assert haversine(*POINT, *moved) < 200
+    assert cache.lookup(*moved, 100) == []
+
+
+def test_per_cell_keeps_largest_buffers():
+    cache = ReverseGeocodeCache(per_cell=1)
+    cache.add(*POINT, 50, [])
+    cache.add(*POINT, 200, [])
+    cache.add(*POINT, 100, [])
+    assert cache.lookup(*POINT, 150) == []
+
+
+def test_buffer_for():
+    assert ReverseGeocodeCache().buffer_for(30) == 30
+    assert ReverseGeocodeCache(fetch_buffer=200).buffer_for(30) == 200
+    assert ReverseGeocodeCache(fetch_buffer=200).buffer_for(300) == 300
+    assert ReverseGeocodeCache(fetch_buffer=99.5).buffer_for(30) == 100
+    with pytest.raises(ValueError):
+        ReverseGeocodeCache(fetch_buffer=600)
+
+
+def respond(url, **kwargs):
+    query = parse_qs(urlparse(url).query)
+    lat, long = map(float, query["location"][0].split(","))
+    payload = reverse_geocode_payload(lat, long, buffer=float(query["buffer"][0]))
+    return Response(status.HTTP_200_OK, payload)
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_client_reuses_answers_for_moving_points(mock_request, mock_connect):
+    """Misses should be fetched with `fetch_buffer`, and the points that
+    follow answered from the cache."""
+    mock_connect.return_value = "some-token", 1234567
+    mock_request.side_effect = respond
+    cache = ReverseGeocodeCache(fetch_buffer=300)
+    onemap = OneMap("email@example.com", "password", reverse_geocode_cache=cache)
+    for step in range(5):
+        point = (POINT[0] + step * 0.0002, POINT[1])  # About 22 m apart.
+        result = onemap.reverse_geocode("wgs84", point, buffer=50)
+        assert keys(result.results) == keys(fetch(*point, 50))
+    assert mock_request.call_count == 1
+    assert "buffer=300" in mock_request.call_args[0][0]
+    assert cache.stats.hits == 4
+
+    onemap.reverse_geocode("svy21", (24291.97788882387, 31373.0117224489))
+    assert mock_request.call_count == 2
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from onemapsg import exceptions, status
+from onemapsg.client import OneMap
+from onemapsg.hedge import Hedger
+from onemapsg.ratelimit import RateLimiter
+from onemapsg.response import Response, SearchResult
+
+SEARCH_DATA = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+
+
+def slow_then_fast(slow=0.5):
+    """Returns a request function whose first call is slow."""
+    calls = []
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        if first:
+            time.sleep(slow)
+            return Response(status.HTTP_200_OK, {"call": "first"})
+        return Response(status.HTTP_200_OK, {"call": "hedge"})
+
+    return request, calls
+
+
+def test_hedger_fast_request_is_not_hedged():
+    """No hedge should be sent when the response arrives in time."""
+    hedger = Hedger(initial_delay=1.0)
+    response = hedger.send("search", lambda: Response(status.HTTP_200_OK, {}))
+    assert response.status_code == status.HTTP_200_OK
+    assert hedger.stats.to_dict()["hedges"] == 0
+    assert hedger.stats.requests == 1
+
+
+def test_hedger_uses_first_response():
+    """A slow request should be hedged and the hedge's response used."""
+    hedger = Hedger(initial_delay=0.02)
+    request, calls = slow_then_fast()
+    started_at = time.perf_counter()
+    response = hedger.send("search", request)
+    assert time.perf_counter() - started_at < 0.4
+    assert response.data == {"call": "hedge"}
+    assert len(calls) == 2
+    assert hedger.stats.hedges == 1
+    assert hedger.stats.wins == 1
+
+
+def test_hedger_budget():
+    """Hedges beyond the budget should not be sent."""
+    hedger = Hedger(initial_delay=0.01, budget=0, max_burst=1)
+    request, calls = slow_then_fast(0.05)
+    hedger.send("search", request)
+    request, calls = slow_then_fast(0.05)
+    response = hedger.send("search", request)
+    assert response.data == {"call": "first"}
+    assert len(calls) == 1
+    assert hedger.stats.over_budget == 1
+
+
+def test_hedger_not_allowed():
+    """No hedge should be sent when `allow` refuses, e.g. when rate limited."""
+    hedger = Hedger(initial_delay=0.01)
+    request, calls = slow_then_fast(0.05)
+    response = hedger.send("search", request, allow=lambda: False)
+    assert response.data == {"call": "first"}
+    assert hedger.stats.hedges == 0
+
+
+def test_hedger_adaptive_delay():
+    """The delay should follow the observed percentile, within bounds."""
+    hedger = Hedger(percentile=95, min_samples=20, min_delay=0.05, max_delay=2)
+    assert hedger.delay("search") == hedger.initial_delay
+    for i in range(1, 21):
+        hedger.observe("search", i / 10)
+    assert hedger.delay("search") == pytest.approx(1.9)
+    for _ in range(10):
+        hedger.observe("route", 0.001)
+    for _ in range(10):
+        hedger.observe("route", 0.001)
+    assert hedger.delay("route") == 0.05
+
+
+def test_hedger_error_waits_for_other_request():
+    """If one request fails, the other one's response should be used."""
+    hedger = Hedger(initial_delay=0.01)
+    fast, calls = slow_then_fast(0.2)
+
+    def request():
+        if not calls:
+            calls.append(None)
+            time.sleep(0.05)
+            raise exceptions.TransportError("connection reset")
+        return fast()
+
+    assert hedger.send("search", request).data == {"call": "hedge"}
+    assert hedger.stats.wins == 1
+
+
+@patch("onemapsg.client.make_request")
+def test_client_hedges_gets(mock_make_request):
+    """The client should hedge searches, and not unlisted endpoints."""
+    calls = []
+
+    def make_request(url, **kwargs):
+        calls.append(url)
+        if len(calls) == 1:
+            time.sleep(0.3)
+        return Response(status.HTTP_200_OK, SEARCH_DATA)
+
+    mock_make_request.side_effect = make_request
+    onemap = OneMap(hedger=Hedger(initial_delay=0.01), rate_limiter=RateLimiter(10))
+    assert isinstance(onemap.search("048583"), SearchResult)
+    assert len(calls) == 2
+    assert calls[0] == calls[1]
+
+    calls.clear()
+    onemap.hedger = Hedger(initial_delay=0.01, endpoints=[])
+    onemap.search("048583")
+    assert len(calls) == 1
+
+
+@patch("onemapsg.client.make_request")
+def test_client_hedged_call_is_seen_once(mock_make_request):
+    """Hooks and the profiler should see a hedged call once, with the
+    timings of the response used."""
+    calls = []
+
+    def make_request(url, timings=None, **kwargs):
+        calls.append(url)
+        seconds = 0.3 if len(calls) == 1 else 0.0
+        time.sleep(seconds)
+        timings["request"] = seconds
+        return Response(status.HTTP_200_OK, SEARCH_DATA)
+
+    mock_make_request.side_effect = make_request
+    onemap = OneMap(hedger=Hedger(initial_delay=0.01))
+    events = []
+    onemap.register_hook("before_request", lambda *args: events.append("before"))
+    onemap.register_hook("after_response", lambda *args: events.append("after"))
+    with onemap.profile() as profiler:
+        onemap.search("048583")
+    time.sleep(0.35)
+    assert len(calls) == 2
+    assert events == ["before", "after"]
+    assert list(profiler.samples[("search", "request")]) == [0.0]
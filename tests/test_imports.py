@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+
+from benchmarks.importtime import LAZY_MODULES
+
+
+def imported_modules(code):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in completed.stderr.splitlines()
+        if line.startswith("import time:") and "[us]" not in line
+    }
+
+
+def test_import_is_lazy():
+    """Importing the package should not load heavy dependencies."""
+    modules = imported_modules("import onemapsg")
+    assert "onemapsg.client" in modules
+    assert not [name for name in LAZY_MODULES if name in modules]
+
+
+def test_polyline_loaded_on_lat_longs():
+    """polyline should only be imported when lat_longs is accessed."""
+    modules = imported_modules(
+        "from onemapsg.response import RouteResult\n"
+        "route = RouteResult(route_geometry='_p~iF~ps|U')\n"
+        "assert route.lat_longs == [(38.5, -120.2)]"
+    )
+    assert "polyline" in modules
+    assert "requests" not in modules
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+import numpy as np
+import pytest
+
+from onemapsg.instructions import InstructionTable
+from onemapsg.response import RouteResult
+from onemapsg.simulator.payloads import route_payload
+
+INSTRUCTIONS = [
+    [
+        "Head",
+        "KEPPEL ROAD",
+        94,
+        "1.27048,103.84149",
+        17,
+        "94m",
+        "North East",
+        35.6,
+        "driving",
+        "Head Northeast On Keppel Road",
+    ],
+    [
+        "Left",
+        "EAST COAST PARKWAY",
+        1213,
+        "1.27161,103.84220",
+        112,
+        "1.2km",
+        "East",
+        90.1,
+        "driving",
+        "Turn Left onto East Coast Parkway",
+    ],
+    [
+        "Left",
+        "KEPPEL ROAD",
+        20,
+        "1.28,103.85",
+        5,
+        "20m",
+        "North",
+        "",
+        "driving",
+        "Turn Left onto Keppel Road",
+    ],
+    ["Right", "", None, "", 3],
+]
+
+
+def test_instruction_table():
+    table = InstructionTable(INSTRUCTIONS)
+    assert len(table) == 4
+    assert table.distance.dtype == np.float32
+    assert table.distance[:3].tolist() == [94, 1213, 20]
+    assert math.isnan(table.distance[3])
+    assert table.time.tolist() == [17, 112, 5, 3]
+    assert table.lat_long[1].tolist() == [1.27161, 103.8422]
+    assert np.isnan(table.lat_long[3]).all()
+    assert table.azimuth[0] == pytest.approx(35.6)
+    assert math.isnan(table.azimuth[2])
+    assert table.categories["direction"] == ["Head", "Left", "Right"]
+    assert table.direction.tolist() == [0, 1, 1, 2]
+    assert table.road[0] == table.road[2]
+    assert table.labels("mode") == ["driving", "driving", "driving", None]
+    assert table.where("direction", "Left").tolist() == [False, True, True, False]
+    assert not table.where("direction", "U-turn").any()
+    assert table.distance[table.where("direction", "Left")].sum() == 1233
+    assert table.total_distance == 1327
+    assert table.total_time == 137
+    assert table.text(1) == "Turn Left onto East Coast Parkway"
+    assert table.text(3) is None
+    with pytest.raises(ValueError):
+        table.column("colour")
+    with pytest.raises(ValueError):
+        table.where("distance", 94)
+
+
+def test_instruction_table_is_compact_and_lazy():
+    table = InstructionTable(INSTRUCTIONS * 1000)
+    assert table._columns is None
+    # 3 float32, 2 float64 and 4 int32 columns per instruction.
+    assert table.nbytes == len(table) * (3 * 4 + 2 * 8 + 4 * 4)
+
+
+def test_route_result_instruction_table():
+    route = RouteResult(
+        **route_payload((1.28118, 103.85190), (1.30393, 103.83637), "walk")
+    )
+    table = route.instruction_table
+    assert len(table) == len(route.route_instructions)
+    assert table.labels("road") == [i[1] for i in route.route_instructions]
+    assert RouteResult().instruction_table is None
+
+
+def test_route_result_instruction_table_is_cached():
+    """The table should be parsed once per result and kept out of to_dict."""
+    route = RouteResult(
+        **route_payload((1.28118, 103.85190), (1.30393, 103.83637), "walk")
+    )
+    table = route.instruction_table
+    table.distance
+    assert route.instruction_table is table
+    assert "_instruction_table" not in route.to_dict()
+    route.route_instructions = route.route_instructions[:1]
+    assert len(route.instruction_table) == 1
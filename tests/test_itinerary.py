@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+import numpy as np
+import polyline
+import pytest
+
+from onemapsg.itinerary import Plan, decode_polylines
+from onemapsg.response import RouteResult
+from onemapsg.simulator.payloads import route_payload, transit_plan
+
+START = (1.28118, 103.85190)
+END = (1.30393, 103.83637)
+
+
+def test_decode_polylines():
+    """Should match decoding every polyline on its own."""
+    paths = [[(1.3, 103.8), (1.30123, 103.80456), (1.2, 104.0)], [(-1.5, -2.5)]]
+    geometries = [polyline.encode(paths[0]), "", polyline.encode(paths[1]), ""]
+    decoded = decode_polylines(geometries)
+    assert [d.tolist() for d in decoded] == [
+        [list(p) for p in paths[0]],
+        [],
+        [list(p) for p in paths[1]],
+        [],
+    ]
+    assert decode_polylines([]) == []
+    assert decode_polylines([""])[0].shape == (0, 2)
+
+
+def test_plan():
+    plan = Plan(transit_plan(START, END))
+    assert len(plan) == 3
+    assert plan.origin.name == "Origin"
+    assert plan.destination.lat_long == END
+    assert plan.transfers.tolist() == [0, 1, 1]
+    assert plan.fares.dtype == np.float64
+    assert plan.fares[0] < plan.fares[1] < plan.fares[2]
+    assert plan.durations.tolist() == [i.duration for i in plan.itineraries]
+    assert list(plan.rank("transfers", "fare")) == [0, 1, 2]
+    assert plan.rank()[0] == int(plan.durations.argmin())
+    with pytest.raises(ValueError):
+        plan.array("colour")
+
+
+def test_plan_is_parsed_lazily():
+    plan = Plan(transit_plan(START, END))
+    plan.fares
+    assert plan._itineraries is None
+    itinerary = plan.itineraries[1]
+    assert itinerary._legs is None
+    assert itinerary.modes == ["WALK", "BUS", "SUBWAY", "WALK"]
+    leg = itinerary.legs[1]
+    assert leg.mode == "BUS"
+    assert leg.transit
+    assert leg.route == "11"
+    assert leg.origin.lat_long == pytest.approx((START[0] + 0.002, START[1] + 0.001))
+
+
+def test_itinerary_geometries():
+    itinerary = Plan(transit_plan(START, END)).itineraries[1]
+    decoded = itinerary.leg_lat_longs()
+    assert len(decoded) == len(itinerary.legs)
+    for leg, lat_longs in zip(itinerary.legs, decoded):
+        assert lat_longs.tolist() == [list(p) for p in polyline.decode(leg.geometry)]
+    assert len(itinerary.lat_longs()) == sum(len(d) for d in decoded)
+
+
+def test_missing_values():
+    plan = Plan({"itineraries": [{"duration": 60, "legs": [{}]}]})
+    assert math.isnan(plan.fares[0])
+    itinerary = plan.itineraries[0]
+    assert math.isnan(itinerary.fare)
+    assert itinerary.leg_lat_longs()[0].shape == (0, 2)
+    assert Plan({}).itineraries == []
+
+
+def test_route_result_transit_plan():
+    route = RouteResult(**route_payload(START, END, "pt"))
+    assert len(route.transit_plan) == 3
+    assert RouteResult(**route_payload(START, END, "walk")).transit_plan is None
+
+
+def test_route_result_transit_plan_is_cached():
+    """Itineraries and arrays should be built once per result."""
+    route = RouteResult(**route_payload(START, END, "pt"))
+    plan = route.transit_plan
+    itineraries = plan.itineraries
+    assert route.transit_plan is plan
+    assert route.transit_plan.itineraries is itineraries
+    assert "_transit_plan" not in route.to_dict()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+import pytest
+
+from onemapsg import exceptions
+from onemapsg.matrix import route_matrix
+
+
+def test_route_matrix(fake_client):
+    """Should fill every cell and skip identical origin and destination."""
+    client = fake_client()
+    matrix = route_matrix(client, ["1,0", "2,0"], ["2,0", "3,0"], "drive")
+    assert matrix.total_time.shape == (2, 2)
+    assert matrix.total_time.dtype.name == "float32"
+    assert matrix.total_time.tolist() == [[12, 13], [0, 23]]
+    assert matrix.total_distance.tolist() == [[3, 4], [0, 5]]
+    assert matrix.complete
+    assert client.route.call_count == 3
+
+
+def test_route_matrix_deduplicates(fake_client):
+    """Duplicate and, when allowed, symmetric pairs should be requested once."""
+    client = fake_client()
+    matrix = route_matrix(client, ["1,0", "1,0 "], ["2,0"], "walk")
+    assert client.route.call_count == 1
+    assert matrix.total_time.tolist() == [[12], [12]]
+
+    client = fake_client()
+    matrix = route_matrix(
+        client, ["1,0", "2,0"], ["1,0", "2,0"], "walk", symmetric=True
+    )
+    assert client.route.call_count == 1
+    assert matrix.total_time.tolist() == [[0, 12], [12, 0]]
+
+
+def test_route_matrix_partial_results(fake_client):
+    """Failed pairs should be NaN and reported in errors."""
+    client = fake_client(fail={("1,0", "3,0")})
+    matrix = route_matrix(client, ["1,0"], ["2,0", "3,0"], "drive")
+    assert not matrix.complete
+    assert matrix.total_time[0, 0] == 12
+    assert math.isnan(matrix.total_time[0, 1])
+    assert matrix.missing.tolist() == [[False, True]]
+    assert isinstance(matrix.errors[(0, 1)], exceptions.BadRequest)
+    assert matrix.to_dict()["errors"] == {"0,1": "no route"}
+
+    with pytest.raises(exceptions.BadRequest):
+        route_matrix(client, ["1,0"], ["2,0", "3,0"], "drive", raise_on_error=True)
+
+
+def test_route_matrix_invalid_route_type(fake_client):
+    with pytest.raises(ValueError):
+        route_matrix(fake_client(), ["1,0"], ["2,0"], "pt")
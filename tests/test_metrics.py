@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from onemapsg import status
+from onemapsg.cache import Cache
+from onemapsg.client import OneMap
+from onemapsg.metrics import Counter, Gauge, Histogram, Metric, MetricsRegistry
+from onemapsg.response import Response
+
+
+def test_counter_and_gauge():
+    """Counters and gauges should expose labelled values."""
+    counter = Counter("requests_total", "Requests.", ["endpoint"])
+    counter.inc(("search",))
+    counter.inc(("search",), 2)
+    assert counter.get(("search",)) == 3
+    assert counter.expose() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{endpoint="search"} 3',
+    ]
+    gauge = Gauge("in_flight", "In flight.")
+    gauge.inc()
+    gauge.dec()
+    gauge.set((), 0.5)
+    assert gauge.expose()[-1] == "in_flight 0.5"
+
+
+def test_histogram():
+    """Histogram buckets should be cumulative."""
+    histogram = Histogram("latency", "Latency.", ["endpoint"], buckets=[0.1, 1])
+    histogram.observe(("search",), 0.05)
+    histogram.observe(("search",), 0.5)
+    histogram.observe(("search",), 5)
+    assert histogram.count(("search",)) == 3
+    assert histogram.expose()[2:] == [
+        'latency_bucket{endpoint="search",le="0.1"} 1',
+        'latency_bucket{endpoint="search",le="1"} 2',
+        'latency_bucket{endpoint="search",le="+Inf"} 3',
+        'latency_sum{endpoint="search"} 5.55',
+        'latency_count{endpoint="search"} 3',
+    ]
+
+
+def test_metric_is_abstract():
+    """Metrics must implement `expose`."""
+
+    class Incomplete(Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("name", "documentation")
+
+
+def test_metrics_expose_while_updated():
+    """New label sets added during an export should not break it."""
+    counter = Counter("c", "Counter.", ["n"])
+    histogram = Histogram("h", "Histogram.", ["n"])
+    done = threading.Event()
+
+    def update():
+        for n in range(20000):
+            counter.inc((str(n),))
+            histogram.observe((str(n),), 0.1)
+        done.set()
+
+    thread = threading.Thread(target=update)
+    thread.start()
+    while not done.is_set():
+        counter.expose()
+        histogram.expose()
+    thread.join()
+    assert counter.get(("19999",)) == 1
+    assert histogram.count(("19999",)) == 1
+
+
+@patch("onemapsg.client.make_request")
+def test_registry_install(mock_request):
+    """Registry should record responses, errors and cache statistics."""
+    mock_request.return_value = Response(
+        status.HTTP_200_OK,
+        {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []},
+    )
+    onemap = OneMap(cache=Cache())
+    registry = MetricsRegistry()
+    registry.install(onemap)
+    onemap.search("048583")
+    onemap.search("048583")
+    assert registry.requests.get(("search", "200")) == 1
+    assert registry.latency.count(("search",)) == 1
+    assert registry.in_flight.get(("search",)) == 0
+
+    mock_request.side_effect = ConnectionError("boom")
+    with pytest.raises(ConnectionError):
+        onemap.search("123456")
+    assert registry.errors.get(("search", "ConnectionError")) == 1
+    assert registry.in_flight.get(("search",)) == 0
+
+    exported = registry.to_prometheus()
+    assert 'onemap_requests_total{endpoint="search",status="200"} 1' in exported
+    assert 'onemap_cache_hits_total{cache="default"} 1' in exported
+    assert 'onemap_cache_entries{cache="default"} 1' in exported
+    assert exported.endswith("\n")
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+import pytest
+
+from onemapsg import exceptions, status
+from onemapsg.cache import Cache
+from onemapsg.client import OneMap
+from onemapsg.negative import EMPTY, INVALID, NegativeCache, is_empty
+from onemapsg.response import Response, SearchResult
+
+EMPTY_DATA = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+FOUND_DATA = {
+    "found": 1,
+    "totalNumPages": 1,
+    "pageNum": 1,
+    "results": [{"SEARCHVAL": "ONE RAFFLES QUAY", "POSTAL": "048583"}],
+}
+
+
+def test_is_empty():
+    assert is_empty(SearchResult(**EMPTY_DATA))
+    assert not is_empty(SearchResult(**FOUND_DATA))
+    assert not is_empty(None)
+
+
+@patch("onemapsg.cache.time.monotonic")
+def test_negative_cache_exact(mock_monotonic):
+    """Exact mode should keep values until the TTL."""
+    mock_monotonic.return_value = 0.0
+    negative = NegativeCache(ttl=10)
+    negative.add("a", INVALID, "Invalid location.")
+    assert negative.lookup("a") == (INVALID, "Invalid location.")
+    assert negative.lookup("b") is None
+    mock_monotonic.return_value = 11.0
+    assert negative.lookup("a") is None
+    assert negative.stats.hits == 1
+
+
+@patch("onemapsg.negative.time.monotonic")
+def test_negative_cache_bloom(mock_monotonic):
+    """Bloom mode should remember keys for one to two TTLs."""
+    mock_monotonic.return_value = 0.0
+    negative = NegativeCache(ttl=10, bloom_capacity=1000)
+    negative.add("a", EMPTY, SearchResult(**EMPTY_DATA))
+    negative.add("b", INVALID, "Invalid location.")
+    kind, value = negative.lookup("a")
+    assert kind == EMPTY and is_empty(value)
+    assert negative.lookup("b")[0] == INVALID
+    assert negative.lookup("c") is None
+
+    mock_monotonic.return_value = 10.0
+    assert negative.lookup("a") is not None
+    negative.add("c", EMPTY)
+    mock_monotonic.return_value = 20.0
+    assert negative.lookup("a") is None
+    assert negative.lookup("c") is not None
+    mock_monotonic.return_value = 40.0
+    assert negative.lookup("c") is None
+
+
+def test_negative_cache_bloom_save_and_load(tmp_path):
+    path = str(tmp_path / "negative.bin")
+    negative = NegativeCache(bloom_capacity=1000)
+    negative.add("a", EMPTY)
+    negative.save(path)
+    loaded = NegativeCache(bloom_capacity=1000)
+    loaded.load(path)
+    assert loaded.lookup("a")[0] == EMPTY
+    assert loaded.size_bytes == negative.size_bytes
+    with pytest.raises(ValueError):
+        NegativeCache().save(path)
+
+
+@pytest.mark.parametrize("bloom_capacity", [None, 1000])
+@patch("onemapsg.client.make_request")
+def test_client_skips_known_misses(mock_request, bloom_capacity):
+    """Empty searches and invalid requests should not be sent twice, and
+    should stay out of the main cache."""
+    cache = Cache()
+    onemap = OneMap(
+        cache=cache, negative_cache=NegativeCache(bloom_capacity=bloom_capacity)
+    )
+    mock_request.return_value = Response(status.HTTP_200_OK, EMPTY_DATA)
+    assert onemap.search("no such place").found == 0
+    assert onemap.search("no such place").results == []
+    assert len(cache) == 0
+
+    mock_request.return_value = Response(
+        status.HTTP_400_BAD_REQUEST, {"error": "Invalid search."}
+    )
+    with pytest.raises(exceptions.BadRequest):
+        onemap.search("???")
+    with pytest.raises(exceptions.BadRequest):
+        onemap.search("???")
+    assert mock_request.call_count == 2
+
+    mock_request.return_value = Response(status.HTTP_200_OK, FOUND_DATA)
+    onemap.search("048583")
+    onemap.search("048583")
+    assert mock_request.call_count == 3
+    assert len(cache) == 1
+
+
+@patch("onemapsg.client.make_request")
+def test_client_does_not_remember_other_client_errors(mock_request):
+    """Only 400 responses mean the input itself is invalid."""
+    onemap = OneMap(negative_cache=NegativeCache())
+    mock_request.return_value = Response(status.HTTP_429_TOO_MANY_REQUESTS, {})
+    for _ in range(2):
+        with pytest.raises(exceptions.BadRequest):
+            onemap.search("048583")
+    assert mock_request.call_count == 2
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from onemapsg.geo import GridSnapper
+from onemapsg.normalize import Normalizer, normalize_coordinates, normalize_search_value
+
+
+def test_normalize_search_value():
+    """Equivalent search values should normalize to the same value."""
+    assert normalize_search_value("one raffles quay") == "one raffles quay"
+    assert normalize_search_value("ONE RAFFLES QUAY ") == "one raffles quay"
+    assert normalize_search_value("One  Raffles\tQuay") == "one raffles quay"
+
+
+def test_normalize_search_value_postal_code():
+    """Postal codes should be reduced to the six digits."""
+    assert normalize_search_value(" 048583 ") == "048583"
+    assert normalize_search_value("Singapore 048583") == "048583"
+    assert normalize_search_value("S(048583)") == "048583"
+    assert normalize_search_value("0485831") == "0485831"
+
+
+def test_normalize_coordinates():
+    """Coordinates should be rounded from both strings and sequences."""
+    assert normalize_coordinates("1.2811833871,103.851899818", 5) == (
+        "1.28118",
+        "103.85190",
+    )
+    assert normalize_coordinates((24291.977, 31373.011), 0) == ("24292", "31373")
+
+
+def test_normalizer():
+    """Normalizer should canonicalize positional and keyword arguments."""
+    normalizer = Normalizer(coordinate_precision=3)
+    args, kwargs = normalizer.normalize("search", ("One  Raffles Quay", True), {})
+    assert args == ("one raffles quay", True)
+    args, kwargs = normalizer.normalize("route", ("1.23456,103.1", "1.3,103.87654"), {})
+    assert args == ("1.235,103.100", "1.300,103.877")
+    args, kwargs = normalizer.normalize(
+        "reverse_geocode_wgs84", ((1.30001, 103.8),), {"buffer": 10}
+    )
+    assert args == (("1.300", "103.800"),)
+    assert kwargs == {"buffer": 10}
+    args, kwargs = normalizer.normalize(
+        "reverse_geocode_svy21", ((24291.977, 31373.011),), {}
+    )
+    assert args == (("24292", "31373"),)
+    assert normalizer.normalize("unknown", ("a",), {}) == (("a",), {})
+
+
+def test_normalizer_route_snapper():
+    """Route points should be snapped and PT options ordered."""
+    normalizer = Normalizer(route_snapper=GridSnapper(metres=100))
+    first, _ = normalizer.normalize(
+        "route",
+        ("1.30001,103.80001", "1.35,103.9", "pt", {"mode": "BUS", "date": "d"}),
+        {},
+    )
+    second, _ = normalizer.normalize(
+        "route",
+        ("1.30002,103.80002", "1.35,103.9", "pt", {"date": "d", "mode": "BUS"}),
+        {},
+    )
+    assert first == second
+    assert list(first[3]) == ["date", "mode"]
+    assert normalizer.route_snapper.stats.count == 4
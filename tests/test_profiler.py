@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from onemapsg.profiler import Profiler, percentile
+
+
+def test_percentile():
+    """Should return the nearest-rank percentile."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([3.0], 50) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_profiler_summary():
+    """Summary should be per endpoint, in phase order and in milliseconds."""
+    profiler = Profiler()
+    profiler.record("search", "json_decode", 0.002)
+    profiler.record("search", "request", 0.1)
+    profiler.record("search", "request", 0.3)
+    with profiler.phase("route", "build_url"):
+        pass
+    summary = profiler.summary(percentiles=[50])
+    assert list(summary["search"]) == ["request", "json_decode"]
+    assert summary["search"]["request"]["count"] == 2
+    assert summary["search"]["request"]["mean"] == 200.0
+    assert summary["search"]["request"]["p50"] == 100.0
+    assert summary["route"]["build_url"]["count"] == 1
+    report = profiler.report()
+    assert report.splitlines()[0].split() == [
+        "endpoint",
+        "phase",
+        "count",
+        "mean",
+        "p50",
+        "p90",
+        "p99",
+    ]
+    assert len(report.splitlines()) == 4
+    profiler.reset()
+    assert profiler.summary() == {}
+
+
+def test_profiler_max_samples():
+    """Only the most recent samples should be kept."""
+    profiler = Profiler(max_samples=2)
+    for seconds in [1, 2, 3]:
+        profiler.record("search", "request", seconds)
+    assert list(profiler.samples[("search", "request")]) == [2, 3]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+import pytest
+
+from onemapsg.ratelimit import RateLimiter
+
+
+def test_rate_limiter_invalid_rate():
+    """Rate must be positive."""
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+@patch("onemapsg.ratelimit.time.monotonic")
+def test_rate_limiter_burst_and_refill(mock_monotonic):
+    """Bucket should allow a burst and refill at the given rate."""
+    mock_monotonic.return_value = 0.0
+    limiter = RateLimiter(rate=2, burst=2)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    mock_monotonic.return_value = 0.5
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+
+@patch("onemapsg.ratelimit.time.sleep")
+@patch("onemapsg.ratelimit.time.monotonic")
+def test_rate_limiter_acquire_waits(mock_monotonic, mock_sleep):
+    """acquire should sleep until a token is available."""
+    mock_monotonic.return_value = 0.0
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.acquire()
+
+    def advance(seconds):
+        mock_monotonic.return_value += seconds
+
+    mock_sleep.side_effect = advance
+    assert limiter.acquire()
+    mock_sleep.assert_called_once_with(1.0)
+
+
+@patch("onemapsg.ratelimit.time.sleep")
+@patch("onemapsg.ratelimit.time.monotonic")
+def test_rate_limiter_acquire_timeout(mock_monotonic, mock_sleep):
+    """acquire should give up after the timeout."""
+    mock_monotonic.return_value = 0.0
+    limiter = RateLimiter(rate=0.1, burst=1)
+    assert limiter.acquire()
+
+    def advance(seconds):
+        mock_monotonic.return_value += seconds
+
+    mock_sleep.side_effect = advance
+    assert not limiter.acquire(timeout=1)
@@ -305,9 +305,10 @@ def test_route_result():
     route_result = RouteResult(**data)
     attrs = [x for x in dir(route_result) if not x.startswith("__")]
     for attr in attrs:
-        if attr != "lat_longs" and attr != "to_dict":
+        if attr not in ["lat_longs", "instruction_table", "transit_plan", "to_dict"]:
             assert getattr(route_result, attr) == data[attr]
     assert route_result.lat_longs == polyline.decode(route_result.route_geometry)
+    assert len(route_result.transit_plan) == len(data["plan"]["itineraries"])
     route_result.route_geometry = None
     assert route_result.lat_longs is None
 
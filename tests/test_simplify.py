@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import polyline
+import pytest
+
+from onemapsg.geo import haversine
+from onemapsg.simplify import (
+    DOUGLAS_PEUCKER,
+    VISVALINGAM,
+    douglas_peucker,
+    project,
+    simplify,
+    simplify_many,
+    simplify_polyline,
+    simplify_polylines,
+    visvalingam,
+)
+
+# A straight street with 1m of jitter and a right-angle turn.
+STREET = [(1.3, 103.8 + i * 0.0001) for i in range(50)]
+STREET = [(lat + (i % 2) * 0.00001, long) for i, (lat, long) in enumerate(STREET)]
+PATH = STREET + [(1.3 + i * 0.0001, 103.8049) for i in range(1, 50)]
+
+
+def test_project():
+    """Projected distances should match great-circle distances."""
+    a, b = project([(1.3, 103.8), (1.31, 103.81)])
+    assert np.hypot(*(b - a)) == pytest.approx(
+        haversine(1.3, 103.8, 1.31, 103.81), rel=1e-3
+    )
+
+
+@pytest.mark.parametrize("method,tolerance", [(DOUGLAS_PEUCKER, 5), (VISVALINGAM, 20)])
+def test_simplify(method, tolerance):
+    """The jitter should go and the corner should stay."""
+    simplified = simplify(PATH, tolerance=tolerance, method=method)
+    assert simplified.shape[1] == 2
+    assert len(simplified) == 3
+    assert tuple(simplified[0]) == PATH[0]
+    assert tuple(simplified[-1]) == PATH[-1]
+    corner = np.abs(simplified - (1.3, 103.8049)).sum(axis=1).min()
+    assert corner < 0.0002
+    assert len(simplify(STREET, tolerance=0.1, method=method)) == len(STREET)
+
+
+def test_douglas_peucker_tolerance():
+    """No removed point should be further than the tolerance from the
+    simplified path."""
+    rng = np.random.default_rng(0)
+    points = np.cumsum(rng.normal(size=(500, 2)) * 10, axis=0)
+    keep = douglas_peucker(points, 20)
+    kept = np.flatnonzero(keep)
+    for start, end in zip(kept[:-1], kept[1:]):
+        a, b = points[start], points[end]
+        for p in points[slice(start + 1, end)]:
+            t = np.clip((p - a) @ (b - a) / ((b - a) @ (b - a)), 0, 1)
+            assert np.hypot(*(p - a - t * (b - a))) <= 20
+
+
+def test_short_paths():
+    assert douglas_peucker(np.zeros((0, 2)), 1).tolist() == []
+    assert visvalingam(np.zeros((2, 2)), 1).tolist() == [True, True]
+    assert len(simplify([(1.3, 103.8)], 5)) == 1
+    # A loop back to the start should not collapse.
+    loop = [(1.3, 103.8), (1.301, 103.8), (1.301, 103.801), (1.3, 103.8)]
+    assert len(simplify(loop, 5)) == 4
+
+
+def test_simplify_many():
+    paths = [PATH, STREET, PATH[:2]]
+    simplified = simplify_many(paths, tolerance=5)
+    assert [len(s) for s in simplified] == [
+        len(simplify(path, tolerance=5)) for path in paths
+    ]
+    assert simplify_many([]) == []
+
+
+def test_simplify_polyline():
+    geometry = polyline.encode(PATH)
+    simplified = simplify_polyline(geometry, tolerance=5)
+    assert len(simplified) < len(geometry)
+    decoded = polyline.decode(simplified)
+    assert decoded[0] == PATH[0]
+    assert decoded[-1] == pytest.approx(PATH[-1])
+    assert simplify_polylines([geometry, geometry], 5) == [simplified, simplified]
+
+
+def test_simplify_invalid_method():
+    with pytest.raises(ValueError):
+        simplify(PATH, method="nearest")
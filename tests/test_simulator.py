@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+
+import pytest
+
+from onemapsg import exceptions, status
+from onemapsg.api import API, BASE_URL
+from onemapsg.client import OneMap
+from onemapsg.simulator import (
+    FaultProfile,
+    Simulator,
+    constant_latency,
+    lognormal_latency,
+    uniform_latency,
+)
+from onemapsg.simulator.payloads import reverse_geocode_payload
+
+
+@pytest.fixture
+def simulator():
+    with Simulator(seed=1) as simulator:
+        API.set_base_url(simulator.base_url)
+        yield simulator
+    API.set_base_url(BASE_URL)
+
+
+def test_latency_distributions():
+    """Latency helpers should return callables taking a Random."""
+    rng = random.Random(1)
+    assert constant_latency(0.1)(rng) == 0.1
+    assert 0.1 <= uniform_latency(0.1, 0.2)(rng) <= 0.2
+    samples = sorted(lognormal_latency(0.05, 0.5)(rng) for _ in range(2000))
+    assert samples[1000] == pytest.approx(0.05, rel=0.2)
+
+
+def test_simulator_endpoints(simulator):
+    """The client should work end to end against the simulator."""
+    onemap = OneMap("email@example.com", "password")
+    search = onemap.search("one raffles quay", page_number=3)
+    assert search.found == 25
+    assert search.total_num_pages == 3
+    assert search.page_num == 3
+    assert len(search.results) == 5
+
+    route = onemap.route("1.28118,103.85190", "1.30393,103.83637", "drive")
+    assert route.route_summary["total_distance"] > 0
+    assert len(route.lat_longs) > 2
+    pt = onemap.route("1.28118,103.85190", "1.30393,103.83637", "pt")
+    assert len(pt.plan["itineraries"]) == 3
+
+    geocode = onemap.reverse_geocode("wgs84", (1.3, 103.8), buffer=100)
+    assert geocode.results
+    assert onemap.reverse_geocode("svy21", (24291.97, 31373.01), buffer=100).results
+    assert simulator.stats.count("search", status.HTTP_200_OK) == 1
+    assert simulator.stats.count(status_code=status.HTTP_200_OK) == 6
+
+
+def test_simulator_faults(simulator):
+    """Errors, rate limits and token expiry should be injected."""
+    onemap = OneMap("email@example.com", "password")
+    simulator.set_profile(FaultProfile(error_rate=1.0))
+    with pytest.raises(exceptions.ServerError):
+        onemap.search("paragon")
+
+    simulator.set_profile(FaultProfile(rate_limit=1, rate_limit_burst=1))
+    onemap.search("paragon")
+    with pytest.raises(exceptions.BadRequest):
+        onemap.search("paragon")
+    assert simulator.stats.count("search", status.HTTP_429_TOO_MANY_REQUESTS) == 1
+
+    simulator.set_profile(FaultProfile(burst_rate=1.0, burst_length=3))
+    for _ in range(3):
+        with pytest.raises(exceptions.ServerError):
+            onemap.search("paragon")
+
+    simulator.set_profile(FaultProfile(found_rate=0.0))
+    assert onemap.search("paragon").found == 0
+
+    simulator.expire_tokens()
+    with pytest.raises(exceptions.BadRequest):
+        onemap.route("1.28118,103.85190", "1.30393,103.83637", "walk")
+
+
+def test_simulator_tokens_from_many_threads(simulator):
+    """Tokens issued while others expire should not break the expiry."""
+
+    def issue():
+        for _ in range(500):
+            simulator.issue_token()
+
+    threads = [threading.Thread(target=issue) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        simulator.expire_tokens()
+    for thread in threads:
+        thread.join()
+    simulator.expire_tokens()
+    assert len(simulator.tokens) == 2000
+    assert not any(simulator.tokens.values())
+
+
+def test_simulator_bad_credentials(simulator):
+    with pytest.raises(exceptions.AuthenticationError):
+        OneMap("", "")
+
+
+def test_reverse_geocode_payload_overlap():
+    """Neighbouring points should share lattice buildings."""
+    a = reverse_geocode_payload(1.3, 103.8, buffer=100)["GeocodeInfo"]
+    b = reverse_geocode_payload(1.3005, 103.8, buffer=100)["GeocodeInfo"]
+    postal_codes = {item["POSTALCODE"] for item in a}
+    assert postal_codes & {item["POSTALCODE"] for item in b}
+    assert reverse_geocode_payload(1.3, 103.8, buffer=10, address_type="hdb")
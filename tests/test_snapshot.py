@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from onemapsg.response import GeocodeInfo, GeocodeInfoItem, SearchResult
+from onemapsg.snapshot import Snapshot, write_snapshot
+
+
+def search_result(*names):
+    return SearchResult(
+        found=len(names),
+        totalNumPages=1,
+        pageNum=1,
+        results=[
+            {
+                "SEARCHVAL": name,
+                "POSTAL": "048583",
+                "X": "29815.8",
+                "Y": "29024.6",
+                "LATITUDE": "1.28",
+                "LONGITUDE": "103.85",
+            }
+            for name in names
+        ],
+    )
+
+
+@pytest.fixture
+def search_snapshot(tmp_path):
+    path = str(tmp_path / "search.omss")
+    write_snapshot(
+        path,
+        {
+            "raffles": search_result("ONE RAFFLES QUAY", "RAFFLES PLACE"),
+            "nowhere": search_result(),
+            "café": search_result("CAFÉ"),
+        },
+    )
+    with Snapshot.open(path) as snapshot:
+        yield snapshot
+
+
+def test_snapshot_search(search_snapshot):
+    """Results should be read back with their items."""
+    assert len(search_snapshot) == 3
+    result = search_snapshot.get("raffles")
+    assert result.found == 2
+    assert len(result.results) == 2
+    item = result.results[1]
+    assert item.search_value == "RAFFLES PLACE"
+    assert item.postal == "048583"
+    assert item.blk_no is None
+    assert item.coordinates == ("29815.8", "29024.6")
+    assert item.lat_long == ("1.28", "103.85")
+    assert [i.search_value for i in result.results[-2:]] == [
+        "ONE RAFFLES QUAY",
+        "RAFFLES PLACE",
+    ]
+    assert result.to_dict()["results"][0]["search_value"] == "ONE RAFFLES QUAY"
+    assert search_snapshot.get("café").results[0].search_value == "CAFÉ"
+    assert search_snapshot.get("nowhere").found == 0
+
+
+def test_snapshot_keeps_page_metadata(tmp_path):
+    """Results should keep their original counts, not those of the page."""
+    path = str(tmp_path / "paged.omss")
+    result = search_result("ONE RAFFLES QUAY", "RAFFLES PLACE")
+    result.found, result.total_num_pages, result.page_num = 25, 3, 2
+    write_snapshot(path, {"raffles": result})
+    with Snapshot.open(path) as snapshot:
+        restored = snapshot.get("raffles")
+        assert (restored.found, restored.total_num_pages, restored.page_num) == (
+            25,
+            3,
+            2,
+        )
+        assert len(restored.results) == 2
+
+
+def test_snapshot_missing_keys(search_snapshot):
+    assert search_snapshot.get("missing") is None
+    assert "missing" not in search_snapshot
+    assert "aaa" not in search_snapshot
+    assert "zzz" not in search_snapshot
+    assert "raffles" in search_snapshot
+    with pytest.raises(IndexError):
+        search_snapshot.get("raffles").results[2]
+
+
+def test_snapshot_reverse_geocode(tmp_path):
+    path = str(tmp_path / "geocode.omss")
+    result = GeocodeInfo(
+        GeocodeInfo=[
+            {"BUILDINGNAME": "ONE RAFFLES QUAY", "XCOORD": "1", "YCOORD": "2"},
+            {"ROAD": "RAFFLES PLACE"},
+        ]
+    )
+    assert write_snapshot(path, [("1.28,103.85", result)]) == 1
+    with Snapshot.open(path) as snapshot:
+        items = list(snapshot.get("1.28,103.85").results)
+    assert isinstance(items[0], GeocodeInfoItem)
+    assert items[0].to_dict() == result.results[0].to_dict()
+    assert items[1].to_dict() == result.results[1].to_dict()
+
+
+def test_snapshot_many_keys(tmp_path):
+    """Binary search should find every key."""
+    path = str(tmp_path / "many.omss")
+    keys = [f"{i:06d}" for i in range(0, 2000, 7)]
+    write_snapshot(path, {key: search_result(key) for key in keys})
+    with Snapshot.open(path) as snapshot:
+        for key in keys:
+            assert snapshot.get(key).results[0].search_value == key
+        assert "000001" not in snapshot
+
+
+def test_snapshot_errors(tmp_path):
+    path = tmp_path / "bad.omss"
+    with pytest.raises(ValueError):
+        write_snapshot(str(path), {"a": search_result("A"), "b": GeocodeInfo()})
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        Snapshot.open(str(path))
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import itertools
+import time
+from unittest.mock import patch
+
+import pytest
+
+from onemapsg import exceptions, status
+from onemapsg.client import OneMap
+from onemapsg.response import Response
+from onemapsg.simulator.payloads import search_payload
+from onemapsg.stream import geocode_stream, geocode_stream_async
+
+
+class Counted:
+    """An endless iterable counting how many inputs were pulled."""
+
+    def __init__(self):
+        self.pulled = 0
+
+    def __iter__(self):
+        for i in itertools.count():
+            self.pulled += 1
+            yield i, f"{i:06d}"
+
+
+def test_geocode_stream(fake_client):
+    """Every input should be yielded once, with its key."""
+    client = fake_client(fail={"000003"})
+    inputs = [(i, f"{i:06d}") for i in range(20)] + ["RAFFLES PLACE"]
+    results = list(geocode_stream(client, inputs, window=4, max_workers=4))
+    assert sorted(str(r.key) for r in results) == sorted(
+        [str(i) for i in range(20)] + ["RAFFLES PLACE"]
+    )
+    failed = [r for r in results if not r.ok]
+    assert [r.key for r in failed] == [3]
+    assert isinstance(failed[0].error, exceptions.ServerError)
+    ok = next(r for r in results if r.key == 7)
+    assert ok.search_value == "000007"
+    assert ok.result.results[0].search_value.startswith("000007")
+    assert client.max_in_flight <= 4
+
+
+def test_geocode_stream_backpressure(fake_client):
+    """Inputs should only be pulled as the consumer takes results."""
+    inputs = Counted()
+    stream = geocode_stream(fake_client(), inputs, window=8)
+    for _ in range(10):
+        next(stream)
+    time.sleep(0.05)
+    assert inputs.pulled <= 10 + 8
+    stream.close()
+
+
+def test_geocode_stream_raise_on_error(fake_client):
+    client = fake_client(fail={"bad"})
+    with pytest.raises(exceptions.ServerError):
+        list(geocode_stream(client, ["bad"], raise_on_error=True))
+    with pytest.raises(ValueError):
+        list(geocode_stream(client, ["good"], window=0))
+
+
+def test_geocode_stream_async(fake_client):
+    client = fake_client(fail={"000002"}, delay=0.01)
+
+    async def produce():
+        for i in range(12):
+            await asyncio.sleep(0)
+            yield i, f"{i:06d}"
+
+    async def consume(inputs):
+        return [r async for r in geocode_stream_async(client, inputs, window=3)]
+
+    results = asyncio.run(consume(produce()))
+    assert sorted(r.key for r in results) == list(range(12))
+    assert [r.key for r in results if not r.ok] == [2]
+    assert client.max_in_flight <= 3
+    results = asyncio.run(consume(["000001", "000002"]))
+    assert len(results) == 2
+
+
+def test_geocode_stream_async_backpressure(fake_client):
+    inputs = Counted()
+
+    async def consume():
+        stream = geocode_stream_async(fake_client(), inputs, window=8)
+        for _ in range(10):
+            await stream.__anext__()
+        await asyncio.sleep(0.05)
+        await stream.aclose()
+
+    asyncio.run(consume())
+    assert inputs.pulled <= 10 + 8
+
+
+@patch("onemapsg.client.make_request")
+def test_client_geocode_stream(mock_request):
+    mock_request.side_effect = lambda url, **kwargs: Response(
+        status.HTTP_200_OK, search_payload("048583", found=1)
+    )
+    onemap = OneMap()
+    results = list(onemap.geocode_stream([("a", "048583"), ("b", "048583")]))
+    assert sorted(r.key for r in results) == ["a", "b"]
+    assert all(r.ok for r in results)
+
+    async def consume():
+        return [r async for r in onemap.geocode_stream_async(["048583"])]
+
+    assert asyncio.run(consume())[0].result.found == 1
+
+
+def test_geocode_stream_async_yields_while_the_source_is_idle(fake_client):
+    """Finished searches should not wait for the next input to arrive."""
+    arrived = asyncio.Event()
+
+    async def produce():
+        yield "000001"
+        await arrived.wait()
+        yield "000002"
+
+    async def consume():
+        stream = geocode_stream_async(fake_client(), produce())
+        first = await asyncio.wait_for(stream.__anext__(), 1)
+        arrived.set()
+        rest = [r async for r in stream]
+        return [first.key] + [r.key for r in rest]
+
+    assert asyncio.run(consume()) == ["000001", "000002"]
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from onemapsg import exceptions
+from onemapsg.geo import haversine
+from onemapsg.simulator.payloads import reverse_geocode_payload
+from onemapsg.sweep import _contains, _polygon, sweep, sweep_points
+
+BOUNDS = (1.280, 103.840, 1.290, 103.852)
+TRIANGLE = [(1.280, 103.840), (1.290, 103.846), (1.280, 103.852)]
+
+
+@pytest.mark.parametrize("area", [BOUNDS, TRIANGLE])
+def test_sweep_points_cover_the_area(area):
+    """Every point of the area should be within the buffer of a sample."""
+    points = sweep_points(area, 200)
+    rng = random.Random(0)
+    polygon = _polygon(area)
+    for _ in range(300):
+        lat = rng.uniform(BOUNDS[0], BOUNDS[2])
+        long = rng.uniform(BOUNDS[1], BOUNDS[3])
+        if not _contains(polygon, lat, long):
+            continue
+        assert min(haversine(lat, long, *point) for point in points) <= 200 * 1.001
+
+
+def test_sweep_points_overlap_little():
+    """About 1.2 circle areas per unit of area, as for a hexagonal lattice,
+    plus the circles along the edges."""
+    points = sweep_points(BOUNDS, 100)
+    area = haversine(1.28, 103.84, 1.29, 103.84) * haversine(
+        1.28, 103.84, 1.28, 103.852
+    )
+    assert len(points) * 3.1416 * 100**2 / area < 1.8
+    assert len(sweep_points(TRIANGLE, 100)) < len(points)
+
+
+def test_sweep_points_invalid():
+    with pytest.raises(ValueError):
+        sweep_points(BOUNDS, 0)
+    with pytest.raises(ValueError):
+        sweep_points((1.29, 103.84, 1.28, 103.85), 100)
+    with pytest.raises(ValueError):
+        sweep_points([(1.28, 103.84), (1.29, 103.85)], 100)
+
+
+def test_sweep(fake_client):
+    """Items should be merged without duplicates and clipped to the area."""
+    client = fake_client()
+    result = sweep(client, BOUNDS, buffer=150)
+    expected = {
+        (item["POSTALCODE"], (item["LATITUDE"], item["LONGITUDE"]))
+        for item in reverse_geocode_payload(1.285, 103.846, buffer=1000)["GeocodeInfo"]
+        if BOUNDS[0] <= float(item["LATITUDE"]) <= BOUNDS[2]
+        and BOUNDS[1] <= float(item["LONGITUDE"]) <= BOUNDS[3]
+    }
+    keys = [(item.postal_code, item.lat_long) for item in result.items]
+    assert len(keys) == len(set(keys))
+    assert set(keys) == expected
+    assert result.duplicates > 0
+    assert result.complete
+    assert client.reverse_geocode.call_count == len(result.points)
+    assert client.reverse_geocode.call_args[1]["buffer"] == 150
+
+    unclipped = sweep(client, BOUNDS, buffer=150, clip=False)
+    assert len(unclipped) > len(result)
+
+
+def test_sweep_errors(fake_client):
+    points = sweep_points(BOUNDS, 300)
+    client = fake_client(fail={points[0]})
+    result = sweep(client, BOUNDS, buffer=300)
+    assert list(result.errors) == [points[0]]
+    assert not result.complete
+    assert result.to_dict()["errors"]
+    with pytest.raises(exceptions.ServerError):
+        sweep(client, BOUNDS, buffer=300, raise_on_error=True)
+    with pytest.raises(ValueError):
+        sweep(client, BOUNDS, buffer=501)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import json
+import pickle
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from onemapsg import exceptions, status
+from onemapsg.simulator import FaultProfile, Simulator, constant_latency
+from onemapsg.transport import HttpxTransport, RequestsTransport, Urllib3Transport
+
+TRANSPORTS = [
+    RequestsTransport,
+    lambda: RequestsTransport(requests.Session()),
+    Urllib3Transport,
+    HttpxTransport,
+    lambda: HttpxTransport(http2=False),
+]
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    with Simulator(seed=0) as simulator:
+        yield simulator
+
+
+@pytest.mark.parametrize("make_transport", TRANSPORTS)
+def test_transports_return_the_same_response(simulator, make_transport):
+    transport = make_transport()
+    url = simulator.base_url + "commonapi/search?searchVal=048583&returnGeom=Y"
+    timings = {}
+    response = transport.request("get", url, timings=timings)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["found"] == 25
+    assert set(timings) == {"request", "download", "json_decode"}
+
+    response = transport.request(
+        "post",
+        simulator.base_url + "privateapi/auth/post/getToken",
+        data={"email": "email@example.com", "password": "password"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "access_token" in response.data
+
+    response = transport.request("get", simulator.base_url + "privateapi/unknown")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize("make_transport", TRANSPORTS)
+def test_transports_time_out(make_transport):
+    transport = make_transport()
+    profile = FaultProfile(latency=constant_latency(0.5))
+    with Simulator(profile) as simulator:
+        url = simulator.base_url + "commonapi/search?searchVal=048583"
+        with pytest.raises(exceptions.TransportTimeout):
+            transport.request("get", url, timeout=0.05)
+
+
+@pytest.mark.parametrize("make_transport", TRANSPORTS)
+def test_transports_raise_connection_errors(make_transport):
+    with Simulator() as simulator:
+        url = simulator.base_url + "commonapi/search?searchVal=048583"
+    with pytest.raises(exceptions.TransportError):
+        make_transport().request("get", url, timeout=1)
+
+
+@pytest.mark.parametrize("make_transport", TRANSPORTS)
+def test_transports_leave_body_undecoded(simulator, make_transport):
+    url = simulator.base_url + "commonapi/search?searchVal=048583&returnGeom=Y"
+    response = make_transport().request("get", url, decode=False)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {}
+    assert json.loads(response.content)["found"] == 25
+
+
+class HtmlHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"<html>Service unavailable</html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def html_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), HtmlHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/commonapi/search"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("make_transport", TRANSPORTS)
+def test_transports_raise_on_bodies_that_are_not_json(html_url, make_transport):
+    with pytest.raises(exceptions.InvalidJSON, match="not valid JSON"):
+        make_transport().request("get", html_url, timings={})
+    with pytest.raises(exceptions.InvalidJSON, match="not valid JSON"):
+        make_transport().request("get", html_url)
+
+
+def test_requests_transport_errors_are_requests_exceptions(html_url):
+    """Callers catching `requests` exceptions should keep catching them."""
+    profile = FaultProfile(latency=constant_latency(0.5))
+    with Simulator(profile) as simulator:
+        url = simulator.base_url + "commonapi/search?searchVal=048583"
+        with pytest.raises(requests.Timeout) as error:
+            RequestsTransport().request("get", url, timeout=0.05)
+        assert isinstance(error.value, exceptions.TransportTimeout)
+    with pytest.raises(requests.ConnectionError) as error:
+        RequestsTransport().request("get", url, timeout=1)
+    assert isinstance(error.value, exceptions.TransportError)
+    with pytest.raises(ValueError):
+        RequestsTransport().request("get", html_url)
+
+
+def test_transport_errors_can_be_pickled(html_url):
+    """Errors should survive being passed to another process."""
+    errors = []
+    for url in ["http://127.0.0.1:1/", html_url]:
+        try:
+            RequestsTransport().request("get", url, timeout=1)
+        except exceptions.TransportError as err:
+            errors.append(err)
+    connection_error, invalid_json = errors
+    copy = pickle.loads(pickle.dumps(connection_error))
+    assert isinstance(copy, requests.ConnectionError)
+    assert isinstance(copy, exceptions.TransportError)
+    assert str(copy) == str(connection_error)
+    copy = pickle.loads(pickle.dumps(invalid_json))
+    assert isinstance(copy, exceptions.InvalidJSON)
+    assert isinstance(copy, ValueError)
+
+
+def test_requests_transport_invalid_json_before_requests_2_27():
+    """Older `requests` raise a plain json.JSONDecodeError from `json()`."""
+    session = MagicMock()
+    session.get.return_value.json.side_effect = json.JSONDecodeError("", "<", 0)
+    with pytest.raises(ValueError) as error:
+        RequestsTransport(session).request("get", "https://example.com/")
+    assert isinstance(error.value, exceptions.InvalidJSON)
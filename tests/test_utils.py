@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import datetime
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -15,8 +16,10 @@ from onemapsg.utils import (
     get_route_class,
     get_search_class,
     make_request,
+    strip_token,
     to_dict,
     validate_address_type,
+    with_token,
 )
 
 
@@ -175,3 +178,41 @@ def test_get_reverse_geocode_svy21_class():
     """Should return GeocodeInfo class."""
     klass = get_reverse_geocode_svy21_class()
     assert klass == GeocodeInfo
+
+
+def test_strip_token():
+    """Should remove only the token parameter from the URL."""
+    url = (
+        "https://developers.onemap.sg/privateapi/routingsvc/route?start=1&token=t&end=2"
+    )
+    assert strip_token(url) == (
+        "https://developers.onemap.sg/privateapi/routingsvc/route?start=1&end=2"
+    )
+    assert (
+        strip_token("https://developers.onemap.sg/") == "https://developers.onemap.sg/"
+    )
+
+
+@patch("requests.get")
+def test_make_request_timings(mock_get):
+    """Should record request, download and decoding time."""
+    mock_json = MagicMock(return_value={"detail": "some data"})
+    mock_get.return_value = MagicMock(
+        status_code=status.HTTP_200_OK,
+        json=mock_json,
+        elapsed=datetime.timedelta(seconds=0),
+    )
+    timings = {}
+    make_request("https://testendpoint.com/api/test", timings=timings)
+    assert sorted(timings) == ["download", "json_decode", "request"]
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+def test_with_token():
+    """Should set the token parameter, replacing any other."""
+    base = "https://developers.onemap.sg/privateapi/routingsvc/route"
+    assert with_token(f"{base}?start=1&token=t&end=2", "new") == (
+        f"{base}?start=1&end=2&token=new"
+    )
+    assert with_token(f"{base}?token=None", "new") == f"{base}?token=new"
+    assert with_token(base, "a b") == f"{base}?token=a+b"
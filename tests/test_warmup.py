@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from onemapsg import status
+from onemapsg.cache import Cache
+from onemapsg.client import OneMap
+from onemapsg.ratelimit import RateLimiter
+from onemapsg.response import Response
+from onemapsg.warmup import Warmup
+
+SEARCH_DATA = {"found": 0, "totalNumPages": 0, "pageNum": 1, "results": []}
+
+
+def test_cache_hot_keys():
+    """Keys should be ranked by hits and forgotten when evicted."""
+    cache = Cache(maxsize=3)
+    for key in "abc":
+        cache.set(key, key)
+    for key in "abbccc":
+        cache.get(key)
+    assert cache.hot_keys(2) == ["c", "b"]
+    cache.delete("c")
+    cache.set("d", "d")
+    cache.set("e", "e")
+    assert cache.hot_keys(1) == ["b"]
+    assert set(cache.hot_keys(5)) == {"b", "d", "e"}
+
+
+@patch("onemapsg.client.make_request")
+def test_warmup_from_hot_keys(mock_request):
+    """Hot keys of one cache should warm another one."""
+    mock_request.return_value = Response(status.HTTP_200_OK, SEARCH_DATA)
+    old = OneMap(cache=Cache())
+    old.search("048583")
+    old.search("048583")
+    old.search("018989")
+    old.search("018989")
+    hot_keys = old.cache.hot_keys(10)
+    assert len(hot_keys) == 2
+
+    mock_request.reset_mock()
+    new = OneMap(cache=Cache(), rate_limiter=RateLimiter(rate=100))
+    seen = []
+    progress = Warmup(
+        new, hot_keys + hot_keys[:1], max_workers=1, on_progress=seen.append
+    ).run()
+    assert progress.to_dict()["fetched"] == 2
+    assert progress.skipped == 1
+    assert progress.finished and not progress.cancelled
+    assert progress.fraction == 1
+    assert len(seen) == 3
+    assert mock_request.call_count == 2
+    new.search("048583")
+    assert mock_request.call_count == 2
+
+
+@patch("onemapsg.client.OneMap._connect")
+@patch("onemapsg.client.make_request")
+def test_prefetch_private_endpoint(mock_request, mock_connect):
+    """Private endpoints should be fetched with the current token."""
+    mock_connect.return_value = ("token", 4102444800)
+    mock_request.return_value = Response(status.HTTP_200_OK, {"GeocodeInfo": []})
+    onemap = OneMap("email@example.com", "password", cache=Cache())
+    onemap.reverse_geocode("wgs84", (1.3, 103.8))
+    key = onemap.cache.hot_keys(1)[0]
+    assert "token" not in key
+    onemap.cache.clear()
+    assert onemap.prefetch(key)
+    assert "token=token" in mock_request.call_args[0][0]
+    assert key in onemap.cache
+    with pytest.raises(ValueError):
+        onemap.prefetch("https://example.com/other")
+
+
+def test_warmup_callables_errors_and_cancel():
+    """Failures should be recorded, and cancelling should stop the workers."""
+    client = MagicMock()
+    release = threading.Event()
+    calls = []
+
+    def query(onemap):
+        calls.append(None)
+        release.wait(1)
+
+    def failing(onemap):
+        raise ValueError("no")
+
+    progress = Warmup(client, [failing]).run()
+    assert progress.failed == 1
+    assert isinstance(progress.errors[0][1], ValueError)
+
+    warmup = Warmup(client, iter([query] * 100), max_workers=2).start()
+    warmup.cancel()
+    release.set()
+    assert warmup.wait(1)
+    assert warmup.progress.cancelled
+    assert warmup.progress.total is None
+    assert len(calls) <= 2
+    assert "queries" in str(warmup.progress)